@@ -1,9 +1,18 @@
 # app_streamlit.py
 import json
+import time
+
 import streamlit as st
 
+import config
+
 # 🔗 IMPORTAMOS EL MODELO
-from gemini_model import generate_insights
+from explorer import PAGE_SIZE, cache_version, event_sources, query_events, query_jobs
+from chat_history import append_turn, clear_history, history_for_model, load_recent, new_session_id
+from daily_report import answer_question
+from model_guard import ModelTimeoutError, ModelUnavailableError, answer_with_fallback, get_guard_metrics
+from redis_utils import read_data_version
+from request_coordinator import get_coordinator, request_key
 
 
 # ---------------------------
@@ -163,35 +172,60 @@ def render_sidebar():
             unsafe_allow_html=True,
         )
 
+        st.markdown("---")
+
+        with st.expander("Estado del modelo", expanded=False):
+            st.json(get_guard_metrics())
+
 
 # ---------------------------
-# Secciones principales
+# Llamadas al modelo (cola compartida)
 # ---------------------------
-def render_tab_explorar():
-    st.markdown(
-        "<div class='main-content'>"
-        "<h1 style='margin-bottom:0;'>Explorar Copilot-DN</h1>"
-        "</div>",
-        unsafe_allow_html=True,
+def _current_data_version():
+    try:
+        return read_data_version()
+    except Exception:
+        return None
+
+
+def ask_copilot(user_prompt, history):
+    """
+    Llama al Copilot (answer_question) a través del coordinador del proceso:
+    preguntas idénticas en vuelo comparten la llamada y, si hay cola,
+    se muestra la posición en lugar de un spinner genérico.
+    """
+    version = _current_data_version()
+    # history incluye la pregunta actual: lo previo es todo menos el último turno
+    key = request_key(user_prompt, version, history[:-1]) if version else None
+
+    # Si Gemini no está sano, se sirve la última respuesta buena a la misma pregunta
+    handle = get_coordinator().submit(
+        key,
+        lambda: answer_with_fallback(
+            key, lambda: answer_question(user_question=user_prompt, history=history)
+        ),
     )
-    st.markdown("<div class='title-underline'></div>", unsafe_allow_html=True)
 
-    st.markdown(
-        "<p class='main-content' style='font-size:1.05rem;'>"
-        "Descubre las funcionalidades clave de Copilot DN."
-        "</p>",
-        unsafe_allow_html=True,
-    )
+    status = st.empty()
+    while not handle.done():
+        position = handle.queue_position()
+        if position is None:
+            status.info("Analizando datos y generando insights con Copilot DN...")
+        else:
+            status.info(
+                f"⏳ Hay mucha demanda en este momento. Tu pregunta está en cola "
+                f"(posición {position + 1})."
+            )
+        time.sleep(0.3)
+    status.empty()
 
-    st.markdown(
-        "<p class='muted'>"
-        "Revisar la Guía de Usuario en la sección "
-        "<b>💡 Cómo usar</b> antes de probar Copilot DN."
-        "</p>",
-        unsafe_allow_html=True,
-    )
+    return handle.result()
 
-    st.markdown("")
+
+# ---------------------------
+# Secciones principales
+# ---------------------------
+def render_feature_cards():
     col1, col2, col3 = st.columns(3)
 
     with col1:
@@ -236,15 +270,168 @@ def render_tab_explorar():
             unsafe_allow_html=True,
         )
 
-    st.markdown("")
+
+# Páginas cacheadas por versión de datos y generación de los índices
+# (explorer.cache_version): compartidas entre sesiones y válidas hasta la
+# próxima publicación o actualización de un índice
+@st.cache_data(ttl=3600, max_entries=1000, show_spinner=False)
+def cached_jobs_page(version_key, filters, page):
+    return query_jobs(page=page, **dict(filters))
+
+
+@st.cache_data(ttl=3600, max_entries=1000, show_spinner=False)
+def cached_events_page(version_key, filters, page):
+    return query_events(page=page, **dict(filters))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_event_sources(version_key):
+    return event_sources()
+
+
+def _pager(key, total):
+    """Selector de página; devuelve el índice (desde 0)."""
+    pages = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
+    cols = st.columns([1, 3])
+    with cols[0]:
+        page = st.number_input(
+            "Página", min_value=1, max_value=pages, value=1, step=1, key=key
+        )
+    with cols[1]:
+        st.markdown(
+            f"<p class='muted' style='margin-top:2rem;'>{total} resultados · "
+            f"{pages} páginas</p>",
+            unsafe_allow_html=True,
+        )
+    return int(page) - 1
+
+
+def _date_range(key):
+    value = st.date_input("Fecha (desde – hasta)", value=(), key=key)
+    if isinstance(value, (list, tuple)):
+        date_from = value[0] if len(value) > 0 else None
+        date_to = value[1] if len(value) > 1 else None
+        return date_from, date_to
+    return value, value
+
+
+def render_jobs_browser(version_key):
+    cols = st.columns(3)
+    with cols[0]:
+        text = st.text_input("Buscar puesto", key="exp_jobs_text")
+    with cols[1]:
+        company = st.text_input("Empresa", key="exp_jobs_company")
+    with cols[2]:
+        location = st.text_input("Ubicación", key="exp_jobs_location")
+    date_from, date_to = _date_range("exp_jobs_dates")
+
+    filters = (
+        ("text", text.strip()),
+        ("company", company.strip()),
+        ("location", location.strip()),
+        ("date_from", date_from),
+        ("date_to", date_to),
+    )
+    total, _ = cached_jobs_page(version_key, filters, 0)
+    page = _pager("exp_jobs_page", total)
+    _, rows = cached_jobs_page(version_key, filters, page)
+
+    if not rows:
+        st.info("No hay ofertas que coincidan con los filtros.")
+        return
+
+    st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_order=["puesto", "empresa", "lugar", "fecha_creacion", "nivel", "enlace"],
+        column_config={"enlace": st.column_config.LinkColumn("Enlace", display_text="Ver oferta")},
+    )
+
+
+def render_events_browser(version_key):
+    cols = st.columns(3)
+    with cols[0]:
+        text = st.text_input("Buscar evento", key="exp_events_text")
+    with cols[1]:
+        city = st.text_input("Ciudad", key="exp_events_city")
+    with cols[2]:
+        source = st.selectbox(
+            "Fuente", [""] + cached_event_sources(version_key), key="exp_events_source",
+            format_func=lambda s: s or "Todas",
+        )
+    date_from, date_to = _date_range("exp_events_dates")
+
+    filters = (
+        ("text", text.strip()),
+        ("city", city.strip()),
+        ("source", source),
+        ("date_from", date_from),
+        ("date_to", date_to),
+    )
+    total, _ = cached_events_page(version_key, filters, 0)
+    page = _pager("exp_events_page", total)
+    _, rows = cached_events_page(version_key, filters, page)
+
+    if not rows:
+        st.info("No hay eventos que coincidan con los filtros.")
+        return
+
+    st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_config={"url": st.column_config.LinkColumn("Enlace", display_text="Ver evento")},
+    )
+
+
+def render_tab_explorar():
+    st.markdown(
+        "<div class='main-content'>"
+        "<h1 style='margin-bottom:0;'>Explorar Copilot-DN</h1>"
+        "</div>",
+        unsafe_allow_html=True,
+    )
+    st.markdown("<div class='title-underline'></div>", unsafe_allow_html=True)
+
+    st.markdown(
+        "<p class='main-content' style='font-size:1.05rem;'>"
+        "Explora las ofertas de empleo y eventos que alimentan a Copilot DN."
+        "</p>",
+        unsafe_allow_html=True,
+    )
+
     st.markdown(
         "<p class='muted'>"
-        "Cuando el modelo esté conectado podrás hacer preguntas como: "
-        "<i>“¿Qué sectores tienen más demanda en Lima esta semana?”</i>."
+        "Revisar la Guía de Usuario en la sección "
+        "<b>💡 Cómo usar</b> antes de probar Copilot DN."
         "</p>",
         unsafe_allow_html=True,
     )
 
+    with st.expander("Funcionalidades clave de Copilot DN"):
+        render_feature_cards()
+
+    st.markdown("")
+
+    data_version = _current_data_version()
+    try:
+        version_key = cache_version(data_version) if data_version is not None else None
+    except Exception:
+        version_key = None
+    if version_key is None:
+        st.warning("No se pudo conectar con Redis para cargar los datos.")
+        return
+
+    tab_jobs, tab_events = st.tabs(["💼 Ofertas", "🎟️ Eventos"])
+    try:
+        with tab_jobs:
+            render_jobs_browser(version_key)
+        with tab_events:
+            render_events_browser(version_key)
+    except Exception as e:
+        st.error(f"Ocurrió un error al consultar los datos: {e}")
+
 
 def render_tab_como_usar():
     st.markdown(
@@ -322,67 +509,69 @@ def render_tab_copilot():
     st.markdown("---")
 
     # ---------------------------
-    # HISTORIAL DE CHAT EN SESIÓN
+    # HISTORIAL DE CHAT (en Redis, por sesión)
     # ---------------------------
-    if "chat_history" not in st.session_state:
-        # Cada elemento: {"role": "user" | "assistant", "content": "texto"}
-        st.session_state["chat_history"] = []
+    if "chat_session_id" not in st.session_state:
+        st.session_state["chat_session_id"] = new_session_id()
+        st.session_state["chat_visible"] = config.CHAT_VISIBLE_TURNS
+    session_id = st.session_state["chat_session_id"]
 
     # Botón para borrar conversación
     cols = st.columns([1, 3])
     with cols[0]:
         if st.button("🧹 Borrar conversación"):
-            st.session_state["chat_history"] = []
+            clear_history(session_id)
+            st.session_state["chat_visible"] = config.CHAT_VISIBLE_TURNS
             st.experimental_rerun()
 
     st.markdown("")
 
-    # Pintamos todo el historial previo
-    for turn in st.session_state["chat_history"]:
-        if turn["role"] == "user":
-            with st.chat_message("user"):
-                st.markdown(turn["content"])
-        else:
-            with st.chat_message("assistant"):
-                st.markdown(turn["content"])
+    # Solo se pintan los últimos turnos; los anteriores se cargan a pedido
+    total, turns = load_recent(session_id, st.session_state["chat_visible"])
+    if total > len(turns):
+        if st.button(f"⬆️ Ver mensajes anteriores ({total - len(turns)})"):
+            st.session_state["chat_visible"] += config.CHAT_VISIBLE_TURNS
+            st.experimental_rerun()
+
+    for turn in turns:
+        with st.chat_message("user" if turn["role"] == "user" else "assistant"):
+            st.markdown(turn["content"])
 
     # Entrada de chat (parte inferior)
     user_prompt = st.chat_input("Hazme una pregunta...")
 
     if user_prompt:
         # 1) mostramos mensaje del usuario y lo guardamos
-        st.session_state["chat_history"].append(
-            {"role": "user", "content": user_prompt}
-        )
+        append_turn(session_id, "user", user_prompt)
         with st.chat_message("user"):
             st.markdown(user_prompt)
 
         # 2) llamamos al modelo con historial
         with st.chat_message("assistant"):
-            with st.spinner("Analizando datos y generando insights con Copilot DN..."):
-                try:
-                    result = generate_insights(
-                        user_question=user_prompt,
-                        history=st.session_state["chat_history"],
-                    )
-                except Exception as e:
-                    st.error(f"Ocurrió un error al llamar al modelo: {e}")
-                    return
-
-                # 3) convertimos dict JSON a texto bonito si hace falta
-                if isinstance(result, dict):
-                    assistant_text = json.dumps(
-                        result, indent=2, ensure_ascii=False
-                    )
-                else:
-                    assistant_text = str(result)
-
-                st.markdown(assistant_text)
+            try:
+                result = ask_copilot(user_prompt, history_for_model(session_id))
+            except (ModelTimeoutError, ModelUnavailableError):
+                st.warning(
+                    "El modelo está tardando más de lo normal o no está disponible. "
+                    "Intenta de nuevo en unos segundos."
+                )
+                return
+            except Exception as e:
+                st.error(f"Ocurrió un error al llamar al modelo: {e}")
+                return
+
+            # 3) convertimos dict JSON a texto bonito si hace falta
+            if isinstance(result, dict):
+                assistant_text = json.dumps(
+                    result, indent=2, ensure_ascii=False
+                )
+            else:
+                assistant_text = str(result)
+
+            st.markdown(assistant_text)
 
         # 4) guardamos la respuesta en historial
-        st.session_state["chat_history"].append(
-            {"role": "assistant", "content": assistant_text}
-        )
+        append_turn(session_id, "assistant", assistant_text)
 
 
 # ---------------------------
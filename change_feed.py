@@ -0,0 +1,196 @@
+# change_feed.py
+"""
+Lectura del feed de cambios de los datasets ("<scraper_name>_data:changes",
+ver redis_utils.publish_changes) con consumer groups de Redis Streams.
+
+Cada caché o índice tiene su propio grupo: lee solo lo nuevo desde la
+última vez, aplica altas/cambios/bajas y confirma (XACK). Si un consumidor
+se cae a mitad, al volver relee primero lo entregado y no confirmado.
+Si el feed se recortó por delante de un grupo (entradas que nunca leyó),
+el índice se reconstruye desde el dataset vigente.
+
+Uso como job (pone al día los índices):
+    python change_feed.py
+"""
+import json
+import socket
+from typing import Callable, Dict, List, Tuple
+
+import redis
+
+from event_index import apply_event_changes, index_events, prune_ended_events
+from event_index import index_size as event_index_size
+from redis_utils import CHANGES_KEY, CHANGES_TRIMMED_KEY, get_redis_client, iter_dataset_chunks, load_datasets
+from search_index import apply_job_changes, index_jobs, index_ready, mark_schema, prune_index
+
+
+def _stream_id(entry_id: str) -> Tuple[int, int]:
+    ms, seq = entry_id.split("-")
+    return int(ms), int(seq)
+
+
+class ChangeFeedConsumer:
+    """
+    Consumidor de un grupo sobre el feed de un dataset.
+
+    start_id: desde dónde lee un grupo nuevo ("0" = todo lo que queda en el
+    stream, "$" = solo lo que llegue de ahora en adelante).
+    """
+
+    def __init__(self, scraper_name, group, consumer=None, client=None, start_id="0"):
+        self.client = client if client is not None else get_redis_client()
+        self.stream_key = CHANGES_KEY.format(scraper_name=scraper_name)
+        self.trimmed_key = CHANGES_TRIMMED_KEY.format(scraper_name=scraper_name)
+        self.group = group
+        self.consumer = consumer or socket.gethostname()
+        self._pending_first = True
+        try:
+            self.client.xgroup_create(self.stream_key, group, id=start_id, mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def read(self, count=500, block_ms=None) -> List[Tuple[str, Dict[str, str]]]:
+        """Siguiente lote [(id, campos)]: primero lo pendiente, después lo nuevo."""
+        if self._pending_first:
+            entries = self._read("0", count, None)
+            if entries:
+                return entries
+            self._pending_first = False
+        return self._read(">", count, block_ms)
+
+    def _read(self, last_id, count, block_ms):
+        response = self.client.xreadgroup(
+            self.group, self.consumer, {self.stream_key: last_id}, count=count, block=block_ms
+        )
+        return response[0][1] if response else []
+
+    def missed_entries(self) -> bool:
+        """
+        True si el feed se recortó más allá de lo que el grupo ya recibió:
+        hubo entradas que nunca va a leer.
+        """
+        trimmed = self.client.get(self.trimmed_key)
+        if not trimmed:
+            return False
+        for group in self.client.xinfo_groups(self.stream_key):
+            if group["name"] == self.group:
+                return _stream_id(group["last-delivered-id"]) < _stream_id(trimmed)
+        return True
+
+    def resolve(self, entries) -> Tuple[List[Dict], List[str], int]:
+        """
+        (registros nuevos/cambiados, record_keys borrados, faltantes).
+        Los registros se leen de la versión donde se publicaron; si esa
+        versión ya se recolectó, cuentan como faltantes. También las
+        entradas pendientes que se recortaron del stream (llegan sin campos).
+        """
+        trimmed = sum(1 for _, fields in entries if not fields)
+        changes = [fields for _, fields in entries if fields.get("op") in ("added", "updated")]
+        removed = [fields["key"] for _, fields in entries if fields.get("op") == "removed"]
+
+        pipe = self.client.pipeline(transaction=False)
+        for fields in changes:
+            pipe.lindex(fields["ref"], int(fields["pos"]))
+        raws = pipe.execute() if changes else []
+
+        upserts = [json.loads(raw) for raw in raws if raw]
+        return upserts, removed, len(raws) - len(upserts) + trimmed
+
+    def ack(self, entry_ids) -> None:
+        if entry_ids:
+            self.client.xack(self.stream_key, self.group, *entry_ids)
+
+    def skip_to_latest(self, count=1000) -> None:
+        """
+        Da por leído todo lo que hay (por ejemplo, tras reconstruir el índice):
+        mueve el grupo al final y confirma lo pendiente de todos sus
+        consumidores, un XACK por lote.
+        """
+        self.client.xgroup_setid(self.stream_key, self.group, "$")
+        while True:
+            pending = self.client.xpending_range(self.stream_key, self.group, "-", "+", count)
+            if not pending:
+                break
+            self.ack([entry["message_id"] for entry in pending])
+        self._pending_first = False
+
+    def process(self, handler: Callable[[List[Dict], List[str]], object], count=500) -> Dict[str, int]:
+        """
+        Lee hasta vaciar el feed: por cada lote llama handler(upserts, removed)
+        y confirma. Devuelve {"entradas", "faltantes"}.
+        """
+        stats = {"entradas": 0, "faltantes": 0}
+        while True:
+            entries = self.read(count)
+            if not entries:
+                return stats
+            upserts, removed, missing = self.resolve(entries)
+            if upserts or removed:
+                handler(upserts, removed)
+            self.ack([entry_id for entry_id, _ in entries])
+            stats["entradas"] += len(entries)
+            stats["faltantes"] += missing
+
+
+# ---------------------------
+# Índices al día con el feed
+# ---------------------------
+def sync_event_index(client=None) -> Dict[str, int]:
+    """
+    Pone al día el índice de eventos con el feed. Si el índice está vacío o
+    faltan registros (el índice se atrasó más que las versiones guardadas o
+    que el recorte del feed), lo reconstruye desde el dataset vigente.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    consumer = ChangeFeedConsumer("events_peru", "event_index", client=client)
+    stats = {"entradas": 0, "faltantes": 0, "recortado": consumer.missed_entries()}
+    if event_index_size(client) and not stats["recortado"]:
+        stats.update(consumer.process(lambda upserts, removed: apply_event_changes(upserts, removed, client)))
+
+    if not event_index_size(client) or stats["faltantes"] or stats["recortado"]:
+        _, datasets = load_datasets(["events_peru"], client)
+        index_events(datasets["events_peru"], client=client)
+        consumer.skip_to_latest()
+        stats["reconstruido"] = 1
+    else:
+        prune_ended_events(client=client)
+    return stats
+
+
+def sync_search_index(client=None) -> Dict[str, int]:
+    """
+    Igual que sync_event_index, para el índice de búsqueda de ofertas.
+    También lo reconstruye si es de otro formato (INDEX_SCHEMA); la
+    reconstrucción recorre el dataset vigente por trozos.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    consumer = ChangeFeedConsumer("scraper_4", "search_index", client=client)
+    stats = {"entradas": 0, "faltantes": 0, "recortado": consumer.missed_entries()}
+    if index_ready(client) and not stats["recortado"]:
+        stats.update(consumer.process(lambda upserts, removed: apply_job_changes(upserts, removed, client)))
+
+    if not index_ready(client) or stats["faltantes"] or stats["recortado"]:
+        job_ids = set()
+        for jobs in iter_dataset_chunks("scraper_4", client):
+            index_jobs(jobs, client=client)
+            job_ids.update(job.get("id") for job in jobs)
+        prune_index(job_ids, client=client)
+        mark_schema(client)
+        consumer.skip_to_latest()
+        stats["reconstruido"] = 1
+    return stats
+
+
+def main():
+    client = get_redis_client()
+    print(f"Índice de ofertas: {sync_search_index(client)}")
+    print(f"Índice de eventos: {sync_event_index(client)}")
+
+
+if __name__ == "__main__":
+    main()
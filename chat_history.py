@@ -0,0 +1,90 @@
+# chat_history.py
+"""
+Historial del chat del Copilot en Redis, por sesión, en vez de en
+st.session_state.
+
+- "chat:<session_id>:turns": LIST de turnos (JSON), acotada con LTRIM a
+  CHAT_MAX_TURNS y con vencimiento CHAT_TTL_SECONDS (se renueva al escribir).
+- Las respuestas largas (por ejemplo, reportes JSON) se guardan comprimidas.
+- Al modelo solo van los últimos turnos, con las respuestas recortadas.
+"""
+import base64
+import json
+import uuid
+import zlib
+from typing import Dict, List, Tuple
+
+import config
+from redis_utils import get_redis_client
+
+TURNS_KEY = "chat:{session_id}:turns"
+# Turnos que se pasan al modelo (igual que _build_history_block: 8 intercambios)
+MODEL_HISTORY_TURNS = 16
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _encode(role: str, content: str) -> str:
+    if len(content) > config.CHAT_COMPRESS_OVER_CHARS:
+        packed = base64.b64encode(zlib.compress(content.encode("utf-8"), 9)).decode("ascii")
+        return json.dumps({"role": role, "z": packed})
+    return json.dumps({"role": role, "content": content}, ensure_ascii=False)
+
+
+def _decode(raw: str) -> Dict[str, str]:
+    turn = json.loads(raw)
+    if "z" in turn:
+        content = zlib.decompress(base64.b64decode(turn["z"])).decode("utf-8")
+        return {"role": turn["role"], "content": content}
+    return turn
+
+
+def append_turn(session_id: str, role: str, content: str, client=None) -> None:
+    """Agrega un turno, recorta la lista a CHAT_MAX_TURNS y renueva el vencimiento."""
+    if client is None:
+        client = get_redis_client()
+
+    key = TURNS_KEY.format(session_id=session_id)
+    pipe = client.pipeline(transaction=True)
+    pipe.rpush(key, _encode(role, content))
+    pipe.ltrim(key, -config.CHAT_MAX_TURNS, -1)
+    pipe.expire(key, config.CHAT_TTL_SECONDS)
+    pipe.execute()
+
+
+def load_recent(session_id: str, count: int, client=None) -> Tuple[int, List[Dict[str, str]]]:
+    """
+    Los últimos `count` turnos (en orden) y el total guardado, en un solo
+    viaje: para pintar solo lo visible y cargar lo anterior a pedido.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    key = TURNS_KEY.format(session_id=session_id)
+    pipe = client.pipeline(transaction=False)
+    pipe.llen(key)
+    # LRANGE -0 -1 devolvería toda la lista
+    pipe.lrange(key, -max(count, 1), -1)
+    total, raw_turns = pipe.execute()
+    return total, [_decode(raw) for raw in raw_turns]
+
+
+def history_for_model(session_id: str, client=None) -> List[Dict[str, str]]:
+    """
+    Últimos MODEL_HISTORY_TURNS turnos para generate_insights, con las
+    respuestas del asistente recortadas a CHAT_PROMPT_TURN_CHARS.
+    """
+    _, turns = load_recent(session_id, MODEL_HISTORY_TURNS, client=client)
+    limit = config.CHAT_PROMPT_TURN_CHARS
+    for turn in turns:
+        if turn["role"] == "assistant" and len(turn["content"]) > limit:
+            turn["content"] = turn["content"][:limit] + "..."
+    return turns
+
+
+def clear_history(session_id: str, client=None) -> None:
+    if client is None:
+        client = get_redis_client()
+    client.delete(TURNS_KEY.format(session_id=session_id))
@@ -27,11 +27,50 @@ REDIS_PORT = int(get_config("REDIS_PORT", "6379"))
 REDIS_PASSWORD = get_config("REDIS_PASSWORD")  # normalmente None en local
 
 
+# Versiones publicadas que se conservan por dataset (las demás se recolectan)
+DATASET_VERSIONS_TO_KEEP = int(get_config("DATASET_VERSIONS_TO_KEEP", "2"))
+# Entradas que conserva el feed de cambios de cada dataset (Redis Stream); se
+# recorta por versiones enteras y siempre guarda la última publicación completa
+CHANGE_FEED_MAXLEN = int(get_config("CHANGE_FEED_MAXLEN", "10000"))
+
+# Backend de lectura de datasets: "redis" o "local" (snapshot local con Redis de respaldo)
+DATA_BACKEND = get_config("DATA_BACKEND", "redis")
+# Backends donde publican los scrapers, separados por comas (ej. "redis,local")
+PUBLISH_BACKENDS = get_config("PUBLISH_BACKENDS", "redis")
+# Carpeta del snapshot local (archivos .jsonl + índice de offsets)
+LOCAL_SNAPSHOT_DIR = get_config("LOCAL_SNAPSHOT_DIR", "data/snapshots")
+
+# Histórico diario (snapshots comprimidos en Redis)
+SNAPSHOT_RETENTION_DAYS = int(get_config("SNAPSHOT_RETENTION_DAYS", "35"))
+# Cada cuántos días se guarda un snapshot completo (el resto son deltas)
+SNAPSHOT_FULL_EVERY_DAYS = int(get_config("SNAPSHOT_FULL_EVERY_DAYS", "7"))
+
+
 # -----------------------------
 # Config LinkedIn
 # -----------------------------
 LINKEDIN_GEO_ID_PERU = get_config("LINKEDIN_GEO_ID_PERU", "102927786")
 
+# Matriz de consultas: keywords × geo × experiencia
+# Keywords separadas por ";" ("" = sin filtro de keywords)
+LINKEDIN_KEYWORD_SETS = get_config("LINKEDIN_KEYWORD_SETS", "")
+# Lista "nombre:geoId" separada por comas (ej. "peru:102927786,arequipa:<geoId>")
+LINKEDIN_GEO_IDS = get_config("LINKEDIN_GEO_IDS", f"peru:{LINKEDIN_GEO_ID_PERU}")
+# Filtros f_E separados por ";" (ej. "1,2;3,4;5")
+LINKEDIN_EXPERIENCE_FILTERS = get_config("LINKEDIN_EXPERIENCE_FILTERS", "1,2,3,4,5")
+LINKEDIN_MAX_PAGES = int(get_config("LINKEDIN_MAX_PAGES", "5"))
+# Peticiones simultáneas a LinkedIn, compartidas por todas las consultas
+LINKEDIN_MAX_CONCURRENCY = int(get_config("LINKEDIN_MAX_CONCURRENCY", "4"))
+# Procesos para parsear HTML en paralelo (0 = parsear en el mismo proceso)
+LINKEDIN_PARSER_WORKERS = int(get_config("LINKEDIN_PARSER_WORKERS", "0"))
+# Páginas de HTML en cola / en vuelo antes de frenar a los fetchers
+LINKEDIN_PIPELINE_QUEUE_SIZE = int(get_config("LINKEDIN_PIPELINE_QUEUE_SIZE", "16"))
+
+# Enriquecimiento de ofertas (página de detalle de cada trabajo)
+JOB_DETAIL_MAX_WORKERS = int(get_config("JOB_DETAIL_MAX_WORKERS", "6"))
+# Cada detalle se descarga una sola vez: lo guardamos en Redis por mucho tiempo
+JOB_DETAIL_CACHE_TTL = int(get_config("JOB_DETAIL_CACHE_TTL", str(60 * 24 * 3600)))
+
 
 # -----------------------------
 # Ticketmaster / Eventbrite / RapidAPI
@@ -41,6 +80,10 @@ RAPIDAPI_KEY = get_config("RAPIDAPI_KEY", "")
 EVENTBRITE_TOKEN = get_config("EVENTBRITE_TOKEN", "")
 
 
+# Duración asumida de un evento cuando la fuente no trae la hora de fin
+EVENT_DEFAULT_DURATION_HOURS = int(get_config("EVENT_DEFAULT_DURATION_HOURS", "4"))
+
+
 # -----------------------------
 # Vertex AI / Gemini
 # -----------------------------
@@ -48,6 +91,50 @@ GCP_PROJECT_ID = get_config("GCP_PROJECT_ID", "prueba-419502")
 GCP_LOCATION = get_config("GCP_LOCATION", "us-central1")
 GEMINI_MODEL_NAME = get_config("GEMINI_MODEL_NAME", "gemini-2.5-pro")
 
+# Niveles de modelo: turnos livianos al modelo rápido, análisis pesado al Pro
+GEMINI_TIERING = get_config("GEMINI_TIERING", "1") == "1"
+GEMINI_FLASH_MODEL_NAME = get_config("GEMINI_FLASH_MODEL_NAME", "gemini-2.5-flash")
+GEMINI_PRO_MODEL_NAME = get_config("GEMINI_PRO_MODEL_NAME", GEMINI_MODEL_NAME)
+# Con más caracteres de contexto (DATA + historial) que esto, el turno va directo al Pro
+GEMINI_PRO_CONTEXT_CHARS = int(get_config("GEMINI_PRO_CONTEXT_CHARS", "24000"))
+
+# Llamadas simultáneas a Gemini por proceso (el resto espera en una cola justa)
+GEMINI_MAX_CONCURRENT_CALLS = int(get_config("GEMINI_MAX_CONCURRENT_CALLS", "4"))
+
+# Deadline por llamada a Gemini (segundos): pasado ese tiempo se corta y se avisa
+GEMINI_DEADLINE_SECONDS = float(get_config("GEMINI_DEADLINE_SECONDS", "60"))
+# Hedging: "1" lanza una segunda llamada si la primera tarda más que el p95
+# reciente (o que GEMINI_HEDGE_AFTER_SECONDS, si es > 0)
+GEMINI_HEDGE = get_config("GEMINI_HEDGE", "0") == "1"
+GEMINI_HEDGE_AFTER_SECONDS = float(get_config("GEMINI_HEDGE_AFTER_SECONDS", "0"))
+# Circuit breaker: fallos seguidos para abrirlo y segundos hasta volver a probar
+BREAKER_FAILURES = int(get_config("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(get_config("BREAKER_RESET_SECONDS", "30"))
+# Vida de las respuestas guardadas como respaldo (por pregunta y versión de datos)
+ANSWER_CACHE_TTL_SECONDS = int(get_config("ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+# Reporte JSON pre-generado por versión de datos
+GENERATE_REPORT_ON_PUBLISH = get_config("GENERATE_REPORT_ON_PUBLISH", "0") == "1"
+REPORT_TTL_SECONDS = int(get_config("REPORT_TTL_SECONDS", str(2 * 24 * 3600)))
+# Vencimiento del lock de generación (por si el proceso muere a mitad)
+REPORT_LOCK_SECONDS = int(get_config("REPORT_LOCK_SECONDS", "300"))
+
+# Historial del chat en Redis (por sesión)
+CHAT_MAX_TURNS = int(get_config("CHAT_MAX_TURNS", "200"))
+CHAT_TTL_SECONDS = int(get_config("CHAT_TTL_SECONDS", str(7 * 24 * 3600)))
+# Respuestas más largas que esto se guardan comprimidas
+CHAT_COMPRESS_OVER_CHARS = int(get_config("CHAT_COMPRESS_OVER_CHARS", "2000"))
+# Caracteres de cada respuesta previa que se pasan al modelo
+CHAT_PROMPT_TURN_CHARS = int(get_config("CHAT_PROMPT_TURN_CHARS", "1500"))
+# Turnos que se pintan de entrada (el resto, con "Ver mensajes anteriores")
+CHAT_VISIBLE_TURNS = int(get_config("CHAT_VISIBLE_TURNS", "10"))
+
+# Si es "1", Gemini consulta los datos con herramientas en vez de recibir DATA completo
+GEMINI_USE_TOOLS = get_config("GEMINI_USE_TOOLS", "0") == "1"
+
+# Modelo opcional de puntuación del router de preguntas (JSON {ruta: {token: peso}})
+ROUTER_MODEL_PATH = get_config("ROUTER_MODEL_PATH", "")
+
 # Ruta del JSON (para LOCAL)
 GCP_SERVICE_ACCOUNT_FILE = get_config("GCP_SERVICE_ACCOUNT_FILE", "")
 
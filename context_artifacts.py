@@ -0,0 +1,158 @@
+# context_artifacts.py
+"""
+Contexto del prompt (DATA) materializado al publicar, en vez de por turno.
+
+Después de cada publicación (scraper.py / ticket_master.py) se arma una
+vez el DATA de cada ruta y se guarda en "context:v:<versión del manifiesto>":
+
+- "datos": DATA completo (tendencias + ofertas + eventos), ya recortado.
+- "agregados": DATA reducido de conteos y tendencias.
+- "jobs", "events", "tendencias": fragmentos por sección (JSON).
+- "tokens": tokens estimados de cada campo (JSON).
+- "conteos": cantidad de ofertas y eventos (JSON).
+
+También se copia en los demás backends de publicación (PUBLISH_BACKENDS) y
+se lee del backend configurado en DATA_BACKEND: con el snapshot local, un
+turno solo pregunta a Redis la versión vigente. gemini_model pide solo el campo que necesita el
+turno; entre turnos de la misma versión queda en memoria del proceso.
+"""
+import json
+import math
+from typing import Dict, Optional
+
+from redis_utils import RedisBackend, get_publish_backends, get_read_backend, get_redis_client, load_datasets
+from snapshots import latest_aggregates, summarize_history
+
+MAX_DATA_CHARS = 20000
+# Caracteres de la descripción de cada oferta que pasamos al modelo
+MAX_JOB_DESCRIPTION_CHARS = 280
+# Estimación de tokens (Gemini ronda los 4 caracteres por token en español)
+CHARS_PER_TOKEN = 4
+
+# Nombre del artefacto en los backends (en Redis: HASH "context:v:<versión>")
+CONTEXT_ARTIFACT = "context"
+CONTEXT_KEY = CONTEXT_ARTIFACT + ":v:{version}"
+# Los artefactos de versiones viejas se borran solos
+CONTEXT_TTL_SECONDS = 2 * 24 * 3600
+
+SECTION_FULL = "datos"
+SECTION_AGGREGATES = "agregados"
+
+# Último artefacto leído por el proceso: (versión, {campo: valor})
+_cache = (None, {})
+
+
+def _job_for_context(job: Dict) -> Dict:
+    """
+    Versión del trabajo que va en DATA: los campos del detalle
+    (nivel, tipo de empleo, habilidades...) con la descripción recortada.
+    """
+    detalle = job.get("detalle")
+    if not detalle:
+        return job
+
+    job = dict(job)
+    detalle = dict(detalle)
+    descripcion = detalle.get("descripcion") or ""
+    if len(descripcion) > MAX_JOB_DESCRIPTION_CHARS:
+        detalle["descripcion"] = descripcion[:MAX_JOB_DESCRIPTION_CHARS] + "..."
+    job["detalle"] = detalle
+    return job
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def render_full_context(jobs, events, tendencias) -> str:
+    """DATA completo de la ruta "datos" (recortado a MAX_DATA_CHARS)."""
+    contexto = {
+        # va primero para que no se pierda al recortar DATA
+        "tendencias": tendencias,
+        "jobs": [_job_for_context(job) for job in jobs],
+        "events": events,
+    }
+    return json.dumps(contexto, ensure_ascii=False)[:MAX_DATA_CHARS]
+
+
+def render_aggregates_context(ofertas, eventos, tendencias) -> str:
+    """DATA de la ruta "agregados" ("" si aún no hay agregados)."""
+    if not ofertas and not eventos:
+        return ""
+    contexto = {
+        "ofertas_ultimo_dia": ofertas,
+        "eventos_ultimo_dia": eventos,
+        "tendencias": tendencias,
+    }
+    return json.dumps(contexto, ensure_ascii=False)[:MAX_DATA_CHARS]
+
+
+def materialize_context(client=None) -> Optional[int]:
+    """
+    Arma y guarda los artefactos de contexto de la versión vigente.
+    Se llama después de publicar un dataset y de guardar su snapshot diario.
+    Devuelve la versión materializada (None si no hay datos publicados).
+    """
+    if client is None:
+        client = get_redis_client()
+
+    version, datasets = load_datasets(["scraper_4", "events_peru"], client)
+    if not version or datasets is None:
+        return None
+
+    jobs = datasets["scraper_4"]
+    events = datasets["events_peru"]
+    tendencias = summarize_history(client=client)
+
+    fields = {
+        SECTION_FULL: render_full_context(jobs, events, tendencias),
+        SECTION_AGGREGATES: render_aggregates_context(
+            latest_aggregates("scraper_4", client=client),
+            latest_aggregates("events_peru", client=client),
+            tendencias,
+        ),
+        "jobs": json.dumps([_job_for_context(job) for job in jobs], ensure_ascii=False),
+        "events": json.dumps(events, ensure_ascii=False),
+        "tendencias": json.dumps(tendencias, ensure_ascii=False),
+    }
+    fields["tokens"] = json.dumps({name: estimate_tokens(value) for name, value in fields.items()})
+    fields["conteos"] = json.dumps({"jobs": len(jobs), "events": len(events)})
+
+    RedisBackend(client).publish_artifact(CONTEXT_ARTIFACT, version, fields, ttl=CONTEXT_TTL_SECONDS)
+    # Copias en los demás backends (por ejemplo, el snapshot local)
+    for backend in get_publish_backends(client):
+        if not isinstance(backend, RedisBackend):
+            backend.publish_artifact(CONTEXT_ARTIFACT, version, fields)
+    return version
+
+
+def get_context_section(section: str, client=None) -> Optional[str]:
+    """
+    Campo del artefacto de la versión vigente (por ejemplo "datos"), según
+    el backend de lectura. Con Redis cuesta un GET del manifiesto y, solo si
+    la versión cambió o el campo no estaba en memoria, un HGET; con el
+    snapshot local, lecturas de disco. None si aún no se materializó.
+    """
+    global _cache
+    backend = get_read_backend(client)
+
+    version = backend.get_data_version()
+    if not version:
+        return None
+    cached_version, fields = _cache
+    if cached_version != version:
+        fields = {}
+        _cache = (version, fields)
+
+    if section not in fields:
+        value = backend.load_artifact_field(CONTEXT_ARTIFACT, version, section)
+        if value is None:
+            return None
+        fields[section] = value
+    return fields[section]
+
+
+def get_context_counts(client=None) -> Optional[Dict[str, int]]:
+    """Cantidad de ofertas y eventos del artefacto vigente (None si no hay)."""
+    value = get_context_section("conteos", client=client)
+    return json.loads(value) if value else None
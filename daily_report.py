@@ -0,0 +1,220 @@
+# daily_report.py
+"""
+Reporte de mercado en JSON pre-generado por versión de datos.
+
+El "análisis en JSON" (fecha_analisis, sectores_con_mayor_demanda, ...) es
+la respuesta más cara y es igual para todos mientras no cambien los datos:
+se genera y valida una vez por ciclo de carga (o con el job de abajo) y se
+guarda en "report:v:<versión>". Los pedidos de reporte se responden desde
+ahí; si falta (o es de otra versión), se genera en vivo y se guarda.
+
+Uso como job:
+    python daily_report.py
+"""
+import json
+import logging
+import re
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import config
+from gemini_model import generate_insights
+from question_router import JSON_REQUEST_RE, normalize_question, previous_turns
+from redis_utils import get_manifest, get_read_backend, get_redis_client
+
+logger = logging.getLogger("copilot.report")
+
+REPORT_KEY = "report:v:{version}"
+REPORT_LOCK_KEY = "report:lock:{version}"
+# Versiones de cada dataset con las que se generó el último reporte al publicar
+REPORT_SOURCES_KEY = "report:sources"
+# Datasets que entran en el reporte: se genera cuando todos tienen versión nueva
+REPORT_DATASETS = ("scraper_4", "events_peru")
+
+# Pregunta con la que se genera el reporte
+REPORT_QUESTION = "Dame el análisis del mercado laboral y los eventos en formato JSON."
+
+# Claves de nivel superior del modo JSON (ver USER_TASK en gemini_model) y su tipo
+REPORT_FIELDS = {
+    "fecha_analisis": str,
+    "resumen_mercado": str,
+    "sectores_con_mayor_demanda": list,
+    "habilidades_mas_pedidas": list,
+    "eventos_relevantes": list,
+    "recomendaciones": list,
+}
+
+# Palabras que no cambian el contenido del reporte: si la pregunta solo
+# tiene estas (más "json"), es el reporte general
+REPORT_WORDS = {
+    "json", "formato", "en", "el", "la", "los", "las", "un", "una", "de", "del", "y",
+    "dame", "dime", "quiero", "genera", "generame", "hazme", "haz", "muestrame", "por", "favor",
+    "analisis", "reporte", "informe", "resumen", "estructurado", "completo", "general",
+    "mercado", "laboral", "trabajo", "empleo", "eventos", "ofertas", "peru", "hoy", "actual",
+    "diario", "dia", "sobre", "con",
+}
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def is_report_request(question: Optional[str], history: Optional[List[Dict[str, str]]] = None) -> bool:
+    """
+    True si la pregunta pide el reporte JSON general (sin filtros propios
+    ni conversación previa que cambie la respuesta). El historial puede
+    incluir la pregunta actual como último turno (así lo pasa la app).
+    """
+    if previous_turns(question, history) or not question:
+        return False
+    text = normalize_question(question)
+    if not JSON_REQUEST_RE.search(text):
+        return False
+    return all(word in REPORT_WORDS for word in text.split())
+
+
+def validate_report(report) -> List[str]:
+    """Problemas del reporte (lista vacía si está bien)."""
+    if not isinstance(report, dict):
+        return ["no es un objeto JSON"]
+
+    problems = []
+    for field, kind in REPORT_FIELDS.items():
+        if field not in report:
+            problems.append(f"falta {field}")
+        elif not isinstance(report[field], kind):
+            problems.append(f"{field} no es {kind.__name__}")
+    if isinstance(report.get("fecha_analisis"), str) and not DATE_RE.match(report["fecha_analisis"]):
+        problems.append("fecha_analisis no tiene formato YYYY-MM-DD")
+    return problems
+
+
+def get_cached_report(client=None, version=None) -> Optional[Dict]:
+    """Reporte guardado para la versión vigente (None si no hay)."""
+    if client is None:
+        client = get_redis_client()
+    if version is None:
+        version = get_read_backend(client).get_data_version()
+    if not version:
+        return None
+
+    raw = client.get(REPORT_KEY.format(version=version))
+    return json.loads(raw) if raw else None
+
+
+def store_report(report: Dict, version, client=None, overwrite: bool = False) -> bool:
+    """Guarda el reporte de una versión (sin pisar uno existente, salvo overwrite)."""
+    if client is None:
+        client = get_redis_client()
+    return bool(
+        client.set(
+            REPORT_KEY.format(version=version),
+            json.dumps(report, ensure_ascii=False),
+            ex=config.REPORT_TTL_SECONDS,
+            nx=not overwrite,
+        )
+    )
+
+
+def generate_daily_report(client=None, model=None, force: bool = False, attempts: int = 2) -> Optional[Dict]:
+    """
+    Genera, valida y guarda el reporte de la versión vigente.
+
+    Un lock (SET NX con vencimiento) evita que dos procesos lo generen a la
+    vez. Devuelve el reporte guardado, o None si no se pudo generar.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    version = get_read_backend(client).get_data_version()
+    if not version:
+        return None
+    if not force:
+        cached = get_cached_report(client, version)
+        if cached is not None:
+            return cached
+
+    lock_key = REPORT_LOCK_KEY.format(version=version)
+    token = uuid.uuid4().hex
+    if not client.set(lock_key, token, nx=True, ex=config.REPORT_LOCK_SECONDS):
+        logger.info("reporte v%s: otro proceso lo está generando", version)
+        return None
+
+    try:
+        for attempt in range(1, attempts + 1):
+            started = datetime.now()
+            report = generate_insights(REPORT_QUESTION, model=model)
+            problems = validate_report(report)
+            if not problems:
+                store_report(report, version, client=client, overwrite=True)
+                logger.info(
+                    "reporte v%s generado en %.1f s",
+                    version, (datetime.now() - started).total_seconds(),
+                )
+                return report
+            logger.warning("reporte v%s inválido (intento %s): %s", version, attempt, problems)
+        return None
+    finally:
+        # Solo soltamos el lock si sigue siendo nuestro
+        if client.get(lock_key) == token:
+            client.delete(lock_key)
+
+
+def refresh_after_publish(client=None) -> None:
+    """
+    Para los scrapers: si está activado (GENERATE_REPORT_ON_PUBLISH), genera
+    el reporte una vez por ciclo de carga, cuando todos los REPORT_DATASETS
+    tienen una versión nueva desde el último reporte. El primer publicador
+    del ciclo no lo genera (los datos están a medio refrescar); lo genera el
+    último. Un fallo del modelo no debe tumbar la carga.
+    """
+    if not config.GENERATE_REPORT_ON_PUBLISH:
+        return
+    if client is None:
+        client = get_redis_client()
+    try:
+        datasets = get_manifest(client)["datasets"]
+        sources = {name: (datasets.get(name) or {}).get("key") for name in REPORT_DATASETS}
+        raw = client.get(REPORT_SOURCES_KEY)
+        last = json.loads(raw) if raw else {}
+        if not all(sources.values()) or any(last.get(name) == key for name, key in sources.items()):
+            # Falta que publique otro scraper del ciclo
+            return
+        if generate_daily_report(client=client) is None:
+            print("⚠️ No se generó el reporte diario (se generará al primer pedido).")
+        else:
+            client.set(REPORT_SOURCES_KEY, json.dumps(sources))
+    except Exception as e:
+        print(f"⚠️ Error generando el reporte diario: {e}")
+
+
+def answer_question(user_question: Optional[str], history: Optional[List[Dict[str, str]]] = None, **kwargs):
+    """
+    Igual que generate_insights, pero los pedidos del reporte JSON general se
+    responden desde el reporte guardado de la versión vigente. Si no está,
+    se genera en vivo y, si es válido, queda guardado para los siguientes.
+    """
+    if not is_report_request(user_question, history):
+        return generate_insights(user_question=user_question, history=history, **kwargs)
+
+    client = get_redis_client()
+    version = get_read_backend(client).get_data_version()
+    cached = get_cached_report(client, version)
+    if cached is not None:
+        return cached
+
+    answer = generate_insights(user_question=user_question, history=history, **kwargs)
+    if version and not validate_report(answer):
+        store_report(answer, version, client=client)
+    return answer
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    report = generate_daily_report(force=True)
+    if report is None:
+        print("No se pudo generar el reporte.")
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
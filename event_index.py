@@ -0,0 +1,190 @@
+# event_index.py
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+import config
+from event_resolution import normalize_city, parse_event_start
+from redis_utils import get_redis_client, record_key
+
+# Claves del índice temporal de eventos
+INDEX_PREFIX = "events_idx"
+DOCS_KEY = INDEX_PREFIX + ":doc"              # HASH id → evento compacto (JSON)
+BY_START_KEY = INDEX_PREFIX + ":by_start"     # ZSET id → inicio (epoch)
+BY_END_KEY = INDEX_PREFIX + ":by_end"         # ZSET id → fin (epoch), para podar
+CITY_KEY = INDEX_PREFIX + ":city:{city}"      # ZSET id → inicio, por ciudad
+CITY_OF_KEY = INDEX_PREFIX + ":city_of"       # HASH id → ciudad (para borrar)
+GENERATION_KEY = INDEX_PREFIX + ":gen"        # contador: cambia con cada actualización
+
+
+def event_id(event):
+    return id_for_key(record_key(event))
+
+
+def id_for_key(key):
+    """Id en el índice a partir del record_key (por ejemplo, de un evento borrado)."""
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _end_value(event):
+    """Fin del evento según la fuente (si lo trae)."""
+    raw = event.get("raw") or {}
+    end = raw.get("end")
+    if isinstance(end, dict):
+        return end.get("utc") or end.get("local")
+    dates_end = (raw.get("dates") or {}).get("end") or {}
+    return dates_end.get("dateTime") or dates_end.get("localDate") or raw.get("end_time")
+
+
+def add_event_times(event):
+    """
+    Parsea una sola vez (al ingerir) inicio y fin a epoch, con la zona de Lima.
+    Sin fin conocido se asume EVENT_DEFAULT_DURATION_HOURS.
+    """
+    start = parse_event_start(event.get("start"))
+    end = parse_event_start(_end_value(event))
+    if start is not None and (end is None or end < start):
+        end = start + timedelta(hours=config.EVENT_DEFAULT_DURATION_HOURS)
+
+    event["start_ts"] = int(start.timestamp()) if start else None
+    event["end_ts"] = int(end.timestamp()) if end else None
+    return event
+
+
+def compact_event(event):
+    start = parse_event_start(event.get("start"))
+    return {
+        "titulo": event.get("title"),
+        "ciudad": event.get("city"),
+        "inicio": start.strftime("%Y-%m-%d %H:%M") if start else event.get("start"),
+        "fuentes": ", ".join(event.get("sources") or [event.get("source") or ""]),
+        "url": event.get("url"),
+    }
+
+
+def _remove(client, ids):
+    if not ids:
+        return 0
+    cities = client.hmget(CITY_OF_KEY, ids)
+    pipe = client.pipeline(transaction=False)
+    for eid, city in zip(ids, cities):
+        pipe.zrem(BY_START_KEY, eid)
+        pipe.zrem(BY_END_KEY, eid)
+        if city:
+            pipe.zrem(CITY_KEY.format(city=city), eid)
+    pipe.hdel(DOCS_KEY, *ids)
+    pipe.hdel(CITY_OF_KEY, *ids)
+    pipe.incr(GENERATION_KEY)
+    pipe.execute()
+    return len(ids)
+
+
+def _upsert(client, events):
+    """
+    Agrega o actualiza eventos en el índice (los que cambiaron de ciudad
+    salen de la ciudad anterior; los que perdieron la fecha, del índice).
+    Devuelve {id: ciudad} de los indexados.
+    """
+    current = {}
+    dated = {}
+    undated = []
+    for event in events:
+        if event.get("start_ts") is None:
+            add_event_times(event)
+        if event["start_ts"] is None:
+            undated.append(event_id(event))
+            continue
+        eid = event_id(event)
+        current[eid] = normalize_city(event.get("city")) or "sin_ciudad"
+        dated[eid] = event
+
+    previous = client.hmget(CITY_OF_KEY, list(dated)) if dated else []
+    pipe = client.pipeline(transaction=False)
+    for (eid, event), old_city in zip(dated.items(), previous):
+        city = current[eid]
+        if old_city and old_city != city:
+            pipe.zrem(CITY_KEY.format(city=old_city), eid)
+        pipe.hset(DOCS_KEY, eid, json.dumps(compact_event(event), ensure_ascii=False))
+        pipe.zadd(BY_START_KEY, {eid: event["start_ts"]})
+        pipe.zadd(BY_END_KEY, {eid: event["end_ts"]})
+        pipe.zadd(CITY_KEY.format(city=city), {eid: event["start_ts"]})
+        pipe.hset(CITY_OF_KEY, eid, city)
+    if dated:
+        pipe.incr(GENERATION_KEY)
+    pipe.execute()
+    _remove(client, undated)
+    return current
+
+
+def index_events(events, client=None):
+    """
+    Reemplaza el índice con los eventos de la corrida: agrega/actualiza los
+    que tienen fecha, quita los que ya no aparecen y poda los terminados.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    current = _upsert(client, events)
+    stale = [eid for eid in client.hkeys(CITY_OF_KEY) if eid not in current]
+    _remove(client, stale)
+
+    prune_ended_events(client=client)
+    return len(current)
+
+
+def apply_event_changes(upserts, removed_keys, client=None):
+    """
+    Aplica un lote del feed de cambios: indexa los eventos nuevos o
+    cambiados y quita los borrados (por record_key), sin reconstruir.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    _upsert(client, upserts)
+    _remove(client, [id_for_key(key) for key in removed_keys])
+    return len(upserts) + len(removed_keys)
+
+
+def prune_ended_events(client=None, now=None):
+    """Quita los eventos que ya terminaron (fin < ahora)."""
+    if client is None:
+        client = get_redis_client()
+    if now is None:
+        now = time.time()
+
+    ended = client.zrangebyscore(BY_END_KEY, "-inf", f"({now}")
+    return _remove(client, ended)
+
+
+def index_size(client=None):
+    if client is None:
+        client = get_redis_client()
+    return client.zcard(BY_START_KEY)
+
+
+def events_in_range(start_ts=None, end_ts=None, city=None, offset=0, limit=20, client=None):
+    """
+    Eventos que empiezan entre start_ts y end_ts (epoch, inclusive), en orden
+    de inicio y paginados: O(log n + k) sobre el ZSET (global o de la ciudad).
+    Devuelve {"total": n, "eventos": [...]}.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    prune_ended_events(client=client)
+
+    key = CITY_KEY.format(city=normalize_city(city)) if city else BY_START_KEY
+    low = start_ts if start_ts is not None else "-inf"
+    high = end_ts if end_ts is not None else "+inf"
+
+    pipe = client.pipeline(transaction=False)
+    pipe.zcount(key, low, high)
+    if limit is None:
+        pipe.zrangebyscore(key, low, high)
+    else:
+        pipe.zrangebyscore(key, low, high, start=offset, num=limit)
+    total, ids = pipe.execute()
+
+    docs = client.hmget(DOCS_KEY, ids) if ids else []
+    return {"total": total, "eventos": [json.loads(doc) for doc in docs if doc]}
@@ -0,0 +1,212 @@
+# event_resolution.py
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from difflib import SequenceMatcher
+
+from unidecode import unidecode
+
+try:
+    from zoneinfo import ZoneInfo
+
+    LIMA_TZ = ZoneInfo("America/Lima")
+except Exception:
+    # Perú no tiene horario de verano: UTC-5 fijo
+    LIMA_TZ = timezone(timedelta(hours=-5), "America/Lima")
+
+# Similitud mínima (token sort) para considerar dos títulos el mismo evento
+TITLE_SIMILARITY_THRESHOLD = 0.85
+# Letras del título normalizado que se usan como clave de bloque
+TITLE_PREFIX_CHARS = 8
+
+# Cuando una misma ubicación viene como texto libre, buscamos estas ciudades
+KNOWN_CITIES = [
+    "lima", "arequipa", "cusco", "trujillo", "chiclayo", "piura", "iquitos",
+    "huancayo", "tacna", "ica", "puno", "cajamarca", "callao", "miraflores",
+]
+
+# Preferencia al elegir qué registro queda como principal al fusionar
+SOURCE_PRIORITY = {"ticketmaster": 0, "eventbrite": 1}
+
+# Palabras que no aportan al comparar títulos
+STOPWORDS = {
+    "de", "del", "la", "el", "los", "las", "y", "en", "con", "a", "al",
+    "the", "and", "of", "in", "tour", "peru", "lima", "live", "vivo",
+}
+
+ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?")
+LATAM_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})(?:\s+(\d{1,2}):(\d{2}))?")
+
+
+def parse_event_start(value):
+    """
+    Convierte el "start" de cualquier fuente a datetime con zona horaria de Lima.
+
+    - Ticketmaster: ISO en UTC ("2024-05-01T01:00:00Z")
+    - Eventbrite: fecha/hora local sin zona ("2024-04-30T20:00:00")
+    - RapidAPI: normalmente "2024-04-30 20:00:00", a veces texto libre
+
+    Devuelve None si no se reconoce el formato.
+    """
+    if not value or not isinstance(value, str):
+        return None
+
+    text = value.strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        iso = ISO_DATE_RE.search(text)
+        latam = LATAM_DATE_RE.search(text)
+        try:
+            if iso:
+                parsed = datetime.fromisoformat(iso.group(0).replace(" ", "T"))
+            elif latam:
+                day, month, year, hour, minute = latam.groups()
+                parsed = datetime(
+                    int(year), int(month), int(day), int(hour or 0), int(minute or 0)
+                )
+            else:
+                return None
+        except ValueError:
+            return None
+
+    if parsed.tzinfo is None:
+        # Sin zona: es hora local de Lima
+        return parsed.replace(tzinfo=LIMA_TZ)
+    return parsed.astimezone(LIMA_TZ)
+
+
+def normalize_title(title):
+    """Título sin tildes, en minúsculas, sin signos y con los tokens ordenados."""
+    text = re.sub(r"[^a-z0-9 ]+", " ", unidecode(title or "").lower())
+    tokens = [t for t in text.split() if t not in STOPWORDS]
+    return " ".join(sorted(tokens))
+
+
+def _title_prefix(title):
+    """Inicio del título (sin ordenar tokens) para la clave de bloque."""
+    text = re.sub(r"[^a-z0-9]+", "", unidecode(title or "").lower())
+    return text[:TITLE_PREFIX_CHARS]
+
+
+def normalize_city(city):
+    """Ciudad normalizada; entiende ubicaciones en texto libre ("Estadio X, Lima, Perú")."""
+    text = unidecode(city or "").lower()
+    for known in KNOWN_CITIES:
+        if re.search(rf"\b{known}\b", text):
+            return "lima" if known in ("callao", "miraflores") else known
+    return text.split(",")[0].strip()
+
+
+def event_day(event):
+    """Día del evento (YYYY-MM-DD, hora de Lima) o "" si no se pudo leer."""
+    start = parse_event_start(event.get("start"))
+    return start.date().isoformat() if start else ""
+
+
+def blocking_keys(event, normalized=None):
+    """
+    Claves de bloque: solo se comparan eventos que comparten alguna.
+
+    - día + ciudad + prefijo del título
+    - día + primer token del título normalizado (cubre ciudades en texto libre
+      y títulos con distinto orden de palabras); solo con día conocido, para
+      no juntar eventos sin fecha de ciudades distintas
+    """
+    day = event_day(event)
+    keys = [f"{day}|{normalize_city(event.get('city'))}|{_title_prefix(event.get('title'))}"]
+    if not day:
+        return keys
+    if normalized is None:
+        normalized = normalize_title(event.get("title"))
+    if normalized:
+        keys.append(f"{day}|*|{normalized.split()[0]}")
+    return keys
+
+
+def is_same_title(title_a, title_b):
+    """Dos títulos normalizados del mismo bloque son el mismo evento si se parecen lo suficiente."""
+    if not title_a or not title_b:
+        return False
+    if title_a == title_b:
+        return True
+    return SequenceMatcher(None, title_a, title_b).ratio() >= TITLE_SIMILARITY_THRESHOLD
+
+
+def _merge_group(group):
+    """Fusiona un grupo de duplicados en un solo registro con todas las URLs y fuentes."""
+    group = sorted(
+        group,
+        key=lambda e: (
+            SOURCE_PRIORITY.get((e.get("source") or "").lower(), 2),
+            -len(e.get("description") or ""),
+        ),
+    )
+    merged = dict(group[0])
+
+    urls = []
+    sources = []
+    for event in group:
+        if event.get("url") and event["url"] not in urls:
+            urls.append(event["url"])
+        source = (event.get("source") or "").lower()
+        if source and source not in sources:
+            sources.append(source)
+        for field in ("description", "city", "start"):
+            if not merged.get(field) and event.get(field):
+                merged[field] = event[field]
+
+    merged["urls"] = urls
+    merged["sources"] = sources
+    return merged
+
+
+def resolve_events(events):
+    """
+    Deduplica eventos de varias fuentes.
+
+    Agrupa candidatos por claves de bloque (≈ O(n)), compara por pares solo
+    dentro de cada bloque y fusiona los duplicados (union-find).
+    Devuelve (eventos_fusionados, stats).
+    """
+    parent = list(range(len(events)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    titles = [normalize_title(event.get("title")) for event in events]
+
+    blocks = defaultdict(list)
+    for i, event in enumerate(events):
+        for key in blocking_keys(event, titles[i]):
+            blocks[key].append(i)
+
+    comparisons = 0
+    for members in blocks.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if find(i) == find(j):
+                    continue
+                comparisons += 1
+                if is_same_title(titles[i], titles[j]):
+                    parent[find(j)] = find(i)
+
+    groups = defaultdict(list)
+    for i, event in enumerate(events):
+        groups[find(i)].append(event)
+
+    resolved = [_merge_group(group) for group in groups.values()]
+
+    total = len(events)
+    stats = {
+        "eventos_entrada": total,
+        "eventos_salida": len(resolved),
+        "duplicados_fusionados": total - len(resolved),
+        "tasa_dedupe": round((total - len(resolved)) / total, 3) if total else 0.0,
+        "bloques": len(blocks),
+        "comparaciones": comparisons,
+    }
+    return resolved, stats
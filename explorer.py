@@ -0,0 +1,174 @@
+# explorer.py
+"""
+Consultas paginadas para la pestaña "Explorar" de la app.
+Cada función devuelve solo la página pedida: (total, filas).
+"""
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from unidecode import unidecode
+
+from event_index import GENERATION_KEY as EVENT_GENERATION_KEY
+from event_index import compact_event, events_in_range
+from event_index import index_size as event_index_size
+from event_resolution import LIMA_TZ, parse_event_start
+from redis_utils import get_redis_client, load_datasets_cached
+from search_index import GENERATION_KEY as JOB_GENERATION_KEY
+from search_index import compact_job, index_ready, search
+
+PAGE_SIZE = 25
+
+
+def _norm(text):
+    return unidecode(text or "").lower()
+
+
+def _day_ts(day):
+    """Epoch del inicio del día en Lima (None si no hay día)."""
+    if day is None:
+        return None
+    return int(datetime(day.year, day.month, day.day, tzinfo=LIMA_TZ).timestamp())
+
+
+def cache_version(data_version, client=None) -> Tuple:
+    """
+    Clave para cachear páginas: versión de datos + generación de cada índice.
+    El manifiesto se mueve antes de que los índices se pongan al día; con la
+    generación en la clave, una página leída en ese intervalo no queda
+    cacheada como si fuera de la versión nueva.
+    """
+    if client is None:
+        client = get_redis_client()
+    pipe = client.pipeline(transaction=False)
+    pipe.get(JOB_GENERATION_KEY)
+    pipe.get(EVENT_GENERATION_KEY)
+    jobs_generation, events_generation = pipe.execute()
+    return data_version, jobs_generation or "0", events_generation or "0"
+
+
+def query_jobs(
+    text: str = "",
+    company: str = "",
+    location: str = "",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    page: int = 0,
+    page_size: int = PAGE_SIZE,
+    client=None,
+) -> Tuple[int, List[Dict]]:
+    """
+    Ofertas filtradas y paginadas.
+
+    Con el índice invertido, el filtro, el orden y la paginación corren en
+    Redis y solo viaja la página visible. Sin índice se filtra el dataset
+    (cacheado en el proceso) como respaldo. En los dos casos cada filtro
+    mira solo su campo (puesto, empresa, lugar) y el orden es el mismo:
+    más reciente primero y, a igual fecha, por id descendente.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    if index_ready(client):
+        result = search(
+            fields={"puesto": text, "empresa": company, "lugar": location},
+            mode="and",
+            offset=page * page_size,
+            limit=page_size,
+            client=client,
+            min_date=date_from,
+            max_date=date_to,
+        )
+        return result["total"], result["ofertas"]
+
+    _, datasets = load_datasets_cached(["scraper_4"], client=client)
+    rows = []
+    for job in datasets["scraper_4"]:
+        row = compact_job(job)
+        if text and not all(t in _norm(row["puesto"]) for t in _norm(text).split()):
+            continue
+        if company and _norm(company) not in _norm(row["empresa"]):
+            continue
+        if location and _norm(location) not in _norm(row["lugar"]):
+            continue
+        published = (row.get("fecha_creacion") or "")[:10]
+        if date_from and (not published or published < date_from.isoformat()):
+            continue
+        if date_to and (not published or published > date_to.isoformat()):
+            continue
+        rows.append(row)
+
+    # Mismo orden que el ZSET del índice (fecha y, en empate, id)
+    rows.sort(key=lambda r: (r.get("fecha_creacion") or "", r.get("id") or ""), reverse=True)
+    start = page * page_size
+    return len(rows), rows[start:start + page_size]
+
+
+def query_events(
+    text: str = "",
+    city: str = "",
+    source: str = "",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    page: int = 0,
+    page_size: int = PAGE_SIZE,
+    client=None,
+) -> Tuple[int, List[Dict]]:
+    """
+    Eventos filtrados, ordenados por fecha de inicio y paginados.
+
+    Con el índice temporal, el rango de fechas y la ciudad se resuelven en
+    Redis (ZSET por inicio); texto y fuente se filtran solo sobre ese rango.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    if event_index_size(client):
+        start_ts = _day_ts(date_from)
+        end_ts = _day_ts(date_to) + 86400 - 1 if date_to else None
+        offset = page * page_size
+        if not text and not source:
+            result = events_in_range(
+                start_ts, end_ts, city=city or None, offset=offset, limit=page_size,
+                client=client,
+            )
+            return result["total"], result["eventos"]
+
+        result = events_in_range(start_ts, end_ts, city=city or None, limit=None, client=client)
+        rows = [
+            row for row in result["eventos"]
+            if (not text or all(t in _norm(row["titulo"]) for t in _norm(text).split()))
+            and (not source or _norm(source) in _norm(row["fuentes"]).split(", "))
+        ]
+        return len(rows), rows[offset:offset + page_size]
+
+    _, datasets = load_datasets_cached(["events_peru"], client=client)
+    matches = []
+    for event in datasets["events_peru"]:
+        if text and not all(t in _norm(event.get("title")) for t in _norm(text).split()):
+            continue
+        if city and _norm(city) not in _norm(event.get("city")):
+            continue
+        sources = event.get("sources") or [event.get("source") or ""]
+        if source and not any(_norm(source) == _norm(s) for s in sources):
+            continue
+        start = parse_event_start(event.get("start"))
+        if (date_from or date_to) and start is None:
+            continue
+        if date_from and start.date() < date_from:
+            continue
+        if date_to and start.date() > date_to:
+            continue
+        matches.append((start.isoformat() if start else "", event))
+
+    matches.sort(key=lambda item: item[0])
+    start = page * page_size
+    return len(matches), [compact_event(e) for _, e in matches[start:start + page_size]]
+
+
+def event_sources(client=None) -> List[str]:
+    """Fuentes presentes en los eventos (para el filtro)."""
+    _, datasets = load_datasets_cached(["events_peru"], client=client)
+    sources = set()
+    for event in datasets["events_peru"]:
+        sources.update(event.get("sources") or [event.get("source") or ""])
+    return sorted(s for s in sources if s)
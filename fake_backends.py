@@ -0,0 +1,169 @@
+# fake_backends.py
+"""
+Backends falsos para probar sin red ni credenciales.
+
+- FakeGeminiModel imita la parte de GenerativeModel que usa gemini_model:
+  generate_content(...) devolviendo respuestas con .text y/o llamadas a funciones.
+- SimulatedGeminiModel agrega latencia realista (modelo de tokens por segundo)
+  para pruebas de carga.
+"""
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+@dataclass
+class FakeFunctionCall:
+    name: str
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class FakeCandidate:
+    function_calls: List[FakeFunctionCall] = field(default_factory=list)
+    content: Any = None
+
+
+class FakeResponse:
+    """Respuesta con texto final o con llamadas a herramientas."""
+
+    def __init__(self, text: str = "", function_calls: Optional[List[FakeFunctionCall]] = None):
+        self._text = text
+        self.candidates = [
+            FakeCandidate(function_calls=function_calls or [], content=("model", function_calls))
+        ]
+
+    @property
+    def text(self) -> str:
+        if self.candidates[0].function_calls:
+            # Igual que el SDK: una respuesta con llamadas no tiene texto
+            raise ValueError("La respuesta contiene llamadas a funciones, no texto.")
+        return self._text
+
+    @classmethod
+    def call(cls, name: str, **args) -> "FakeResponse":
+        return cls(function_calls=[FakeFunctionCall(name, args)])
+
+
+Script = Union[List[FakeResponse], Callable[[Any, Dict[str, Any]], FakeResponse]]
+
+
+class FakeGeminiModel:
+    """
+    Modelo falso guionado.
+
+    script puede ser una lista de FakeResponse (se devuelven en orden) o una
+    función (contents, kwargs) -> FakeResponse. Guarda cada llamada en .calls.
+    """
+
+    def __init__(self, script: Script, model_name: str = "fake-gemini"):
+        self.script = script
+        self.model_name = model_name
+        self.calls: List[Dict[str, Any]] = []
+        self._position = 0
+
+    def generate_content(self, contents, **kwargs) -> FakeResponse:
+        self.calls.append({"contents": contents, **kwargs})
+        if callable(self.script):
+            return self.script(contents, kwargs)
+        response = self.script[min(self._position, len(self.script) - 1)]
+        self._position += 1
+        return response
+
+
+@dataclass
+class LatencyModel:
+    """
+    Latencia simulada de una llamada:
+    base + jitter + tokens de entrada / input_tps + tokens de salida / output_tps.
+    Con probabilidad stall_rate la llamada además se "cuelga" stall_seconds.
+    """
+    base_seconds: float = 0.4
+    jitter_seconds: float = 0.2
+    input_tokens_per_second: float = 20000.0
+    output_tokens_per_second: float = 80.0
+    output_tokens: int = 300
+    chars_per_token: float = 4.0
+    stall_rate: float = 0.0
+    stall_seconds: float = 120.0
+
+    def tokens_in(self, contents) -> int:
+        return int(len(str(contents)) / self.chars_per_token)
+
+    def seconds(self, input_tokens: int, output_tokens: int, rng: random.Random) -> float:
+        seconds = (
+            self.base_seconds
+            + rng.uniform(0, self.jitter_seconds)
+            + input_tokens / self.input_tokens_per_second
+            + output_tokens / self.output_tokens_per_second
+        )
+        if self.stall_rate and rng.random() < self.stall_rate:
+            seconds += self.stall_seconds
+        return seconds
+
+
+class SimulatedGeminiModel:
+    """
+    Modelo falso con latencia y cupo de servidor, para pruebas de carga.
+
+    - latency: LatencyModel usado para calcular cuánto "tarda" cada llamada.
+    - server_slots: llamadas que el backend atiende a la vez (None = sin límite);
+      el resto espera, como cuando Vertex se satura.
+    - tool_calls: si se usan herramientas, cuántas rondas pide antes de responder.
+    - time_scale: multiplica las esperas (0 = no dormir, solo contar).
+    Acumula tokens y llamadas en .stats.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        server_slots: Optional[int] = None,
+        tool_calls: int = 1,
+        time_scale: float = 1.0,
+        seed: Optional[int] = None,
+        model_name: str = "simulated-gemini",
+    ):
+        self.latency = latency or LatencyModel()
+        self.tool_calls = tool_calls
+        self.time_scale = time_scale
+        self.model_name = model_name
+        self._slots = threading.BoundedSemaphore(server_slots) if server_slots else None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"llamadas": 0, "tokens_entrada": 0, "tokens_salida": 0}
+
+    def _answer(self, output_tokens: int) -> str:
+        filler = " ".join(["dato"] * max(output_tokens - 20, 1))
+        return json.dumps(
+            {"resumen": "Respuesta simulada.", "detalle": filler}, ensure_ascii=False
+        )
+
+    def generate_content(self, contents, **kwargs) -> FakeResponse:
+        # Con herramientas: las primeras rondas piden datos, la última responde
+        rounds = len(contents) // 2 if isinstance(contents, list) else 0
+        # tool_config solo se pasa para prohibir más llamadas (modo NONE)
+        wants_tool = kwargs.get("tools") and not kwargs.get("tool_config") and rounds < self.tool_calls
+        output_tokens = 20 if wants_tool else self.latency.output_tokens
+
+        input_tokens = self.latency.tokens_in(contents)
+        with self._lock:
+            delay = self.latency.seconds(input_tokens, output_tokens, self._rng)
+            self.stats["llamadas"] += 1
+            self.stats["tokens_entrada"] += input_tokens
+            self.stats["tokens_salida"] += output_tokens
+
+        if self._slots:
+            self._slots.acquire()
+        try:
+            if self.time_scale:
+                time.sleep(delay * self.time_scale)
+        finally:
+            if self._slots:
+                self._slots.release()
+
+        if wants_tool:
+            return FakeResponse.call("search_jobs", keyword="datos", limit=5)
+        return FakeResponse(self._answer(output_tokens))
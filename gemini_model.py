@@ -1,17 +1,51 @@
 # gemini_model.py
 import json
+import logging
 from datetime import datetime
 from typing import List, Dict, Optional
 
 import os
 import vertexai
-from vertexai.generative_models import GenerativeModel, GenerationConfig
+from vertexai.generative_models import (
+    Content,
+    FunctionDeclaration,
+    GenerationConfig,
+    GenerativeModel,
+    Part,
+    Tool,
+    ToolConfig,
+)
 from google.oauth2 import service_account
 
 import config
-from redis_utils import get_redis_client, load_data_from_redis
-
-MAX_DATA_CHARS = 20000
+from context_artifacts import (
+    SECTION_AGGREGATES,
+    SECTION_FULL,
+    get_context_counts,
+    get_context_section,
+    render_aggregates_context,
+    render_full_context,
+)
+from redis_utils import get_redis_client, load_datasets_cached
+from job_tools import TOOL_DECLARATIONS, execute_tool
+from model_guard import guard_model
+from model_tiers import ESCALATION, choose_tier, get_tiers, validate_answer
+from question_router import ROUTE_AGGREGATES, ROUTE_FULL, ROUTE_NONE, route_question
+from snapshots import latest_aggregates, summarize_history
+
+logger = logging.getLogger("copilot.model")
+
+# Rondas máximas de llamadas a herramientas por turno
+MAX_TOOL_STEPS = 5
+
+TOOLS_INSTRUCTIONS = """
+DATA no se incluye completo en este turno. Tienes herramientas para consultar
+las ofertas y eventos guardados:
+- search_jobs: buscar ofertas por palabra clave, ubicación o empresa.
+- count_jobs_by: contar ofertas agrupadas por empresa, lugar, nivel, habilidades, etc.
+- list_events: listar eventos en un rango de fechas.
+Úsalas cuantas veces necesites y basa tu respuesta en sus resultados.
+""".strip()
 
 
 SYSTEM_INSTRUCTIONS = """
@@ -23,6 +57,7 @@ Comportamiento general:
 - Cuando la pregunta del usuario esté relacionada con trabajo, empleabilidad, mercado laboral, ofertas de empleo o eventos, usa DATA para fundamentar la respuesta siempre que sea posible.
 - Cuando la pregunta NO esté relacionada con esos temas, puedes responder solo con tu conocimiento general, sin usar DATA.
 - Si la información que el usuario pide no se puede conocer a partir de DATA, dilo explícitamente cuando sea relevante.
+- DATA.tendencias trae totales por día de las últimas semanas: úsalo para preguntas sobre cómo cambió la demanda en el tiempo.
 - No inventes empresas, salarios ni eventos concretos que no aparezcan en DATA. Puedes dar ejemplos genéricos, pero aclara que son ejemplos y no salen de los datos.
 - El idioma de salida debe ser SIEMPRE español.
 """.strip()
@@ -70,9 +105,10 @@ Instrucciones sobre cómo responder:
 """.strip()
 
 
-def _init_gemini_model() -> GenerativeModel:
+def _init_gemini_model(model_name: Optional[str] = None) -> GenerativeModel:
     """
-    Inicializa Vertex AI usando las credenciales definidas en config:
+    Inicializa Vertex AI usando las credenciales definidas en config y
+    devuelve el modelo model_name (por defecto config.GEMINI_MODEL_NAME):
 
     - Si existe config.GCP_SERVICE_ACCOUNT_JSON (modo deploy / Streamlit Cloud),
       lo usa directamente sin necesidad de archivo físico.
@@ -117,29 +153,123 @@ def _init_gemini_model() -> GenerativeModel:
             location=config.GCP_LOCATION,
         )
 
-    return GenerativeModel(config.GEMINI_MODEL_NAME)
+    return GenerativeModel(model_name or config.GEMINI_MODEL_NAME)
 
 
 def build_data_context():
     """
-    Lee jobs y events desde Redis y construye el string DATA.
+    Devuelve (DATA, n_ofertas, n_eventos) de la ruta "datos".
+
+    Normalmente es el artefacto materializado al publicar (sin serializar
+    nada por turno); si todavía no existe, se arma en vivo desde Redis.
     """
     client = get_redis_client()
 
-    jobs = load_data_from_redis("scraper_4", client=client)
-    events = load_data_from_redis("events_peru", client=client)
+    data_str = get_context_section(SECTION_FULL, client=client)
+    counts = get_context_counts(client=client)
+    if data_str is not None and counts is not None:
+        return data_str, counts["jobs"], counts["events"]
+
+    # Jobs y events de la misma versión publicada (caché mientras no cambie)
+    _, datasets = load_datasets_cached(["scraper_4", "events_peru"], client=client)
+    jobs = datasets["scraper_4"]
+    events = datasets["events_peru"]
+    data_str = render_full_context(jobs, events, summarize_history(client=client))
+    return data_str, len(jobs), len(events)
+
+
+def build_aggregates_context():
+    """
+    DATA reducido para preguntas de conteos o tendencias: solo los agregados
+    diarios (sin listar ofertas ni eventos). Devuelve "" si aún no hay agregados.
+    """
+    client = get_redis_client()
+
+    data_str = get_context_section(SECTION_AGGREGATES, client=client)
+    if data_str is not None:
+        return data_str
+
+    return render_aggregates_context(
+        latest_aggregates("scraper_4", client=client),
+        latest_aggregates("events_peru", client=client),
+        summarize_history(client=client),
+    )
+
+
+def _build_tool() -> Tool:
+    return Tool(
+        function_declarations=[
+            FunctionDeclaration(
+                name=decl["name"],
+                description=decl["description"],
+                parameters=decl["parameters"],
+            )
+            for decl in TOOL_DECLARATIONS
+        ]
+    )
+
+
+def _function_calls(response):
+    candidates = getattr(response, "candidates", None) or []
+    if not candidates:
+        return []
+    return list(getattr(candidates[0], "function_calls", None) or [])
+
+
+# Para la última llamada del bucle: herramientas declaradas, pero sin usarlas
+NO_MORE_TOOLS = ToolConfig(
+    function_calling_config=ToolConfig.FunctionCallingConfig(
+        mode=ToolConfig.FunctionCallingConfig.Mode.NONE,
+    )
+)
 
-    contexto = {
-        "jobs": jobs,
-        "events": events,
-    }
 
-    data_str = json.dumps(contexto, ensure_ascii=False)
+def _run_tool_loop(model, prompt: str, generation_config, max_steps: int = MAX_TOOL_STEPS):
+    """
+    Conversación con herramientas: mientras el modelo pida funciones, se
+    ejecutan localmente contra Redis y se le devuelven los resultados compactos.
+    Devuelve la respuesta final (con texto).
+    """
+    tool = _build_tool()
+    contents = [Content(role="user", parts=[Part.from_text(prompt)])]
 
-    if len(data_str) > MAX_DATA_CHARS:
-        data_str = data_str[:MAX_DATA_CHARS]
+    for _ in range(max_steps):
+        response = model.generate_content(
+            contents, generation_config=generation_config, tools=[tool]
+        )
+        calls = _function_calls(response)
+        if not calls:
+            return response
+
+        contents.append(response.candidates[0].content)
+        contents.append(
+            Content(
+                role="user",
+                parts=[
+                    Part.from_function_response(
+                        name=call.name,
+                        response={"content": execute_tool(call.name, dict(call.args or {}))},
+                    )
+                    for call in calls
+                ],
+            )
+        )
 
-    return data_str, jobs, events
+    # Se acabaron las rondas: pedimos la respuesta final. Las herramientas
+    # siguen declaradas (el historial tiene llamadas y resultados de funciones)
+    # pero con el modo NONE el modelo ya no puede pedir otra.
+    contents.append(
+        Content(
+            role="user",
+            parts=[Part.from_text("Responde ahora con la información que ya obtuviste.")],
+        )
+    )
+    return model.generate_content(
+        contents,
+        generation_config=generation_config,
+        tools=[tool],
+        tool_config=NO_MORE_TOOLS,
+    )
 
 
 def _build_history_block(history: Optional[List[Dict[str, str]]]) -> str:
@@ -169,9 +299,52 @@ def _build_history_block(history: Optional[List[Dict[str, str]]]) -> str:
     return "\n".join(lines) + "\n\n"
 
 
+def _model_for_tier(tier, model=None, models=None):
+    """
+    Modelo de un nivel (el inyectado en pruebas o el de Vertex), envuelto con
+    el deadline, el hedging y el circuit breaker de ese nivel.
+    """
+    if models and tier.name in models:
+        base = models[tier.name]
+    elif model is not None:
+        base = model
+    else:
+        base = _init_gemini_model(tier.model_name)
+    return guard_model(base, tier.name)
+
+
+def _response_text(response) -> str:
+    text = (response.text or "").strip()
+
+    # Por si el modelo mete accidentalmente ```json ... ```
+    if text.startswith("```"):
+        lines = text.splitlines()
+        if lines and lines[0].strip().startswith("```"):
+            lines = lines[1:]
+        if lines and lines[-1].strip().startswith("```"):
+            lines = lines[:-1]
+        text = "\n".join(lines).strip()
+    return text
+
+
+def _parse_answer(text: str):
+    # Intentamos parsear JSON SOLO si de verdad parece JSON
+    if text.startswith("{") or text.startswith("["):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            # Si falla, devolvemos el texto tal cual
+            return text
+    else:
+        return text
+
+
 def generate_insights(
     user_question: Optional[str] = None,
     history: Optional[List[Dict[str, str]]] = None,
+    model=None,
+    use_tools: Optional[bool] = None,
+    models: Optional[Dict[str, object]] = None,
 ):
     """
     Llama a Gemini usando los datos de Redis y devuelve:
@@ -180,26 +353,50 @@ def generate_insights(
 
     history: lista opcional de mensajes anteriores, cada uno con:
       {"role": "user" | "assistant", "content": "texto..."}
+    model: modelo a usar en todos los niveles (por defecto Gemini en Vertex según
+      el nivel; en pruebas, FakeGeminiModel)
+    models: modelos por nivel ({"flash": ..., "pro": ...}), para probar la escalada
+    use_tools: si True, en vez de pegar DATA el modelo consulta los datos con
+      herramientas (por defecto config.GEMINI_USE_TOOLS)
     """
-    data_str, jobs, events = build_data_context()
-
-    if not jobs and not events:
-        raise RuntimeError(
-            "No hay datos en Redis. "
-            "Primero ejecuta scraper.py y ticket_master.py para poblar jobs y eventos."
-        )
-
-    model = _init_gemini_model()
+    if use_tools is None:
+        use_tools = config.GEMINI_USE_TOOLS
+
+    # El router decide si la pregunta necesita DATA (y cuánta)
+    route = route_question(user_question, history)
+
+    data_str = ""
+    data_label = ""
+    if route.mode == ROUTE_AGGREGATES:
+        data_str = build_aggregates_context()
+        data_label = "DATA (agregados diarios de ofertas y eventos, sin el detalle):"
+    if use_tools and route.mode == ROUTE_FULL:
+        data_label = TOOLS_INSTRUCTIONS
+    elif route.mode == ROUTE_FULL or (route.mode == ROUTE_AGGREGATES and not data_str):
+        data_str, n_jobs, n_events = build_data_context()
+        data_label = "DATA (resumen de ofertas y eventos):"
+
+        if not n_jobs and not n_events:
+            raise RuntimeError(
+                "No hay datos en Redis. "
+                "Primero ejecuta scraper.py y ticket_master.py para poblar jobs y eventos."
+            )
 
     fecha_analisis = datetime.now().strftime("%Y-%m-%d")
 
     history_block = _build_history_block(history)
 
+    if route.mode == ROUTE_NONE:
+        data_block = "DATA: no se incluye en este turno (pregunta general).\n\n"
+    elif data_str:
+        data_block = f"{data_label}\n{data_str}\n\n"
+    else:
+        data_block = f"{data_label}\n\n"
+
     prompt = (
         f"{SYSTEM_INSTRUCTIONS}\n\n"
         f"Hoy es {fecha_analisis}.\n\n"
-        f"DATA (resumen de ofertas y eventos):\n"
-        f"{data_str}\n\n"
+        f"{data_block}"
         f"{USER_TASK}\n\n"
         f"{history_block}"
     )
@@ -207,36 +404,34 @@ def generate_insights(
     if user_question:
         prompt += f"Pregunta actual del usuario: {user_question}\n"
 
-    response = model.generate_content(
-        prompt,
-        generation_config=GenerationConfig(
-            temperature=0.5,          # un poquito más creativo para razonar
-            max_output_tokens=3072,   # más tokens para respuestas completas
-            top_p=0.95,
-            top_k=40,
-        ),
-    )
-
-    text = (response.text or "").strip()
+    # Nivel de modelo según la pregunta y el tamaño de DATA; si el liviano
+    # falla o no pasa la validación, se reintenta con el siguiente
+    tiers = get_tiers()
+    tier_name, reason = choose_tier(route, user_question, len(data_str) + len(history_block))
+    logger.info("nivel=%s motivo=%s", tier_name, reason)
 
-    # Por si el modelo mete accidentalmente ```json ... ```
-    if text.startswith("```"):
-        lines = text.splitlines()
-        if lines and lines[0].strip().startswith("```"):
-            lines = lines[1:]
-        if lines and lines[-1].strip().startswith("```"):
-            lines = lines[:-1]
-        text = "\n".join(lines).strip()
-
-    # Intentamos parsear JSON SOLO si de verdad parece JSON
-    if text.startswith("{") or text.startswith("["):
+    while True:
+        tier = tiers[tier_name]
+        generation_config = GenerationConfig(**tier.generation_kwargs())
+        tier_model = _model_for_tier(tier, model, models)
         try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            # Si falla, devolvemos el texto tal cual
-            return text
-    else:
-        return text
+            if use_tools and route.mode == ROUTE_FULL:
+                response = _run_tool_loop(tier_model, prompt, generation_config)
+            else:
+                response = tier_model.generate_content(prompt, generation_config=generation_config)
+            text = _response_text(response)
+            problem = validate_answer(response, text, route)
+        except Exception as e:
+            if tier_name not in ESCALATION:
+                raise
+            problem = repr(e)
+
+        if problem is None or tier_name not in ESCALATION:
+            break
+        logger.warning("nivel=%s rechazado (%s), reintento con %s", tier_name, problem, ESCALATION[tier_name])
+        tier_name = ESCALATION[tier_name]
+
+    return _parse_answer(text)
 
 
 if __name__ == "__main__":
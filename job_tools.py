@@ -0,0 +1,201 @@
+# job_tools.py
+from collections import Counter
+from datetime import date, datetime
+
+from unidecode import unidecode
+
+from event_index import compact_event, events_in_range
+from event_index import index_size as event_index_size
+from event_resolution import LIMA_TZ, parse_event_start
+from redis_utils import get_redis_client, load_datasets_cached
+from search_index import compact_job, index_ready, search
+
+MAX_RESULTS = 20
+
+# Declaraciones (JSON Schema) que se ofrecen al modelo como herramientas
+TOOL_DECLARATIONS = [
+    {
+        "name": "search_jobs",
+        "description": (
+            "Busca ofertas de empleo por palabra clave (en el puesto o las habilidades), "
+            "ubicación y/o empresa. Devuelve ofertas compactas con su enlace."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "keyword": {"type": "string", "description": "Ej. 'analista de datos', 'python'"},
+                "location": {"type": "string", "description": "Ej. 'Lima', 'Arequipa'"},
+                "company": {"type": "string", "description": "Nombre (o parte) de la empresa"},
+                "limit": {"type": "integer", "description": f"Máximo {MAX_RESULTS}"},
+            },
+        },
+    },
+    {
+        "name": "count_jobs_by",
+        "description": (
+            "Cuenta las ofertas agrupadas por un campo: empresa, lugar, nivel, "
+            "tipo_empleo, sectores o habilidades. Devuelve los grupos más frecuentes."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "field": {
+                    "type": "string",
+                    "enum": ["empresa", "lugar", "nivel", "tipo_empleo", "sectores", "habilidades"],
+                },
+                "keyword": {"type": "string", "description": "Filtro opcional por puesto"},
+                "top": {"type": "integer", "description": "Cantidad de grupos (por defecto 10)"},
+            },
+            "required": ["field"],
+        },
+    },
+    {
+        "name": "list_events",
+        "description": "Lista eventos entre dos fechas (YYYY-MM-DD), opcionalmente por ciudad.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "start_date": {"type": "string", "description": "YYYY-MM-DD (por defecto hoy)"},
+                "end_date": {"type": "string", "description": "YYYY-MM-DD (inclusive)"},
+                "city": {"type": "string"},
+                "limit": {"type": "integer", "description": f"Máximo {MAX_RESULTS}"},
+            },
+        },
+    },
+]
+
+
+def _norm(text):
+    return unidecode(text or "").lower()
+
+
+def _limit(value, default=10):
+    try:
+        return max(1, min(int(value or default), MAX_RESULTS))
+    except (TypeError, ValueError):
+        return default
+
+
+def _load(client):
+    if client is None:
+        client = get_redis_client()
+    _, datasets = load_datasets_cached(["scraper_4", "events_peru"], client=client)
+    return datasets["scraper_4"], datasets["events_peru"]
+
+
+def _job_matches(job, keyword=None, location=None, company=None):
+    if keyword:
+        detalle = job.get("detalle") or {}
+        haystack = _norm(job.get("puesto")) + " " + _norm(" ".join(detalle.get("habilidades") or []))
+        if not all(token in haystack for token in _norm(keyword).split()):
+            return False
+    if location and _norm(location) not in _norm(job.get("lugar")):
+        return False
+    if company and _norm(company) not in _norm((job.get("empresa") or {}).get("nombre")):
+        return False
+    return True
+
+
+def search_jobs(keyword=None, location=None, company=None, limit=10, client=None):
+    if client is None:
+        client = get_redis_client()
+
+    # Con el índice invertido la búsqueda corre en Redis sin cargar el dataset;
+    # cada filtro se cruza con su campo, como en _job_matches
+    if index_ready(client):
+        fields = {"clave": keyword, "lugar": location, "empresa": company}
+        return search(fields=fields, mode="and", limit=_limit(limit), client=client)
+
+    jobs, _ = _load(client)
+    matches = [job for job in jobs if _job_matches(job, keyword, location, company)]
+    return {
+        "total": len(matches),
+        "ofertas": [compact_job(job) for job in matches[: _limit(limit)]],
+    }
+
+
+def count_jobs_by(field, keyword=None, top=10, client=None):
+    jobs, _ = _load(client)
+    counts = Counter()
+    for job in jobs:
+        if keyword and not _job_matches(job, keyword=keyword):
+            continue
+        detalle = job.get("detalle") or {}
+        if field == "empresa":
+            values = [(job.get("empresa") or {}).get("nombre")]
+        elif field == "lugar":
+            values = [job.get("lugar")]
+        elif field == "habilidades":
+            values = detalle.get("habilidades") or []
+        elif field in ("nivel", "tipo_empleo", "sectores"):
+            values = [detalle.get(field)]
+        else:
+            return {"error": f"Campo no soportado: {field}"}
+        counts.update(v for v in values if v)
+
+    return {
+        "campo": field,
+        "total_ofertas": len(jobs),
+        "grupos": [{"valor": v, "ofertas": n} for v, n in counts.most_common(_limit(top))],
+    }
+
+
+def list_events(start_date=None, end_date=None, city=None, limit=10, client=None):
+    if client is None:
+        client = get_redis_client()
+    try:
+        start = date.fromisoformat(start_date) if start_date else datetime.now(LIMA_TZ).date()
+        end = date.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        return {"error": "Fechas en formato YYYY-MM-DD"}
+
+    # Con el índice temporal: rango por ZSET, sin cargar ni parsear eventos
+    if event_index_size(client):
+        start_ts = int(datetime(start.year, start.month, start.day, tzinfo=LIMA_TZ).timestamp())
+        end_ts = (
+            int(datetime(end.year, end.month, end.day, tzinfo=LIMA_TZ).timestamp()) + 86400 - 1
+            if end
+            else None
+        )
+        return events_in_range(start_ts, end_ts, city=city, limit=_limit(limit), client=client)
+
+    _, events = _load(client)
+
+    matches = []
+    for event in events:
+        start_dt = parse_event_start(event.get("start"))
+        if start_dt is None or start_dt.date() < start or (end and start_dt.date() > end):
+            continue
+        if city and _norm(city) not in _norm(event.get("city")):
+            continue
+        matches.append((start_dt, event))
+
+    matches.sort(key=lambda item: item[0])
+    return {
+        "total": len(matches),
+        "eventos": [compact_event(event) for _, event in matches[: _limit(limit)]],
+    }
+
+
+TOOLS = {
+    "search_jobs": search_jobs,
+    "count_jobs_by": count_jobs_by,
+    "list_events": list_events,
+}
+
+
+def execute_tool(name, args, client=None):
+    """Ejecuta una herramienta declarada y devuelve un dict compacto (o {"error": ...})."""
+    func = TOOLS.get(name)
+    if func is None:
+        return {"error": f"Herramienta desconocida: {name}"}
+
+    allowed = {
+        p for decl in TOOL_DECLARATIONS if decl["name"] == name
+        for p in decl["parameters"]["properties"]
+    }
+    kwargs = {k: v for k, v in (args or {}).items() if k in allowed}
+    try:
+        return func(client=client, **kwargs)
+    except TypeError as e:
+        return {"error": f"Argumentos inválidos para {name}: {e}"}
@@ -0,0 +1,335 @@
+# load_test.py
+"""
+Prueba de carga del Copilot: N usuarios simulados conversando a la vez.
+
+Corre sin red: Redis es un fakeredis con datos sintéticos y Gemini es un
+SimulatedGeminiModel (latencia + tokens por segundo + cupo del servidor).
+Cada usuario hace varias preguntas seguidas (con historial), igual que en el
+chat de la app: por el coordinador del proceso (single-flight + cola justa).
+
+Reporta throughput, latencias p50/p95/p99, memoria por sesión y el nivel de
+concurrencia donde el sistema se satura.
+
+Uso:
+    python load_test.py --users 1,2,4,8,16,32 --turns 3 --server-slots 8
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import config
+from context_artifacts import materialize_context
+from daily_report import answer_question
+from fake_backends import LatencyModel, SimulatedGeminiModel
+from gemini_model import generate_insights
+from model_guard import get_guard_metrics, reset_guards
+from redis_utils import get_data_version, store_data_in_redis, use_redis_client
+from request_coordinator import RequestCoordinator, request_key
+from snapshots import record_snapshot
+
+# Mezcla de preguntas (texto, peso): cubre las tres rutas del router
+QUESTION_MIX = [
+    ("Hola, ¿cómo me puedes ayudar?", 1),
+    ("Dame consejos para mejorar mi CV de analista de datos", 1),
+    ("¿Cuántas ofertas de data analyst hay este mes?", 2),
+    ("¿Cuál es la tendencia de ofertas de Python en los últimos días?", 2),
+    ("¿Qué habilidades se repiten más en las ofertas?", 2),
+    ("Recomiéndame ofertas de ingeniero de datos en Lima", 3),
+    ("Muéstrame eventos de tecnología esta semana", 2),
+    ("¿Qué empresas están contratando científicos de datos?", 2),
+]
+# Seguimientos cortos (heredan la ruta de la pregunta anterior)
+FOLLOW_UPS = [
+    "¿Y en Arequipa?",
+    "¿Y para perfiles junior?",
+    "Entonces, ¿cuál me recomiendas?",
+    "Dame más detalle del primero",
+]
+
+# Se considera saturado si el throughput crece menos que esto al subir usuarios...
+SATURATION_MIN_GAIN = 0.10
+# ...o si el p95 se dispara respecto al nivel más bajo
+SATURATION_P95_FACTOR = 3.0
+
+
+# ---------------------------
+# Datos sintéticos
+# ---------------------------
+def seed_fake_data(client, n_jobs=300, n_events=80, days=14, seed=7):
+    """Publica ofertas y eventos sintéticos (y su histórico diario) en el cliente."""
+    rng = random.Random(seed)
+    puestos = ["Data Analyst", "Ingeniero de Datos", "Científico de Datos", "Analista BI",
+               "Desarrollador Python", "Data Engineer Junior"]
+    empresas = ["Interbank", "BCP", "Rimac", "Alicorp", "Falabella", "Yape", "Belcorp"]
+    lugares = ["Lima, Perú", "Arequipa, Perú", "Trujillo, Perú", "Cusco, Perú"]
+    ciudades = ["Lima", "Arequipa", "Cusco"]
+    today = date.today()
+
+    def jobs_for(day, count):
+        return [
+            {
+                "id": str(100000 + i),
+                "urn": f"urn:li:jobPosting:{100000 + i}",
+                "puesto": rng.choice(puestos),
+                "empresa": {"nombre": rng.choice(empresas)},
+                "lugar": rng.choice(lugares),
+                "fecha_creacion": (day - timedelta(days=rng.randint(0, 6))).isoformat(),
+                "enlace": f"https://pe.linkedin.com/jobs/view/{100000 + i}",
+                "detalle": {"nivel": "Junior", "habilidades": rng.sample(["SQL", "Python", "Excel", "Power BI", "Spark"], 2),
+                            "descripcion": "Buscamos analista con experiencia en datos. " * 10},
+            }
+            for i in range(count)
+        ]
+
+    for offset in range(days, 0, -1):
+        day = today - timedelta(days=offset)
+        record_snapshot("scraper_4", jobs_for(day, n_jobs - offset * 5), client=client, day=day.isoformat())
+
+    jobs = jobs_for(today, n_jobs)
+    events = [
+        {
+            "title": f"Meetup de datos #{i}",
+            "city": rng.choice(ciudades),
+            "start": (today + timedelta(days=rng.randint(0, 20))).isoformat() + "T19:00:00",
+            "url": f"https://eventos.example/{i}",
+            "source": rng.choice(["ticketmaster", "eventbrite"]),
+        }
+        for i in range(n_events)
+    ]
+    store_data_in_redis("scraper_4", jobs, client=client)
+    store_data_in_redis("events_peru", events, client=client)
+    record_snapshot("scraper_4", jobs, client=client, day=today.isoformat())
+    record_snapshot("events_peru", events, client=client, day=today.isoformat())
+    materialize_context(client=client)
+
+
+# ---------------------------
+# Usuarios simulados
+# ---------------------------
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """Percentil por rango más cercano (None si no hay valores)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _pick_question(rng, history):
+    if history and rng.random() < 0.4:
+        return rng.choice(FOLLOW_UPS)
+    questions, weights = zip(*QUESTION_MIX)
+    return rng.choices(questions, weights=weights)[0]
+
+
+def simulate_user(user_id, turns, model, coordinator, results, think_seconds=0.0, use_tools=False, seed=0):
+    """
+    Una sesión de chat: `turns` preguntas con historial acumulado, por el
+    mismo camino que ask_copilot (clave de single-flight + coordinador).
+    Agrega a results un dict por turno con latencia y error (si lo hubo).
+    """
+    rng = random.Random(seed * 1000 + user_id)
+    history: List[Dict[str, str]] = []
+    version = get_data_version()
+
+    for turn in range(turns):
+        question = _pick_question(rng, history)
+        history.append({"role": "user", "content": question})
+        key = request_key(question, version, history[:-1])
+
+        started = time.perf_counter()
+        error = None
+        shared = False
+        try:
+            handle = coordinator.submit(
+                key,
+                lambda q=question, h=list(history): answer_question(
+                    user_question=q, history=h, model=model, use_tools=use_tools
+                ),
+            )
+            answer = handle.result()
+            shared = handle.shared
+            history.append({"role": "assistant", "content": json.dumps(answer, ensure_ascii=False)})
+        except Exception as e:
+            error = repr(e)
+            history.pop()
+
+        results.append({
+            "usuario": user_id,
+            "turno": turn,
+            "latencia": time.perf_counter() - started,
+            "error": error,
+            "compartida": shared,
+        })
+        if think_seconds:
+            time.sleep(rng.uniform(0, think_seconds))
+
+    results.append({"usuario": user_id, "sesion_bytes": len(json.dumps(history, ensure_ascii=False))})
+
+
+def run_load(users, turns=3, model=None, max_concurrent=None, think_seconds=0.0, use_tools=False, seed=0):
+    """
+    Corre `users` sesiones concurrentes y devuelve las métricas del nivel:
+    throughput (respuestas/s), latencias p50/p95/p99, errores y memoria por sesión.
+    """
+    if model is None:
+        model = SimulatedGeminiModel(seed=seed)
+    coordinator = RequestCoordinator(max_concurrent or config.GEMINI_MAX_CONCURRENT_CALLS)
+    results: List[Dict] = []
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+
+    threads = [
+        threading.Thread(
+            target=simulate_user,
+            args=(user_id, turns, model, coordinator, results, think_seconds, use_tools, seed),
+            daemon=True,
+        )
+        for user_id in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    turns_done = [r for r in results if "turno" in r]
+    ok = [r["latencia"] for r in turns_done if r["error"] is None]
+    sessions = [r["sesion_bytes"] for r in results if "sesion_bytes" in r]
+    return {
+        "usuarios": users,
+        "respuestas": len(ok),
+        "errores": len(turns_done) - len(ok),
+        "compartidas": sum(1 for r in turns_done if r["compartida"]),
+        "segundos": round(elapsed, 3),
+        "throughput": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "p50": _percentile(ok, 50),
+        "p95": _percentile(ok, 95),
+        "p99": _percentile(ok, 99),
+        "memoria_pico_kb_por_sesion": round((peak - baseline) / 1024 / max(users, 1), 1),
+        "historial_kb_por_sesion": round(sum(sessions) / 1024 / max(len(sessions), 1), 1),
+        "cola_max_llamadas": coordinator.semaphore.limit,
+    }
+
+
+def find_saturation(levels):
+    """
+    Primer nivel donde subir usuarios ya no rinde: el throughput crece menos
+    de SATURATION_MIN_GAIN o el p95 supera SATURATION_P95_FACTOR veces el del
+    nivel más bajo. Devuelve el número de usuarios (o None si no se saturó).
+    """
+    if not levels:
+        return None
+    base_p95 = levels[0]["p95"] or 0
+    for previous, current in zip(levels, levels[1:]):
+        gain = (current["throughput"] - previous["throughput"]) / (previous["throughput"] or 1)
+        too_slow = base_p95 and current["p95"] and current["p95"] > base_p95 * SATURATION_P95_FACTOR
+        if gain < SATURATION_MIN_GAIN or too_slow:
+            return current["usuarios"]
+    return None
+
+
+def run_ramp(user_levels, turns=3, latency=None, server_slots=None, max_concurrent=None,
+             think_seconds=0.0, use_tools=False, time_scale=1.0, seed=0):
+    """Corre run_load para cada nivel de usuarios y marca el punto de saturación."""
+    # Calienta las cachés del proceso (datasets, router) para no cargarlas a
+    # la memoria de las sesiones del primer nivel
+    warm_model = SimulatedGeminiModel(time_scale=0)
+    for question, _ in QUESTION_MIX:
+        generate_insights(user_question=question, model=warm_model, use_tools=use_tools)
+
+    levels = []
+    for users in user_levels:
+        reset_guards()
+        model = SimulatedGeminiModel(
+            latency=latency, server_slots=server_slots, time_scale=time_scale, seed=seed
+        )
+        level = run_load(users, turns, model, max_concurrent, think_seconds, use_tools, seed)
+        level["tokens"] = dict(model.stats)
+        # Deadlines, hedges y breaker por nivel de modelo
+        level["guardas"] = get_guard_metrics()
+        levels.append(level)
+        print(_format_level(level))
+    return {"niveles": levels, "saturacion_usuarios": find_saturation(levels)}
+
+
+def _format_level(level):
+    def ms(value):
+        return f"{value * 1000:7.0f}" if value is not None else "      -"
+
+    return (
+        f"{level['usuarios']:4d} usuarios | {level['throughput']:6.2f} resp/s | "
+        f"p50 {ms(level['p50'])} ms | p95 {ms(level['p95'])} ms | p99 {ms(level['p99'])} ms | "
+        f"errores {level['errores']} | {level['memoria_pico_kb_por_sesion']} KB/sesión"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del Copilot (sin red).")
+    parser.add_argument("--users", default="1,2,4,8,16", help="niveles de usuarios, separados por comas")
+    parser.add_argument("--turns", type=int, default=3, help="preguntas por sesión")
+    parser.add_argument("--max-concurrent", type=int, default=None,
+                        help="llamadas al modelo a la vez (por defecto GEMINI_MAX_CONCURRENT_CALLS)")
+    parser.add_argument("--server-slots", type=int, default=None, help="cupo simulado del backend")
+    parser.add_argument("--base-latency", type=float, default=0.4, help="segundos fijos por llamada")
+    parser.add_argument("--output-tps", type=float, default=80.0, help="tokens de salida por segundo")
+    parser.add_argument("--output-tokens", type=int, default=300, help="tokens por respuesta")
+    parser.add_argument("--think", type=float, default=0.0, help="pausa máxima entre preguntas (s)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="acelera (<1) las esperas simuladas")
+    parser.add_argument("--tools", action="store_true", help="usar el modo con herramientas")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="fracción de llamadas que se cuelgan")
+    parser.add_argument("--stall-seconds", type=float, default=120.0, help="cuánto se cuelga una llamada")
+    parser.add_argument("--deadline", type=float, default=None, help="deadline por llamada (s)")
+    parser.add_argument("--hedge-after", type=float, default=None, help="activa hedging tras estos segundos")
+    parser.add_argument("--json", dest="json_path", default=None, help="guardar el reporte en este archivo")
+    args = parser.parse_args()
+
+    import fakeredis  # dependencia de desarrollo (requirements-dev.txt)
+
+    if args.deadline is not None:
+        config.GEMINI_DEADLINE_SECONDS = args.deadline
+    if args.hedge_after is not None:
+        config.GEMINI_HEDGE = True
+        config.GEMINI_HEDGE_AFTER_SECONDS = args.hedge_after
+
+    client = fakeredis.FakeRedis(decode_responses=True)
+    use_redis_client(client)
+    seed_fake_data(client)
+
+    latency = LatencyModel(
+        base_seconds=args.base_latency,
+        output_tokens_per_second=args.output_tps,
+        output_tokens=args.output_tokens,
+        stall_rate=args.stall_rate,
+        stall_seconds=args.stall_seconds,
+    )
+    report = run_ramp(
+        [int(u) for u in args.users.split(",") if u.strip()],
+        turns=args.turns,
+        latency=latency,
+        server_slots=args.server_slots,
+        max_concurrent=args.max_concurrent,
+        think_seconds=args.think,
+        use_tools=args.tools,
+        time_scale=args.time_scale,
+    )
+
+    saturation = report["saturacion_usuarios"]
+    print(f"Saturación: {saturation} usuarios" if saturation else "Sin saturación en los niveles probados")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+# model_guard.py
+"""
+Protecciones para las llamadas a Gemini:
+
+- deadline por llamada: si Vertex no responde a tiempo, se corta con
+  ModelTimeoutError en vez de congelar el chat.
+- hedging opcional: si la llamada tarda más que el p95 reciente (o que
+  GEMINI_HEDGE_AFTER_SECONDS), se lanza una segunda y gana la primera.
+- circuit breaker por nivel de modelo: tras varios fallos seguidos falla
+  rápido (ModelUnavailableError) hasta que pase BREAKER_RESET_SECONDS.
+- respuesta cacheada: answer_with_fallback sirve la última respuesta buena
+  a la misma pregunta mientras el backend no está sano.
+"""
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+import config
+from redis_utils import get_redis_client
+
+# Respuestas buenas por clave de pregunta (ver request_coordinator.request_key)
+ANSWER_CACHE_KEY = "copilot:answers:{key}"
+# Latencias recientes para estimar el p95 (y mínimo de muestras para usarlo)
+LATENCY_WINDOW = 200
+MIN_SAMPLES_FOR_P95 = 20
+
+BREAKER_CLOSED = "cerrado"
+BREAKER_OPEN = "abierto"
+BREAKER_HALF_OPEN = "semiabierto"
+
+# Las llamadas que se pasan del deadline no se pueden cancelar: siguen en
+# su hilo hasta que Vertex conteste, pero nadie las espera
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="gemini")
+
+
+class ModelTimeoutError(TimeoutError):
+    """La llamada al modelo superó el deadline."""
+
+
+class ModelUnavailableError(RuntimeError):
+    """El circuit breaker está abierto: no se llama al modelo."""
+
+
+class CircuitBreaker:
+    """
+    Breaker clásico de tres estados:
+
+    - cerrado: pasan todas las llamadas; failure_threshold fallos seguidos lo abren.
+    - abierto: falla rápido durante reset_seconds.
+    - semiabierto: deja pasar una llamada de prueba; si sale bien se cierra,
+      si falla se vuelve a abrir.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return BREAKER_CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return BREAKER_HALF_OPEN
+        return BREAKER_OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == BREAKER_CLOSED:
+                return True
+            if state == BREAKER_HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class GuardMetrics:
+    """Contadores y latencias de un nivel de modelo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {
+            "llamadas": 0,
+            "exitos": 0,
+            "errores": 0,
+            "timeouts": 0,
+            "rechazadas_breaker": 0,
+            "hedges_lanzados": 0,
+            "hedges_ganados": 0,
+        }
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counts[name] += amount
+
+    def add_latency(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self.latencies) < MIN_SAMPLES_FOR_P95:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = dict(self.counts)
+        launched = counts["hedges_lanzados"]
+        counts["tasa_hedge_ganado"] = round(counts["hedges_ganados"] / launched, 3) if launched else None
+        counts["p95_segundos"] = self.p95()
+        return counts
+
+
+class GuardedModel:
+    """
+    Envuelve un modelo (Vertex o falso) con deadline, hedging y breaker.
+    Expone el mismo generate_content(contents, **kwargs).
+    """
+
+    def __init__(
+        self,
+        model,
+        breaker: CircuitBreaker,
+        metrics: GuardMetrics,
+        deadline_seconds: float,
+        hedge: bool = False,
+        hedge_after_seconds: Optional[float] = None,
+    ):
+        self.model = model
+        self.breaker = breaker
+        self.metrics = metrics
+        self.deadline_seconds = deadline_seconds
+        self.hedge = hedge
+        self.hedge_after_seconds = hedge_after_seconds
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        return self.hedge_after_seconds or self.metrics.p95()
+
+    def generate_content(self, contents, **kwargs):
+        if not self.breaker.allow():
+            self.metrics.incr("rechazadas_breaker")
+            raise ModelUnavailableError("El modelo no está disponible por ahora (circuit breaker abierto).")
+
+        self.metrics.incr("llamadas")
+        started = time.monotonic()
+        deadline = started + self.deadline_seconds
+
+        def call():
+            return self.model.generate_content(contents, **kwargs)
+
+        hedged = None
+        hedge_delay = self._hedge_delay()
+        pending = {_executor.submit(call)}
+        last_error = None
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            timeout = deadline - now
+            if hedge_delay is not None and hedged is None:
+                # Despertamos a tiempo para lanzar el hedge
+                timeout = min(timeout, max(started + hedge_delay - now, 0))
+
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                self.breaker.record_success()
+                self.metrics.incr("exitos")
+                self.metrics.add_latency(time.monotonic() - started)
+                if future is hedged:
+                    self.metrics.incr("hedges_ganados")
+                return response
+
+            if pending and hedge_delay is not None and hedged is None and (
+                time.monotonic() >= started + hedge_delay
+            ):
+                hedged = _executor.submit(call)
+                pending.add(hedged)
+                self.metrics.incr("hedges_lanzados")
+
+        # Fallaron todas o se acabó el tiempo
+        self.breaker.record_failure()
+        if not pending and last_error is not None:
+            self.metrics.incr("errores")
+            raise last_error
+        self.metrics.incr("timeouts")
+        raise ModelTimeoutError(f"Gemini no respondió en {self.deadline_seconds:.0f} s.")
+
+
+# ---------------------------
+# Registro por nivel de modelo
+# ---------------------------
+_breakers: Dict[str, CircuitBreaker] = {}
+_metrics: Dict[str, GuardMetrics] = {}
+_registry_lock = threading.Lock()
+# Respuestas servidas desde la caché de respaldo
+_fallback_served = [0]
+
+
+def _for_tier(tier_name: str):
+    with _registry_lock:
+        if tier_name not in _breakers:
+            _breakers[tier_name] = CircuitBreaker(
+                config.BREAKER_FAILURES, config.BREAKER_RESET_SECONDS
+            )
+            _metrics[tier_name] = GuardMetrics()
+        return _breakers[tier_name], _metrics[tier_name]
+
+
+def guard_model(model, tier_name: str) -> GuardedModel:
+    """Envuelve el modelo de un nivel con el breaker y las métricas de ese nivel."""
+    breaker, metrics = _for_tier(tier_name)
+    return GuardedModel(
+        model,
+        breaker,
+        metrics,
+        deadline_seconds=config.GEMINI_DEADLINE_SECONDS,
+        hedge=config.GEMINI_HEDGE,
+        hedge_after_seconds=config.GEMINI_HEDGE_AFTER_SECONDS or None,
+    )
+
+
+def get_guard_metrics() -> Dict:
+    """
+    Métricas por nivel (contadores, tasa de hedge ganado, p95 y estado del
+    breaker) y cuántas respuestas se sirvieron desde la caché de respaldo.
+    """
+    with _registry_lock:
+        tiers = list(_breakers)
+    result = {"niveles": {}, "respuestas_cacheadas": _fallback_served[0]}
+    for tier_name in tiers:
+        breaker, metrics = _for_tier(tier_name)
+        result["niveles"][tier_name] = {"breaker": breaker.state, **metrics.snapshot()}
+    return result
+
+
+def reset_guards() -> None:
+    """Olvida breakers y métricas (por ejemplo, entre pruebas)."""
+    with _registry_lock:
+        _breakers.clear()
+        _metrics.clear()
+        _fallback_served[0] = 0
+
+
+# ---------------------------
+# Respuesta cacheada de respaldo
+# ---------------------------
+
+def answer_with_fallback(key: Optional[str], func: Callable[[], object], client=None):
+    """
+    Ejecuta func (normalmente generate_insights). Si sale bien, guarda la
+    respuesta bajo key; si el modelo no está disponible o no respondió a
+    tiempo, devuelve la última respuesta guardada para esa key (si existe).
+    """
+    if client is None:
+        client = get_redis_client()
+    cache_key = ANSWER_CACHE_KEY.format(key=key) if key else None
+
+    try:
+        answer = func()
+    except (ModelUnavailableError, ModelTimeoutError):
+        if cache_key:
+            try:
+                cached = client.get(cache_key)
+            except Exception:
+                cached = None
+            if cached:
+                with _registry_lock:
+                    _fallback_served[0] += 1
+                return json.loads(cached)
+        raise
+
+    if cache_key:
+        try:
+            client.set(
+                cache_key,
+                json.dumps(answer, ensure_ascii=False),
+                ex=config.ANSWER_CACHE_TTL_SECONDS,
+            )
+        except Exception:
+            pass
+    return answer
@@ -0,0 +1,112 @@
+# model_tiers.py
+"""
+Niveles de modelo para el Copilot y la política que elige uno por turno.
+
+- "flash": modelo rápido y barato para charla, aclaraciones y conteos.
+- "pro": modelo pesado para reportes JSON, análisis y contextos grandes.
+
+Si la respuesta del nivel liviano no pasa la validación, gemini_model
+reintenta con el siguiente nivel (ver ESCALATION).
+"""
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import config
+from question_router import ROUTE_FULL, Route, normalize_question
+
+logger = logging.getLogger("copilot.tiers")
+
+TIER_FLASH = "flash"
+TIER_PRO = "pro"
+
+# Preguntas que piden análisis (no solo listar o contar): van al Pro
+ANALYSIS_RE = re.compile(
+    r"\b(analiza\w*|analisis|compara\w*|informe|reporte|estrategia|plan de|por que|"
+    r"diagnostico|evalua\w*|profundidad|detallad\w*)\b"
+)
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    name: str
+    model_name: str
+    temperature: float
+    max_output_tokens: int
+    top_p: float = 0.95
+    top_k: int = 40
+
+    def generation_kwargs(self) -> Dict:
+        """Argumentos para GenerationConfig."""
+        return {
+            "temperature": self.temperature,
+            "max_output_tokens": self.max_output_tokens,
+            "top_p": self.top_p,
+            "top_k": self.top_k,
+        }
+
+
+def get_tiers() -> Dict[str, ModelTier]:
+    return {
+        TIER_FLASH: ModelTier(
+            name=TIER_FLASH,
+            model_name=config.GEMINI_FLASH_MODEL_NAME,
+            temperature=0.3,
+            max_output_tokens=1024,
+        ),
+        TIER_PRO: ModelTier(
+            name=TIER_PRO,
+            model_name=config.GEMINI_PRO_MODEL_NAME,
+            temperature=0.5,          # un poquito más creativo para razonar
+            max_output_tokens=3072,   # más tokens para respuestas completas
+        ),
+    }
+
+
+# Nivel al que se reintenta cuando una respuesta no pasa la validación
+ESCALATION = {TIER_FLASH: TIER_PRO}
+
+
+def choose_tier(route: Route, question: Optional[str], context_chars: int = 0) -> Tuple[str, str]:
+    """
+    Elige el nivel para el turno. Devuelve (nivel, motivo).
+
+    - sin niveles (GEMINI_TIERING=0) → siempre Pro
+    - modo JSON (reporte completo) → Pro
+    - contexto (DATA + historial) mayor que GEMINI_PRO_CONTEXT_CHARS → Pro
+    - preguntas de análisis sobre los datos → Pro
+    - el resto (charla, conteos, listados cortos) → Flash
+    """
+    if not config.GEMINI_TIERING:
+        return TIER_PRO, "niveles desactivados"
+    if route.wants_json:
+        return TIER_PRO, "pedido JSON"
+    if context_chars > config.GEMINI_PRO_CONTEXT_CHARS:
+        return TIER_PRO, f"contexto grande ({context_chars} caracteres)"
+    if route.mode == ROUTE_FULL and ANALYSIS_RE.search(normalize_question(question or "")):
+        return TIER_PRO, "análisis"
+    return TIER_FLASH, f"ruta {route.mode}"
+
+
+def validate_answer(response, text: str, route: Route) -> Optional[str]:
+    """
+    Revisa la respuesta de un nivel. Devuelve None si está bien o el motivo
+    del rechazo (respuesta vacía, cortada por tokens o JSON inválido).
+    """
+    if not text:
+        return "respuesta vacía"
+
+    candidates = getattr(response, "candidates", None) or []
+    finish_reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+    if getattr(finish_reason, "name", finish_reason) == "MAX_TOKENS":
+        return "respuesta cortada (MAX_TOKENS)"
+
+    if route.wants_json:
+        try:
+            if not isinstance(json.loads(text), dict):
+                return "el JSON no es un objeto"
+        except json.JSONDecodeError:
+            return "JSON inválido"
+    return None
@@ -0,0 +1,162 @@
+# question_router.py
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from unidecode import unidecode
+
+import config
+
+logger = logging.getLogger("copilot.router")
+
+# Qué DATA necesita cada pregunta
+ROUTE_NONE = "sin_datos"        # charla general: no se lee Redis
+ROUTE_AGGREGATES = "agregados"  # conteos / tendencias: solo agregados diarios
+ROUTE_FULL = "datos"            # ejemplos concretos de ofertas o eventos
+
+# Pedido explícito del modo JSON (siempre necesita DATA completo)
+JSON_REQUEST_RE = re.compile(r"\bjson\b")
+
+# Reglas: (regex sobre la pregunta normalizada, ruta, peso)
+RULES = [
+    # Charla general / orientación
+    (r"\b(como me puedes ayudar|que puedes hacer|quien eres|hola|gracias)\b", ROUTE_NONE, 2.0),
+    (r"\b(explicame|que es|que significa|definicion de)\b", ROUTE_NONE, 1.5),
+    (r"\b(cv|curriculum|hoja de vida|carta de presentacion|entrevista|linkedin perfil)\b", ROUTE_NONE, 1.0),
+    (r"\b(ideas|consejos|tips|redacta|escribe|mejorar mi)\b", ROUTE_NONE, 1.0),
+    # Conteos, rankings y tendencias: alcanzan los agregados
+    (r"\b(cuantos|cuantas|cantidad|numero de|porcentaje)\b", ROUTE_AGGREGATES, 2.0),
+    (r"\b(tendencia|evolucion|ha cambiado|cambio|este mes|ultimos dias|ultima semana)\b", ROUTE_AGGREGATES, 2.0),
+    (r"\b(ranking|top|mas demandad\w*|mas pedid\w*|mas ofertas|se repiten)\b", ROUTE_AGGREGATES, 1.5),
+    (r"\b(habilidades|empresas que mas|ciudades con mas)\b", ROUTE_AGGREGATES, 1.0),
+    # Ejemplos concretos: hace falta DATA completo
+    (r"\b(ofertas?|vacantes?|empleos?|trabajos?|puestos?|convocatorias?)\b", ROUTE_FULL, 1.5),
+    (r"\b(eventos?|talleres?|webinars?|bootcamps?|ferias?|conciertos?)\b", ROUTE_FULL, 1.5),
+    (r"\b(recomiendame|muestrame|lista|listado|ejemplos|enlaces?|links?|donde postular)\b", ROUTE_FULL, 1.5),
+    (r"\b(empresa|sector|sectores|salario|sueldo|mercado laboral|demanda)\b", ROUTE_FULL, 1.0),
+    (r"\b(hoy|esta semana|lima|arequipa|cusco|trujillo|peru)\b", ROUTE_FULL, 0.5),
+]
+COMPILED_RULES = [(re.compile(pattern), route, weight) for pattern, route, weight in RULES]
+
+# Preguntas de seguimiento cortas ("¿y en Arequipa?") heredan la ruta de datos
+FOLLOW_UP_RE = re.compile(r"^(y|e|pero|tambien|entonces|ok|vale)\b")
+
+
+@dataclass
+class Route:
+    mode: str
+    wants_json: bool = False
+    scores: Dict[str, float] = field(default_factory=dict)
+    reason: str = ""
+
+    @property
+    def needs_redis(self) -> bool:
+        return self.mode != ROUTE_NONE
+
+
+def normalize_question(question: str) -> str:
+    text = unidecode(question or "").lower()
+    return re.sub(r"[^a-z0-9 ]+", " ", text).strip()
+
+
+def previous_turns(
+    question: Optional[str],
+    history: Optional[List[Dict[str, str]]] = None,
+) -> List[Dict[str, str]]:
+    """
+    Historial sin el turno de la pregunta actual. La app agrega la pregunta
+    al historial antes de llamar al Copilot: si el último turno es esa misma
+    pregunta del usuario, no cuenta como conversación previa.
+    """
+    if not history:
+        return []
+    last = history[-1]
+    if last.get("role") == "user" and last.get("content") == question:
+        return history[:-1]
+    return history
+
+
+_scoring_model = None
+
+
+def load_scoring_model(path: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Modelo de puntuación opcional: JSON {ruta: {token: peso}} (por ejemplo,
+    pesos de una regresión logística entrenada con los logs del router).
+    Sin ROUTER_MODEL_PATH solo se usan las reglas.
+    """
+    global _scoring_model
+    if path is None:
+        if _scoring_model is not None:
+            return _scoring_model
+        path = config.ROUTER_MODEL_PATH
+
+    model = {}
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            model = json.load(f)
+    _scoring_model = model
+    return model
+
+
+def score_question(text: str) -> Dict[str, float]:
+    """Suma los pesos de las reglas que coinciden y del modelo opcional."""
+    scores = {ROUTE_NONE: 0.0, ROUTE_AGGREGATES: 0.0, ROUTE_FULL: 0.0}
+    for regex, route, weight in COMPILED_RULES:
+        if regex.search(text):
+            scores[route] += weight
+
+    model = load_scoring_model()
+    if model:
+        tokens = text.split()
+        for route, weights in model.items():
+            if route in scores:
+                scores[route] += sum(weights.get(token, 0.0) for token in tokens)
+
+    return scores
+
+
+def route_question(
+    question: Optional[str],
+    history: Optional[List[Dict[str, str]]] = None,
+) -> Route:
+    """
+    Decide cuánta DATA necesita la pregunta:
+
+    - modo JSON explícito → datos completos
+    - si no hay ninguna señal → sin datos, salvo seguimientos de una
+      conversación en curso (que usan datos completos por seguridad); el
+      último turno de history puede ser la pregunta actual y no cuenta
+    - si no, la ruta con mayor puntaje (en empate gana la que usa más datos)
+    """
+    text = normalize_question(question or "")
+
+    if JSON_REQUEST_RE.search(text):
+        route = Route(ROUTE_FULL, wants_json=True, reason="pedido JSON")
+    else:
+        scores = score_question(text)
+        best = max(scores.values())
+        if best <= 0:
+            if previous_turns(question, history) and (FOLLOW_UP_RE.search(text) or len(text.split()) <= 4):
+                route = Route(ROUTE_FULL, scores=scores, reason="seguimiento")
+            else:
+                route = Route(ROUTE_NONE, scores=scores, reason="sin señales")
+        else:
+            # El orden desempata a favor de la ruta con más datos
+            mode = next(
+                r for r in (ROUTE_FULL, ROUTE_AGGREGATES, ROUTE_NONE) if scores[r] == best
+            )
+            route = Route(mode, scores=scores, reason="reglas")
+
+    logger.info(
+        "route=%s json=%s reason=%s scores=%s question=%r",
+        route.mode,
+        route.wants_json,
+        route.reason,
+        route.scores,
+        (question or "")[:120],
+    )
+    return route
@@ -1,13 +1,53 @@
 # redis_utils.py
+import hashlib
 import json
+import mmap
+import os
+import uuid
+from array import array
 from datetime import datetime
 
 import redis
 import config
 
+# Puntero a las versiones vigentes de todos los datasets:
+# {"version": N, "datasets": {"scraper_4": {"key": ..., "count": ..., ...}, ...}}
+MANIFEST_KEY = "datasets:current"
+
+# Cada corrida escribe en "<scraper_name>_data:staging:<run_id>" y al publicar
+# pasa a la clave inmutable "<scraper_name>_data:v:<run_id>"
+STAGING_TTL_SECONDS = 6 * 3600
+# Lo escrito por una corrida que falló queda en "<scraper_name>_data:partial:<run_id>"
+# (fuera del manifiesto) este tiempo, para revisarlo o reaprovecharlo
+PARTIAL_TTL_SECONDS = 24 * 3600
+# Tiempo que dejamos vivas las versiones viejas para lectores en curso
+OLD_VERSION_GRACE_SECONDS = 120
+
+# Feed de cambios por dataset (Redis Stream): altas, bajas y cambios por
+# record_key entre una versión publicada y la anterior
+CHANGES_KEY = "{scraper_name}_data:changes"
+# Cierre de cada versión en el feed (LIST de {"id", "entries"}) y última
+# entrada recortada: los consumidores detectan si se perdieron entradas
+CHANGES_MARKS_KEY = "{scraper_name}_data:changes:marks"
+CHANGES_TRIMMED_KEY = "{scraper_name}_data:changes:trimmed"
+
+# Cliente fijo para todo el proceso (pruebas de carga, fakeredis); None = el real
+_CLIENT_OVERRIDE = None
+
+
+def use_redis_client(client):
+    """
+    Hace que get_redis_client() devuelva siempre este cliente (por ejemplo,
+    un fakeredis en pruebas). use_redis_client(None) vuelve al real.
+    """
+    global _CLIENT_OVERRIDE
+    _CLIENT_OVERRIDE = client
+
 
 def get_redis_client():
     """Devuelve un cliente de Redis listo para usar."""
+    if _CLIENT_OVERRIDE is not None:
+        return _CLIENT_OVERRIDE
 
     # 👉 Si tenemos REDIS_URL (Upstash), usamos eso
     if config.REDIS_URL:
@@ -25,42 +65,125 @@ def get_redis_client():
     )
 
 
-def store_data_in_redis(scraper_name, data, client=None):
+def record_key(record):
     """
-    Guarda datos en Redis con formato:
+    Identidad estable de un registro entre corridas:
+    URN para ofertas, URL para eventos y, si no hay, un hash del contenido.
+    """
+    for field in ("urn", "url"):
+        if record.get(field):
+            return record[field]
+    raw = json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
 
-    clave:  "<scraper_name}_data"
-    valor:  {
-        "timestamp": "...",
-        "data": [...]
-    }
+def store_data_in_redis(scraper_name, data, client=None):
     """
+    Publica un dataset completo como nueva versión inmutable
+    ("<scraper_name>_data:v:<run_id>") y mueve el puntero del manifiesto.
+    Devuelve la clave de la versión publicada.
+    """
+    stream = DatasetStream(scraper_name, client=client)
+    stream.write(data)
+    return stream.commit()
+
+
+def _load_items(client, items_key):
+    return [json.loads(raw) for raw in client.lrange(items_key, 0, -1)]
+
+
+def get_manifest(client=None):
+    """Lee el manifiesto de versiones (un GET pequeño)."""
     if client is None:
         client = get_redis_client()
 
-    payload = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "data": data,
-    }
-    key = f"{scraper_name}_data"
-    client.set(key, json.dumps(payload, ensure_ascii=False))
-    return key
+    raw = client.get(MANIFEST_KEY)
+    if not raw:
+        return {"version": 0, "datasets": {}}
+    return json.loads(raw)
 
 
-def load_data_from_redis(scraper_name, client=None):
+def get_data_version(client=None):
+    """Versión global de los datos: cambia cada vez que se publica cualquier dataset."""
+    return get_manifest(client)["version"]
+
+
+def load_datasets(scraper_names, client=None):
     """
-    Carga y devuelve la lista de datos para un scraper (o [] si no hay nada).
+    Carga varios datasets de la MISMA versión del manifiesto.
+    Devuelve (version, {scraper_name: [...]}).
     """
     if client is None:
         client = get_redis_client()
 
-    key = f"{scraper_name}_data"
-    raw = client.get(key)
+    # Dos intentos: si justo se recolectó una versión vieja entre el GET del
+    # manifiesto y la lectura, el segundo intento ya ve el manifiesto nuevo
+    for _ in range(2):
+        manifest = get_manifest(client)
+        entries = {name: manifest["datasets"].get(name) for name in scraper_names}
+
+        pipe = client.pipeline(transaction=False)
+        for entry in entries.values():
+            if entry:
+                pipe.lrange(entry["key"], 0, -1)
+        results = iter(pipe.execute())
+
+        datasets = {}
+        complete = True
+        for name, entry in entries.items():
+            if not entry:
+                datasets[name] = _load_legacy_data(name, client)
+                continue
+            raw_items = next(results)
+            if entry.get("count") and not raw_items:
+                complete = False
+            datasets[name] = [json.loads(raw) for raw in raw_items]
+
+        if complete:
+            return manifest["version"], datasets
+
+    return manifest["version"], datasets
+
+
+# Caché en memoria del proceso: {tuple(scraper_names): (version, datasets)}
+_DATASET_CACHE = {}
+
+
+def load_datasets_cached(scraper_names, client=None):
+    """
+    Igual que load_datasets, pero reutiliza lo ya cargado mientras la versión
+    del manifiesto no cambie: normalmente cuesta un solo GET.
+    Lee del backend configurado en DATA_BACKEND (ver get_read_backend).
+    """
+    backend = get_read_backend(client)
+
+    names = tuple(scraper_names)
+    version = backend.get_data_version()
+    cached = _DATASET_CACHE.get(names)
+    if cached and version and cached[0] == version:
+        return cached
+
+    loaded = backend.load_datasets(names)
+    _DATASET_CACHE[names] = loaded
+    return loaded
+
+
+def read_data_version(client=None):
+    """Versión de datos según el backend de lectura configurado."""
+    return get_read_backend(client).get_data_version()
+
+
+def _load_legacy_data(scraper_name, client):
+    """Formatos anteriores al manifiesto: blob {"data": [...]} o {"items_key": ...}."""
+    raw = client.get(f"{scraper_name}_data")
     if not raw:
         return []
 
     try:
         obj = json.loads(raw)
+        # si el formato es {"timestamp": ..., "items_key": "..."}
+        if isinstance(obj, dict) and "items_key" in obj:
+            return _load_items(client, obj["items_key"]) if obj["items_key"] else []
         # si el formato es {"timestamp": ..., "data": [...]}
         if isinstance(obj, dict) and "data" in obj:
             return obj["data"]
@@ -71,3 +194,634 @@ def load_data_from_redis(scraper_name, client=None):
         pass
 
     return []
+
+
+def load_data_from_redis(scraper_name, client=None):
+    """
+    Carga y devuelve la lista de datos para un scraper (o [] si no hay nada).
+    """
+    _, datasets = load_datasets([scraper_name], client=client)
+    return datasets[scraper_name]
+
+
+def iter_dataset_chunks(scraper_name, client=None, chunk_size=500):
+    """
+    Recorre la versión vigente de un dataset por trozos (listas de registros),
+    sin cargarla entera en memoria.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    entry = get_manifest(client)["datasets"].get(scraper_name)
+    if not entry:
+        legacy = _load_legacy_data(scraper_name, client)
+        for start in range(0, len(legacy), chunk_size):
+            yield legacy[start:start + chunk_size]
+        return
+
+    chunk = []
+    for raw in _iter_raw_items(client, entry["key"], chunk_size):
+        chunk.append(json.loads(raw))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class DatasetStream:
+    """
+    Escritura incremental de un dataset en Redis.
+
+    - write() manda cada lote (por ejemplo, una página de resultados) a una lista
+      de staging usando un pipeline, así lo ya descargado queda a salvo en Redis.
+    - Los lectores siguen viendo la versión anterior hasta que commit() renombra
+      la lista a su clave de versión inmutable y mueve el puntero del
+      manifiesto, todo en una transacción (WATCH + MULTI/EXEC).
+
+    key_func identifica cada registro: si un registro se vuelve a escribir,
+    reemplaza al anterior (LSET) en lugar de duplicarse.
+    """
+
+    def __init__(self, scraper_name, client=None, key_func=None, batch_size=100):
+        self.scraper_name = scraper_name
+        self.client = client if client is not None else get_redis_client()
+        self.key_func = key_func
+        self.batch_size = batch_size
+        self.run_id = datetime.now().strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        self.staging_key = f"{scraper_name}_data:staging:{self.run_id}"
+        self.version_key = f"{scraper_name}_data:v:{self.run_id}"
+        self.count = 0
+        self._positions = {}
+
+    def write(self, records):
+        """Escribe (o reemplaza) un lote de registros en la lista de staging."""
+        pipe = self.client.pipeline(transaction=False)
+        pending = 0
+        for record in records:
+            value = json.dumps(record, ensure_ascii=False)
+            record_key = self.key_func(record) if self.key_func else None
+
+            if record_key is not None and record_key in self._positions:
+                pipe.lset(self.staging_key, self._positions[record_key], value)
+            else:
+                pipe.rpush(self.staging_key, value)
+                if record_key is not None:
+                    self._positions[record_key] = self.count
+                self.count += 1
+
+            pending += 1
+            if pending >= self.batch_size:
+                pipe.execute()
+                pending = 0
+
+        pipe.expire(self.staging_key, STAGING_TTL_SECONDS)
+        pipe.execute()
+
+    def commit(self):
+        """Publica atómicamente lo escrito como la versión vigente del dataset."""
+        entry = {
+            "key": self.version_key,
+            "count": self.count,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        versions_key = f"{self.scraper_name}_data:versions"
+        published = {}
+
+        def publish(pipe):
+            manifest = pipe.get(MANIFEST_KEY)
+            manifest = json.loads(manifest) if manifest else {"version": 0, "datasets": {}}
+            manifest["version"] += 1
+            published["previous_key"] = (manifest["datasets"].get(self.scraper_name) or {}).get("key")
+            manifest["datasets"][self.scraper_name] = entry
+            published["version"] = manifest["version"]
+
+            pipe.multi()
+            if self.count:
+                pipe.rename(self.staging_key, self.version_key)
+                pipe.persist(self.version_key)
+            pipe.lpush(versions_key, self.version_key)
+            pipe.set(MANIFEST_KEY, json.dumps(manifest, ensure_ascii=False))
+
+        self.client.transaction(publish, MANIFEST_KEY)
+        # Antes de recolectar: el diff puede necesitar leer la versión anterior
+        publish_changes(
+            self.scraper_name,
+            published["previous_key"],
+            self.version_key,
+            published["version"],
+            client=self.client,
+        )
+        collect_old_versions(self.scraper_name, client=self.client)
+
+        # Copias en los demás backends (por ejemplo, el snapshot local)
+        for backend in get_publish_backends(self.client):
+            if not isinstance(backend, RedisBackend):
+                backend.publish(
+                    self.scraper_name,
+                    self.run_id,
+                    _iter_raw_items(self.client, self.version_key),
+                    published["version"],
+                    entry,
+                )
+        return self.version_key
+
+    def abort(self):
+        """Descarta lo escrito sin tocar la versión vigente."""
+        self.client.delete(self.staging_key)
+
+    def park(self):
+        """
+        Guarda lo escrito por una corrida que no terminó en
+        "<scraper_name>_data:partial:<run_id>" (con vencimiento) y lo anota en
+        "<scraper_name>_data:last_partial". No toca el manifiesto: los
+        lectores siguen viendo la última versión completa.
+        Devuelve la clave donde quedó (None si no había nada escrito).
+        """
+        if not self.count:
+            self.abort()
+            return None
+
+        partial_key = f"{self.scraper_name}_data:partial:{self.run_id}"
+        info = {
+            "key": partial_key,
+            "count": self.count,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rename(self.staging_key, partial_key)
+        pipe.expire(partial_key, PARTIAL_TTL_SECONDS)
+        pipe.set(f"{self.scraper_name}_data:last_partial", json.dumps(info), ex=PARTIAL_TTL_SECONDS)
+        pipe.execute()
+        return partial_key
+
+
+def collect_old_versions(scraper_name, client=None, keep=None):
+    """
+    Recolecta versiones viejas de un dataset: conserva las `keep` más recientes
+    y deja expirar el resto tras un periodo de gracia (lectores en curso).
+    """
+    if client is None:
+        client = get_redis_client()
+    if keep is None:
+        keep = config.DATASET_VERSIONS_TO_KEEP
+
+    versions_key = f"{scraper_name}_data:versions"
+    old_versions = client.lrange(versions_key, keep, -1)
+    if not old_versions:
+        return []
+
+    pipe = client.pipeline(transaction=False)
+    for version_key in old_versions:
+        pipe.expire(version_key, OLD_VERSION_GRACE_SECONDS)
+        pipe.expire(_digests_key(version_key), OLD_VERSION_GRACE_SECONDS)
+    pipe.ltrim(versions_key, 0, keep - 1)
+    pipe.execute()
+    return old_versions
+
+
+# Campos de contenido que entran en el digest de un registro (ofertas y
+# eventos). Lo que cambia entre corridas sin que cambie el registro
+# (tiempo_relativo, consultas, logo firmado, tracking del enlace, raw de la
+# API) queda fuera: no genera "updated" en el feed de cambios.
+DIGEST_FIELDS = (
+    "puesto", "empresa", "lugar", "fecha_creacion", "detalle",
+    "title", "start", "city", "description", "sources",
+)
+
+
+def record_digest(record):
+    """Digest del contenido de un registro (solo DIGEST_FIELDS)."""
+    content = {field: record[field] for field in DIGEST_FIELDS if field in record}
+    if isinstance(content.get("empresa"), dict):
+        content["empresa"] = content["empresa"].get("nombre")
+    raw = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _digests_key(version_key):
+    """HASH record_key → digest del registro, de una versión publicada."""
+    return f"{version_key}:digests"
+
+
+def _version_digests(client, version_key):
+    """({record_key: digest}, {record_key: posición}) de una versión, por trozos."""
+    digests = {}
+    positions = {}
+    for position, raw in enumerate(_iter_raw_items(client, version_key)):
+        record = json.loads(raw)
+        key = record_key(record)
+        digests[key] = record_digest(record)
+        positions[key] = position
+    return digests, positions
+
+
+def publish_changes(scraper_name, previous_key, version_key, version, client=None):
+    """
+    Compara la versión publicada con la anterior (por record_key: URN de la
+    oferta, URL del evento) y agrega al stream "<scraper_name>_data:changes":
+
+    - {"op": "added" | "updated", "key", "version", "ref", "pos"}: el registro
+      está en la lista ref (la versión nueva), en la posición pos.
+    - {"op": "removed", "key", "version"}
+    - {"op": "version", "version", "ref", "added", "updated", "removed"}: cierre.
+
+    Guarda los digests de la versión nueva para que el próximo diff no tenga
+    que releer esta lista. Después se recorta el stream por versiones
+    enteras (ver _trim_change_feed).
+    Devuelve los conteos por operación.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    new_digests, positions = _version_digests(client, version_key)
+    old_digests = {}
+    if previous_key:
+        old_digests = client.hgetall(_digests_key(previous_key))
+        if not old_digests:
+            # Versión publicada antes de que existieran los digests
+            old_digests, _ = _version_digests(client, previous_key)
+
+    stream_key = CHANGES_KEY.format(scraper_name=scraper_name)
+    counts = {"added": 0, "updated": 0, "removed": 0}
+    pipe = client.pipeline(transaction=False)
+    pending = 0
+
+    def emit(fields):
+        nonlocal pending
+        pipe.xadd(stream_key, fields)
+        pending += 1
+        if pending >= 500:
+            pipe.execute()
+            pending = 0
+
+    for key, digest in new_digests.items():
+        old = old_digests.get(key)
+        if old == digest:
+            continue
+        op = "updated" if old else "added"
+        counts[op] += 1
+        emit({"op": op, "key": key, "version": version, "ref": version_key, "pos": positions[key]})
+
+    for key in old_digests:
+        if key not in new_digests:
+            counts["removed"] += 1
+            emit({"op": "removed", "key": key, "version": version})
+
+    if new_digests:
+        pipe.hset(_digests_key(version_key), mapping=new_digests)
+    pipe.execute()
+
+    marker_id = client.xadd(stream_key, {"op": "version", "version": version, "ref": version_key, **counts})
+    _trim_change_feed(client, scraper_name, marker_id, sum(counts.values()) + 1)
+    return counts
+
+
+def _trim_change_feed(client, scraper_name, marker_id, entries):
+    """
+    Recorta el feed a CHANGE_FEED_MAXLEN entradas, por versiones enteras y
+    sin tocar nunca la recién publicada (aunque sola pase del límite: así
+    ningún grupo pierde una publicación grande antes de leerla).
+    Guarda el id de la última entrada recortada en CHANGES_TRIMMED_KEY.
+    """
+    stream_key = CHANGES_KEY.format(scraper_name=scraper_name)
+    marks_key = CHANGES_MARKS_KEY.format(scraper_name=scraper_name)
+
+    client.rpush(marks_key, json.dumps({"id": marker_id, "entries": entries}))
+    marks = [json.loads(raw) for raw in client.lrange(marks_key, 0, -1)]
+    total = sum(mark["entries"] for mark in marks)
+    drop = 0
+    while drop < len(marks) - 1 and total > config.CHANGE_FEED_MAXLEN:
+        total -= marks[drop]["entries"]
+        drop += 1
+    if not drop:
+        return
+
+    last_trimmed = marks[drop - 1]["id"]
+    ms, seq = last_trimmed.split("-")
+    pipe = client.pipeline(transaction=False)
+    # MINID borra todo lo anterior al primer id posible tras el cierre
+    pipe.xtrim(stream_key, minid=f"{ms}-{int(seq) + 1}", approximate=False)
+    pipe.set(CHANGES_TRIMMED_KEY.format(scraper_name=scraper_name), last_trimmed)
+    pipe.ltrim(marks_key, drop, -1)
+    pipe.execute()
+
+
+def _iter_raw_items(client, key, chunk_size=500):
+    """Recorre una lista de Redis por trozos (sin traerla entera a memoria)."""
+    start = 0
+    while True:
+        chunk = client.lrange(key, start, start + chunk_size - 1)
+        if not chunk:
+            return
+        yield from chunk
+        start += chunk_size
+
+
+# --------------------------------------
+# Backends de almacenamiento de datasets
+# --------------------------------------
+class DatasetBackend:
+    """
+    Interfaz común de los backends de datasets publicados.
+
+    - publish(): guarda una versión publicada (registros como JSON crudo).
+    - get_data_version(): versión vigente (barato: para decidir si refrescar cachés).
+    - load_datasets(): (version, {scraper_name: [...]}) de una misma versión.
+    - load_slice(): registros [start, stop) de un dataset, sin cargarlo entero.
+    - publish_artifact() / load_artifact_field(): artefactos derivados de una
+      versión (campos de texto), por ejemplo el contexto del Copilot.
+    """
+
+    def publish(self, scraper_name, run_id, raw_records, version, entry):
+        raise NotImplementedError
+
+    def get_data_version(self):
+        raise NotImplementedError
+
+    def load_datasets(self, scraper_names):
+        raise NotImplementedError
+
+    def load_slice(self, scraper_name, start, stop):
+        raise NotImplementedError
+
+    def publish_artifact(self, name, version, fields, ttl=None):
+        raise NotImplementedError
+
+    def load_artifact_field(self, name, version, field):
+        raise NotImplementedError
+
+
+class RedisBackend(DatasetBackend):
+    """Redis (Upstash u otro): fuente de verdad de las publicaciones."""
+
+    def __init__(self, client=None):
+        self.client = client if client is not None else get_redis_client()
+
+    def publish(self, scraper_name, run_id, raw_records, version, entry):
+        # En Redis la publicación la hace DatasetStream.commit()
+        pass
+
+    def get_data_version(self):
+        return get_data_version(self.client)
+
+    def load_datasets(self, scraper_names):
+        return load_datasets(scraper_names, self.client)
+
+    def load_slice(self, scraper_name, start, stop):
+        entry = get_manifest(self.client)["datasets"].get(scraper_name)
+        if not entry or stop <= start:
+            return []
+        return [json.loads(raw) for raw in self.client.lrange(entry["key"], start, stop - 1)]
+
+    def publish_artifact(self, name, version, fields, ttl=None):
+        # HASH "<name>:v:<versión>" (ej. "context:v:12")
+        key = f"{name}:v:{version}"
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping=fields)
+        if ttl:
+            pipe.expire(key, ttl)
+        pipe.execute()
+
+    def load_artifact_field(self, name, version, field):
+        return self.client.hget(f"{name}:v:{version}", field)
+
+
+class LocalSnapshotBackend(DatasetBackend):
+    """
+    Copia local de cada versión publicada, para leer sin pasar por la red.
+
+    Por dataset, en "<base_dir>/<scraper_name>/":
+    - "<run_id>.jsonl": un registro por línea, escrito una sola vez en modo append.
+    - "<run_id>.idx": offsets (uint64) de inicio de cada registro + el final.
+    - "CURRENT": versión vigente, reemplazada atómicamente (os.replace).
+
+    No hay manifiesto compartido: cada publicador reemplaza solo el CURRENT
+    de su dataset, así dos scrapers que publican a la vez no se pisan. La
+    versión local es la mayor de los CURRENT (la versión global de Redis).
+    Los lectores abren el .jsonl con mmap y, con el índice de offsets,
+    decodifican solo los registros que necesitan.
+    """
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir or config.LOCAL_SNAPSHOT_DIR
+
+    def _dataset_dir(self, scraper_name):
+        return os.path.join(self.base_dir, scraper_name)
+
+    def _write_json_atomic(self, path, obj):
+        tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:6]}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, scraper_name, run_id, raw_records, version, entry):
+        dataset_dir = self._dataset_dir(scraper_name)
+        os.makedirs(dataset_dir, exist_ok=True)
+
+        offsets = array("Q", [0])
+        with open(os.path.join(dataset_dir, f"{run_id}.jsonl"), "ab") as f:
+            for raw in raw_records:
+                line = raw.encode("utf-8") + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+            f.flush()
+            os.fsync(f.fileno())
+        with open(os.path.join(dataset_dir, f"{run_id}.idx"), "wb") as f:
+            offsets.tofile(f)
+
+        self._write_json_atomic(
+            os.path.join(dataset_dir, "CURRENT"),
+            {"run_id": run_id, "version": version, **entry},
+        )
+
+        self._collect_old_files(dataset_dir, run_id)
+
+    def _collect_old_files(self, dataset_dir, current_run_id):
+        # Más recientes primero (por fecha de escritura del índice)
+        run_ids = sorted(
+            (name[:-len(".idx")] for name in os.listdir(dataset_dir) if name.endswith(".idx")),
+            key=lambda run_id: os.path.getmtime(os.path.join(dataset_dir, run_id + ".idx")),
+            reverse=True,
+        )
+        for run_id in run_ids[config.DATASET_VERSIONS_TO_KEEP:]:
+            if run_id == current_run_id:
+                continue
+            for ext in (".jsonl", ".idx"):
+                try:
+                    os.remove(os.path.join(dataset_dir, run_id + ext))
+                except OSError:
+                    # En Windows no se puede borrar si un lector lo tiene abierto
+                    pass
+
+    def get_data_version(self):
+        try:
+            names = os.listdir(self.base_dir)
+        except OSError:
+            return 0
+        versions = [0]
+        for name in names:
+            current = self._read_json(os.path.join(self._dataset_dir(name), "CURRENT"))
+            if current:
+                versions.append(current["version"])
+        return max(versions)
+
+    def _artifact_path(self, name):
+        return os.path.join(self.base_dir, "artifacts", f"{name}.json")
+
+    def publish_artifact(self, name, version, fields, ttl=None):
+        # Solo la última versión de cada artefacto: se reemplaza atómicamente
+        os.makedirs(os.path.dirname(self._artifact_path(name)), exist_ok=True)
+        self._write_json_atomic(self._artifact_path(name), {"version": version, "fields": fields})
+
+    def load_artifact_field(self, name, version, field):
+        artifact = self._read_json(self._artifact_path(name))
+        if not artifact or artifact.get("version") != version:
+            return None
+        return artifact["fields"].get(field)
+
+    def _open(self, scraper_name):
+        """Devuelve (offsets, mmap|None) de la versión vigente, o None si no hay."""
+        dataset_dir = self._dataset_dir(scraper_name)
+        current = self._read_json(os.path.join(dataset_dir, "CURRENT"))
+        if not current:
+            return None
+
+        offsets = array("Q")
+        with open(os.path.join(dataset_dir, f"{current['run_id']}.idx"), "rb") as f:
+            offsets.frombytes(f.read())
+        if offsets[-1] == 0:
+            return offsets, None
+
+        with open(os.path.join(dataset_dir, f"{current['run_id']}.jsonl"), "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return offsets, data
+
+    def _read(self, scraper_name, start=0, stop=None):
+        """Registros [start, stop) de la versión vigente (stop=None: hasta el final)."""
+        opened = self._open(scraper_name)
+        if opened is None:
+            return None
+        offsets, data = opened
+        if data is None:
+            return []
+        try:
+            count = len(offsets) - 1
+            stop = count if stop is None else min(stop, count)
+            return [
+                json.loads(data[offsets[i]:offsets[i + 1]])
+                for i in range(max(start, 0), stop)
+            ]
+        finally:
+            data.close()
+
+    def load_slice(self, scraper_name, start, stop):
+        return self._read(scraper_name, start, stop)
+
+    def load_datasets(self, scraper_names):
+        version = self.get_data_version()
+        datasets = {}
+        for name in scraper_names:
+            records = self._read(name)
+            if records is None:
+                return version, None
+            datasets[name] = records
+        return version, datasets
+
+
+class FallbackBackend(DatasetBackend):
+    """
+    Lee del backend primario (la copia local) mientras esté en la misma
+    versión que el secundario (Redis, la fuente de verdad); si está atrasado,
+    le falta algo o falla, lee del secundario. Si el secundario no responde,
+    el primario es lo mejor que hay.
+    """
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+
+    def _fallback_version(self):
+        try:
+            return self.fallback.get_data_version()
+        except Exception:
+            return None
+
+    def _primary_is_current(self):
+        version = self._fallback_version()
+        if version is None:
+            return True
+        try:
+            return self.primary.get_data_version() == version
+        except Exception:
+            return False
+
+    def get_data_version(self):
+        version = self._fallback_version()
+        if version is None:
+            return self.primary.get_data_version()
+        return version
+
+    def load_datasets(self, scraper_names):
+        if self._primary_is_current():
+            try:
+                version, datasets = self.primary.load_datasets(scraper_names)
+                if datasets is not None:
+                    return version, datasets
+            except Exception:
+                pass
+        return self.fallback.load_datasets(scraper_names)
+
+    def load_slice(self, scraper_name, start, stop):
+        if self._primary_is_current():
+            try:
+                records = self.primary.load_slice(scraper_name, start, stop)
+                if records is not None:
+                    return records
+            except Exception:
+                pass
+        return self.fallback.load_slice(scraper_name, start, stop)
+
+    def load_artifact_field(self, name, version, field):
+        try:
+            value = self.primary.load_artifact_field(name, version, field)
+            if value is not None:
+                return value
+        except Exception:
+            pass
+        return self.fallback.load_artifact_field(name, version, field)
+
+    def publish(self, scraper_name, run_id, raw_records, version, entry):
+        raise NotImplementedError("FallbackBackend solo se usa para leer")
+
+
+def get_read_backend(client=None):
+    """
+    Backend de lectura según config.DATA_BACKEND:
+    - "redis": Redis directo.
+    - "local": snapshot local (mmap) con Redis como respaldo.
+    """
+    redis_backend = RedisBackend(client)
+    if config.DATA_BACKEND == "local":
+        return FallbackBackend(LocalSnapshotBackend(), redis_backend)
+    return redis_backend
+
+
+def get_publish_backends(client=None):
+    """Backends donde publican los scrapers (config.PUBLISH_BACKENDS, ej. "redis,local")."""
+    backends = []
+    for name in config.PUBLISH_BACKENDS.split(","):
+        name = name.strip()
+        if name == "redis":
+            backends.append(RedisBackend(client))
+        elif name == "local":
+            backends.append(LocalSnapshotBackend())
+    return backends
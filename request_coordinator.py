@@ -0,0 +1,145 @@
+# request_coordinator.py
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+import config
+from question_router import normalize_question
+
+
+class FairSemaphore:
+    """
+    Semáforo con cola FIFO: los turnos entran en el orden en que llegaron
+    (nadie se salta la cola) y se puede consultar la posición de cada uno.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._active = 0
+
+    def acquire(self, ticket) -> None:
+        with self._cond:
+            self._queue.append(ticket)
+            while self._queue[0] is not ticket or self._active >= self.limit:
+                self._cond.wait()
+            self._queue.popleft()
+            self._active += 1
+            self._cond.notify_all()
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def position(self, ticket) -> Optional[int]:
+        """Personas delante en la cola (0 = es el siguiente), o None si ya no espera."""
+        with self._cond:
+            try:
+                return self._queue.index(ticket)
+            except ValueError:
+                return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"activas": self._active, "en_cola": len(self._queue), "limite": self.limit}
+
+
+class RequestHandle:
+    """Turno de una llamada al modelo: se puede esperar y consultar su posición."""
+
+    def __init__(self, coordinator: "RequestCoordinator", key: Optional[str]):
+        self.key = key
+        self.future: Future = Future()
+        self.shared = False
+        self._coordinator = coordinator
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None):
+        return self.future.result(timeout)
+
+    def queue_position(self) -> Optional[int]:
+        return self._coordinator.semaphore.position(self)
+
+
+class RequestCoordinator:
+    """
+    Coordinador de llamadas al modelo compartido por todas las sesiones
+    de Streamlit del proceso:
+
+    - single-flight: pedidos idénticos en vuelo (misma clave) comparten una
+      sola llamada y reciben el mismo resultado (o el mismo error).
+    - concurrencia acotada: como mucho max_concurrent llamadas a la vez,
+      el resto espera en una cola justa (FIFO).
+    """
+
+    def __init__(self, max_concurrent: int):
+        self.semaphore = FairSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, RequestHandle] = {}
+        self.stats = {"llamadas": 0, "compartidas": 0}
+
+    def submit(self, key: Optional[str], func: Callable[[], object]) -> RequestHandle:
+        """
+        Encola func. Si key no es None y ya hay un pedido igual en vuelo,
+        devuelve ese mismo turno en lugar de hacer otra llamada.
+        """
+        with self._lock:
+            if key is not None and key in self._inflight:
+                handle = self._inflight[key]
+                handle.shared = True
+                self.stats["compartidas"] += 1
+                return handle
+
+            handle = RequestHandle(self, key)
+            if key is not None:
+                self._inflight[key] = handle
+            self.stats["llamadas"] += 1
+
+        threading.Thread(target=self._run, args=(handle, func), daemon=True).start()
+        return handle
+
+    def _run(self, handle: RequestHandle, func: Callable[[], object]) -> None:
+        self.semaphore.acquire(handle)
+        try:
+            handle.future.set_result(func())
+        except BaseException as e:
+            handle.future.set_exception(e)
+        finally:
+            self.semaphore.release()
+            with self._lock:
+                if handle.key is not None and self._inflight.get(handle.key) is handle:
+                    del self._inflight[handle.key]
+
+
+def request_key(
+    question: Optional[str],
+    data_version,
+    history: Optional[List[Dict[str, str]]] = None,
+) -> Optional[str]:
+    """
+    Clave de single-flight: pregunta normalizada + versión de datos.
+    Con historial previo la respuesta depende de la conversación: no se comparte.
+    """
+    if history or not question:
+        return None
+    normalized = " ".join(normalize_question(question).split())
+    return hashlib.sha1(f"{data_version}|{normalized}".encode("utf-8")).hexdigest()
+
+
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+
+def get_coordinator() -> RequestCoordinator:
+    """Coordinador único del proceso (compartido entre sesiones)."""
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is None:
+            _coordinator = RequestCoordinator(config.GEMINI_MAX_CONCURRENT_CALLS)
+        return _coordinator
@@ -1,16 +1,54 @@
 # scraper.py
 import json
 import re
-from datetime import datetime
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
 
 import requests
 from bs4 import BeautifulSoup
 from unidecode import unidecode
 
 import config
-from redis_utils import get_redis_client, store_data_in_redis
+from context_artifacts import materialize_context
+from daily_report import refresh_after_publish
+from change_feed import sync_search_index
+from redis_utils import DatasetStream, get_redis_client, iter_dataset_chunks
+from snapshots import record_snapshot_chunks
 
 LI_JOB_URL = "https://www.linkedin.com/jobs/search/"
+PAGE_SIZE = 25  # 25 resultados por página en LinkedIn
+# Endpoint público con el detalle (descripción + criterios) de una oferta
+LI_JOB_DETAIL_URL = "https://www.linkedin.com/jobs-guest/jobs/api/jobPosting/{job_id}"
+
+# Clave en Redis donde cacheamos el detalle de cada oferta: "job_detail:<id>"
+JOB_DETAIL_KEY_PREFIX = "job_detail:"
+# Recortamos la descripción para no inflar Redis ni el prompt
+MAX_DESCRIPTION_CHARS = 1500
+
+# Criterios de la página de detalle (en español o inglés) → campo normalizado
+JOB_CRITERIA_FIELDS = {
+    "nivel de antiguedad": "nivel",
+    "seniority level": "nivel",
+    "tipo de empleo": "tipo_empleo",
+    "employment type": "tipo_empleo",
+    "funcion laboral": "funcion",
+    "job function": "funcion",
+    "sectores": "sectores",
+    "industries": "sectores",
+}
+
+# Vocabulario de habilidades que buscamos en la descripción
+HABILIDADES_CONOCIDAS = [
+    "excel", "sql", "python", "power bi", "tableau", "java", "javascript",
+    "typescript", "react", "node", "aws", "azure", "gcp", "docker", "kubernetes",
+    "sap", "git", "scrum", "agile", "machine learning", "estadistica",
+    "ingles", "portugues", "comunicacion", "liderazgo", "trabajo en equipo",
+    "negociacion", "atencion al cliente", "ventas", "marketing digital",
+    "contabilidad", "finanzas", "logistica", "autocad", "office",
+]
 
 # User-Agent básico para evitar bloqueos rápidos (no es garantía, pero ayuda)
 HEADERS = {
@@ -22,126 +60,355 @@ HEADERS = {
     "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
 }
 
+# Límite compartido de peticiones simultáneas a LinkedIn (búsqueda + detalle)
+_HTTP_SLOTS = threading.BoundedSemaphore(config.LINKEDIN_MAX_CONCURRENCY)
+
 
 def transform_obj_to_params(obj):
     """Función equivalente a la que usabas en el notebook (ya no es imprescindible)."""
     return "&".join([f"{key}={value}" for key, value in obj.items()])
 
 
-def get_linkedin_jobs(keywords="", experience_levels="1,2,3,4,5", max_pages=5):
+def parse_job_card(job, today):
     """
-    Recupera trabajos publicados HOY en LinkedIn (Perú) usando scraping.
-    Devuelve una lista de diccionarios.
+    Normaliza una tarjeta (<li>) del listado de LinkedIn.
+    Devuelve None si no es una oferta válida o no se publicó HOY.
     """
+    div = job.select_one("div")
+    if not div or "data-entity-urn" not in div.attrs:
+        return None
+
+    # Fecha de publicación
+    fecha_creacion_elem = job.select_one(".job-search-card__listdate")
+    fecha_creacion = None
+    if (
+        fecha_creacion_elem
+        and "datetime" in getattr(fecha_creacion_elem, "attrs", {})
+    ):
+        try:
+            fecha_creacion = fecha_creacion_elem["datetime"]
+            fecha_publicacion = datetime.fromisoformat(
+                fecha_creacion
+            ).date()
+            # Filtramos solo los trabajos de HOY
+            if fecha_publicacion != today:
+                return None
+        except Exception:
+            pass
+
+    empresa_elem = job.select_one(".hidden-nested-link")
+    empresa_nombre = (
+        empresa_elem.get_text(strip=True) if empresa_elem else "Confidential"
+    )
+
+    puesto_elem = job.select_one("h3")
+    puesto = (
+        re.sub(r"\s+", " ", unidecode(puesto_elem.get_text()))
+        if puesto_elem
+        else ""
+    ).strip()
+
+    location_elem = job.select_one(".job-search-card__location")
+    lugar = (
+        re.sub(r"\s+", " ", unidecode(location_elem.get_text()))
+        if location_elem
+        else ""
+    ).strip()
+
+    tiempo_relativo = (
+        re.sub(
+            r"\s+",
+            " ",
+            unidecode(fecha_creacion_elem.get_text()),
+        ).strip()
+        if fecha_creacion_elem
+        else None
+    )
+
+    # Logo
+    logo_elem = job.select_one(".search-entity-media img")
+    logo_url = None
+    if logo_elem is not None:
+        if "data-delayed-url" in logo_elem.attrs:
+            logo_url = logo_elem["data-delayed-url"]
+        elif "src" in logo_elem.attrs:
+            logo_url = logo_elem["src"]
+
+    job_link_elem = job.select_one("a")
+    enlace = job_link_elem["href"] if job_link_elem and "href" in job_link_elem.attrs else ""
+
+    # Normalizamos la info en un dict
+    return {
+        "urn": div["data-entity-urn"],
+        "id": div["data-entity-urn"].split(":")[-1],
+        "puesto": puesto,
+        "enlace": enlace,
+        "lugar": lugar,
+        "fecha_creacion": fecha_creacion,
+        "tiempo_relativo": tiempo_relativo,
+        "empresa": {
+            "logo": logo_url,
+            "enlace_empresa": (
+                empresa_elem["href"].split("?")[0]
+                if empresa_elem and "href" in empresa_elem.attrs
+                else None
+            ),
+            "nombre": empresa_nombre,
+        },
+    }
+
+
+def parse_jobs_page(html, today):
+    """Parsea una página del listado y devuelve los trabajos de HOY."""
+    soup = BeautifulSoup(html, "html.parser")
+    jobs_data = []
+    for job in soup.select(".jobs-search__results-list li"):
+        job_data = parse_job_card(job, today)
+        if job_data is not None:
+            jobs_data.append(job_data)
+    return jobs_data
+
 
+def _http_get(url, **kwargs):
+    """requests.get limitado por el semáforo global de concurrencia."""
+    with _HTTP_SLOTS:
+        return requests.get(url, headers=HEADERS, **kwargs)
+
+
+def fetch_search_page(query, page):
+    """
+    Descarga una página del listado para una consulta de la matriz.
+    Devuelve el HTML o None si LinkedIn bloquea o falla.
+    """
     params = {
-        "keywords": keywords,
-        "f_E": experience_levels,
-        "geoId": config.LINKEDIN_GEO_ID_PERU,
+        "keywords": query["keywords"],
+        "f_E": query["experience_levels"],
+        "geoId": query["geo_id"],
         "f_TPR": "r86400",  # últimas 24h
+        "start": page * PAGE_SIZE,
     }
+    try:
+        resp = _http_get(LI_JOB_URL, params=params, timeout=15)
+    except requests.RequestException:
+        return None
 
-    jobs_data = []
-    today = datetime.now().date()
+    if resp.status_code != 200:
+        return None
+    return resp.text
+
+
+def _is_last_page(html):
+    """
+    Chequeo barato (sin parsear): si la página ya no trae tarjetas,
+    no hay más resultados y no pedimos las siguientes.
+    """
+    return "data-entity-urn" not in html
 
-    for page in range(max_pages):
-        params["start"] = page * 25  # 25 resultados por página en LinkedIn
-        resp = requests.get(LI_JOB_URL, params=params, headers=HEADERS, timeout=15)
 
-        if resp.status_code != 200:
+def get_linkedin_jobs(
+    keywords="", experience_levels="1,2,3,4,5", max_pages=5, geo_id=None
+):
+    """
+    Recupera trabajos publicados HOY en LinkedIn (Perú) usando scraping.
+    Devuelve una lista de diccionarios.
+    """
+    query = {
+        "keywords": keywords,
+        "experience_levels": experience_levels,
+        "geo_id": geo_id or config.LINKEDIN_GEO_ID_PERU,
+    }
+
+    return _scrape_query(query, max_pages, datetime.now().date())
+
+
+# --------------------------------------
+# Matriz de consultas (keywords × geo × experiencia)
+# --------------------------------------
+def build_query_matrix(keyword_sets=None, geo_ids=None, experience_filters=None):
+    """
+    Devuelve la lista de consultas a ejecutar. Por defecto lee la matriz de config:
+
+    - LINKEDIN_KEYWORD_SETS: "data analyst;desarrollador;ventas" ("" = sin filtro)
+    - LINKEDIN_GEO_IDS: "peru:102927786,lima:<geoId>"
+    - LINKEDIN_EXPERIENCE_FILTERS: "1,2;3,4;5"
+    """
+    if keyword_sets is None:
+        keyword_sets = [k.strip() for k in config.LINKEDIN_KEYWORD_SETS.split(";")]
+    if geo_ids is None:
+        geo_ids = []
+        for item in config.LINKEDIN_GEO_IDS.split(","):
+            if not item.strip():
+                continue
+            name, _, geo_id = item.strip().rpartition(":")
+            geo_ids.append((name or geo_id, geo_id))
+    if experience_filters is None:
+        experience_filters = [
+            f.strip() for f in config.LINKEDIN_EXPERIENCE_FILTERS.split(";") if f.strip()
+        ]
+
+    queries = []
+    for keywords in dict.fromkeys(keyword_sets):
+        for geo_name, geo_id in geo_ids:
+            for experience_levels in experience_filters:
+                queries.append(
+                    {
+                        "label": f"{keywords or '*'}|{geo_name}|{experience_levels}",
+                        "keywords": keywords,
+                        "geo_id": geo_id,
+                        "experience_levels": experience_levels,
+                    }
+                )
+    return queries
+
+
+def _scrape_query(query, max_pages, today):
+    """Recorre las páginas de una consulta, parando en la última página."""
+    jobs_data = []
+    for page in range(max_pages):
+        html = fetch_search_page(query, page)
+        if html is None:
             # si LinkedIn bloquea o falla, pasamos a la siguiente página
             continue
+        jobs_data += parse_jobs_page(html, today)
+        if _is_last_page(html):
+            break
+    return jobs_data
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        jobs = soup.select(".jobs-search__results-list li")
 
-        for job in jobs:
-            div = job.select_one("div")
-            if not div or "data-entity-urn" not in div.attrs:
-                continue
+def merge_query_results(merged, label, jobs_data):
+    """
+    Deduplica por URN entre consultas: cada trabajo queda una sola vez
+    con la lista "consultas" de todas las consultas que lo encontraron.
+    """
+    for job in jobs_data:
+        existing = merged.get(job["urn"])
+        if existing is None:
+            job["consultas"] = [label]
+            merged[job["urn"]] = job
+        elif label not in existing["consultas"]:
+            existing["consultas"].append(label)
+    return merged
+
+
+# --------------------------------------
+# Pipeline: fetch (hilos) → parse (procesos)
+# --------------------------------------
+def _parse_page_worker(html, today_iso):
+    """Worker del ProcessPoolExecutor: recibe HTML crudo y devuelve trabajos compactos."""
+    return parse_jobs_page(html, date.fromisoformat(today_iso))
+
+
+def _put_or_stop(html_queue, item, stop):
+    """put() bloqueante (backpressure) que se rinde si el consumidor se detuvo."""
+    while not stop.is_set():
+        try:
+            html_queue.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def iter_parsed_pages(queries, max_pages=None, parser_workers=None, queue_size=None):
+    """
+    Genera (label_consulta, trabajos) por cada página descargada.
+
+    - Los fetchers (hilos, limitados por _HTTP_SLOTS) dejan el HTML crudo en una
+      cola acotada: si el parseo va atrasado, los fetchers esperan.
+    - Con parser_workers > 0 el parseo (CPU, BeautifulSoup) corre en un
+      ProcessPoolExecutor con como mucho queue_size páginas en vuelo; una
+      página que falla al parsear se salta y el resto sigue.
+      Con parser_workers = 0 se parsea en el hilo actual.
+    """
+    if max_pages is None:
+        max_pages = config.LINKEDIN_MAX_PAGES
+    if parser_workers is None:
+        parser_workers = config.LINKEDIN_PARSER_WORKERS
+    if queue_size is None:
+        queue_size = config.LINKEDIN_PIPELINE_QUEUE_SIZE
 
-            # Fecha de publicación
-            fecha_creacion_elem = job.select_one(".job-search-card__listdate")
-            fecha_creacion = None
-            if (
-                fecha_creacion_elem
-                and "datetime" in getattr(fecha_creacion_elem, "attrs", {})
+    today = datetime.now().date()
+    html_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def fetch_query(query):
+        try:
+            for page in range(max_pages):
+                if stop.is_set():
+                    return
+                html = fetch_search_page(query, page)
+                if html is None:
+                    # si LinkedIn bloquea o falla, pasamos a la siguiente página
+                    continue
+                _put_or_stop(html_queue, (query["label"], html), stop)
+                if _is_last_page(html):
+                    break
+        finally:
+            # None marca que esta consulta terminó
+            _put_or_stop(html_queue, (query["label"], None), stop)
+
+    fetchers = ThreadPoolExecutor(max_workers=config.LINKEDIN_MAX_CONCURRENCY)
+    parsers = ProcessPoolExecutor(max_workers=parser_workers) if parser_workers else None
+    pending = deque()
+
+    try:
+        fetch_futures = [fetchers.submit(fetch_query, q) for q in queries]
+        remaining = len(queries)
+
+        while remaining or pending:
+            while pending and (
+                not remaining or len(pending) >= queue_size or pending[0][1].done()
             ):
+                label, future = pending.popleft()
                 try:
-                    fecha_creacion = fecha_creacion_elem["datetime"]
-                    fecha_publicacion = datetime.fromisoformat(
-                        fecha_creacion
-                    ).date()
-                    # Filtramos solo los trabajos de HOY
-                    if fecha_publicacion != today:
-                        continue
-                except Exception:
-                    pass
-
-            empresa_elem = job.select_one(".hidden-nested-link")
-            empresa_nombre = (
-                empresa_elem.get_text(strip=True) if empresa_elem else "Confidential"
-            )
+                    jobs_data = future.result()
+                except Exception as e:
+                    # Una página que no se pudo parsear no tumba la corrida
+                    print(f"⚠️ No se pudo parsear una página de '{label}': {e}")
+                    continue
+                yield label, jobs_data
+
+            if not remaining:
+                continue
 
-            puesto_elem = job.select_one("h3")
-            puesto = (
-                re.sub(r"\s+", " ", unidecode(puesto_elem.get_text()))
-                if puesto_elem
-                else ""
-            ).strip()
-
-            location_elem = job.select_one(".job-search-card__location")
-            lugar = (
-                re.sub(r"\s+", " ", unidecode(location_elem.get_text()))
-                if location_elem
-                else ""
-            ).strip()
-
-            tiempo_relativo = (
-                re.sub(
-                    r"\s+",
-                    " ",
-                    unidecode(fecha_creacion_elem.get_text()),
-                ).strip()
-                if fecha_creacion_elem
-                else None
-            )
+            label, html = html_queue.get()
+            if html is None:
+                remaining -= 1
+            elif parsers is None:
+                yield label, parse_jobs_page(html, today)
+            else:
+                pending.append(
+                    (label, parsers.submit(_parse_page_worker, html, today.isoformat()))
+                )
+
+        # Propaga errores inesperados de los fetchers
+        for future in fetch_futures:
+            future.result()
+    finally:
+        stop.set()
+        fetchers.shutdown(wait=True, cancel_futures=True)
+        if parsers is not None:
+            parsers.shutdown(wait=True, cancel_futures=True)
+
+
+def run_query_matrix(queries=None, max_pages=None, parser_workers=None):
+    """
+    Ejecuta toda la matriz de consultas como un solo job.
 
-            # Logo
-            logo_elem = job.select_one(".search-entity-media img")
-            logo_url = None
-            if logo_elem is not None:
-                if "data-delayed-url" in logo_elem.attrs:
-                    logo_url = logo_elem["data-delayed-url"]
-                elif "src" in logo_elem.attrs:
-                    logo_url = logo_elem["src"]
-
-            job_link_elem = job.select_one("a")
-            enlace = job_link_elem["href"] if job_link_elem and "href" in job_link_elem.attrs else ""
-
-            # Normalizamos la info en un dict
-            job_data = {
-                "urn": div["data-entity-urn"],
-                "id": div["data-entity-urn"].split(":")[-1],
-                "puesto": puesto,
-                "enlace": enlace,
-                "lugar": lugar,
-                "fecha_creacion": fecha_creacion,
-                "tiempo_relativo": tiempo_relativo,
-                "empresa": {
-                    "logo": logo_url,
-                    "enlace_empresa": (
-                        empresa_elem["href"].split("?")[0]
-                        if empresa_elem and "href" in empresa_elem.attrs
-                        else None
-                    ),
-                    "nombre": empresa_nombre,
-                },
-            }
+    Las consultas corren en paralelo, pero todas las peticiones HTTP
+    (listados y detalles) comparten el mismo límite _HTTP_SLOTS.
+    Con parser_workers > 0 (o LINKEDIN_PARSER_WORKERS) el parseo
+    se reparte entre procesos.
+    """
+    if queries is None:
+        queries = build_query_matrix()
 
-            jobs_data.append(job_data)
+    merged = {}
+    for label, jobs_data in iter_parsed_pages(
+        queries, max_pages=max_pages, parser_workers=parser_workers
+    ):
+        merge_query_results(merged, label, jobs_data)
 
-    return jobs_data
+    return list(merged.values())
 
 
 def get_job_urls(jobs_data):
@@ -149,22 +416,195 @@ def get_job_urls(jobs_data):
     return [job["enlace"] for job in jobs_data if job.get("enlace")]
 
 
+# --------------------------------------
+# Enriquecimiento: detalle de cada oferta
+# --------------------------------------
+def _clean_text(text):
+    return re.sub(r"\s+", " ", unidecode(text or "")).strip()
+
+
+def extract_skills(text):
+    """Devuelve las habilidades de HABILIDADES_CONOCIDAS que aparecen en el texto."""
+    normalized = _clean_text(text).lower()
+    return [
+        skill
+        for skill in HABILIDADES_CONOCIDAS
+        if re.search(rf"(?<![a-z0-9]){re.escape(skill)}(?![a-z0-9])", normalized)
+    ]
+
+
+def parse_job_detail(html):
+    """
+    Extrae de la página de detalle: descripción, nivel, tipo de empleo,
+    función, sectores y habilidades detectadas.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    description_elem = soup.select_one(".show-more-less-html__markup") or soup.select_one(
+        ".description__text"
+    )
+    descripcion = _clean_text(description_elem.get_text(" ")) if description_elem else ""
+
+    detalle = {
+        "descripcion": descripcion[:MAX_DESCRIPTION_CHARS],
+        "nivel": None,
+        "tipo_empleo": None,
+        "funcion": None,
+        "sectores": None,
+        "habilidades": extract_skills(descripcion),
+    }
+
+    for item in soup.select(".description__job-criteria-item"):
+        header = item.select_one(".description__job-criteria-subheader")
+        value = item.select_one(".description__job-criteria-text")
+        if not header or not value:
+            continue
+        field = JOB_CRITERIA_FIELDS.get(_clean_text(header.get_text()).lower())
+        if field:
+            detalle[field] = _clean_text(value.get_text())
+
+    return detalle
+
+
+def fetch_job_detail(job_id):
+    """
+    Descarga y parsea el detalle de una oferta.
+
+    Devuelve el dict de detalle, {} si la oferta ya no existe (404)
+    o None si hubo un fallo temporal (para reintentar en la próxima corrida).
+    """
+    try:
+        resp = _http_get(LI_JOB_DETAIL_URL.format(job_id=job_id), timeout=15)
+    except requests.RequestException:
+        return None
+
+    if resp.status_code == 404:
+        return {}
+    if resp.status_code != 200:
+        return None
+
+    return parse_job_detail(resp.text)
+
+
+def enrich_jobs(jobs_data, client=None, max_workers=None):
+    """
+    Añade a cada trabajo la clave "detalle" con la info de su página de detalle.
+
+    - El detalle se cachea en Redis por id ("job_detail:<id>") con un TTL largo,
+      así cada oferta se descarga una sola vez aunque aparezca en muchas corridas.
+    - Solo se descargan (en paralelo, con un pool acotado) los que faltan en caché.
+    """
+    if client is None:
+        client = get_redis_client()
+    if max_workers is None:
+        max_workers = config.JOB_DETAIL_MAX_WORKERS
+
+    job_ids = sorted({job["id"] for job in jobs_data if job.get("id")})
+    if not job_ids:
+        return jobs_data
+
+    cached = client.mget([f"{JOB_DETAIL_KEY_PREFIX}{job_id}" for job_id in job_ids])
+    details = {}
+    for job_id, raw in zip(job_ids, cached):
+        if raw is not None:
+            try:
+                details[job_id] = json.loads(raw)
+            except json.JSONDecodeError:
+                pass
+
+    missing = [job_id for job_id in job_ids if job_id not in details]
+    if missing:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            fetched = list(zip(missing, pool.map(fetch_job_detail, missing)))
+
+        pipe = client.pipeline(transaction=False)
+        for job_id, detalle in fetched:
+            if detalle is None:
+                continue
+            details[job_id] = detalle
+            pipe.set(
+                f"{JOB_DETAIL_KEY_PREFIX}{job_id}",
+                json.dumps(detalle, ensure_ascii=False),
+                ex=config.JOB_DETAIL_CACHE_TTL,
+            )
+        pipe.execute()
+
+    for job in jobs_data:
+        detalle = details.get(job.get("id"))
+        if detalle:
+            job["detalle"] = detalle
+
+    return jobs_data
+
+
+# --------------------------------------
+# Ingesta en streaming: fetch → parse → normalize → sink
+# --------------------------------------
+def iter_normalized_pages(pages, client):
+    """
+    Normaliza cada página: deduplica por URN entre consultas (guardando solo
+    URN → consultas en memoria) y añade el detalle de cada oferta.
+    """
+    consultas_por_urn = {}
+    for label, jobs_data in pages:
+        for job in jobs_data:
+            consultas = consultas_por_urn.setdefault(job["urn"], [])
+            if label not in consultas:
+                consultas.append(label)
+            job["consultas"] = list(consultas)
+        yield enrich_jobs(jobs_data, client=client)
+
+
+def stream_jobs_to_redis(scraper_name="scraper_4", queries=None, client=None):
+    """
+    Ejecuta la matriz de consultas y escribe cada página en Redis según llega.
+
+    La memoria pico es de una página; si la corrida falla a mitad (o se
+    interrumpe), lo ya escrito queda guardado aparte (DatasetStream.park) y
+    la versión vigente sigue siendo la última corrida completa.
+    El índice de búsqueda se pone al día recién después de publicar, con el
+    feed de cambios: los lectores nunca ven ofertas de una corrida sin publicar.
+    Devuelve (clave, total_trabajos).
+    """
+    if client is None:
+        client = get_redis_client()
+    if queries is None:
+        queries = build_query_matrix()
+
+    stream = DatasetStream(scraper_name, client=client, key_func=lambda job: job["urn"])
+    pages = iter_normalized_pages(iter_parsed_pages(queries), client)
+
+    try:
+        for jobs_data in pages:
+            stream.write(jobs_data)
+    except BaseException:
+        partial_key = stream.park()
+        if partial_key:
+            print(f"⚠️ Corrida incompleta: {stream.count} ofertas guardadas en '{partial_key}' (sin publicar).")
+        raise
+
+    key = stream.commit()
+    sync_search_index(client)
+    return key, stream.count
+
+
 def main():
     client = get_redis_client()
-    jobs_data = get_linkedin_jobs(keywords="", max_pages=5)
+    queries = build_query_matrix()
 
-    # misma clave que en tu notebook: "scraper_4_data"
-    key = store_data_in_redis("scraper_4", jobs_data, client=client)
+    # Se publica como "scraper_4_data:v:<run_id>", detrás del manifiesto "datasets:current"
+    key, total = stream_jobs_to_redis("scraper_4", queries=queries, client=client)
 
-    print(f"Datos guardados en Redis con la clave '{key}'")
-    print(f"Total de trabajos encontrados hoy: {len(jobs_data)}\n")
+    # Snapshot del día para el histórico (tendencias), leyendo lo publicado por trozos
+    record_snapshot_chunks("scraper_4", iter_dataset_chunks("scraper_4", client), client=client)
 
-    print("Ejemplo (primeros 3 trabajos):")
-    print(json.dumps(jobs_data[:3], indent=2, ensure_ascii=False))
+    # DATA listo para el Copilot (una sola vez por publicación)
+    materialize_context(client=client)
+    refresh_after_publish(client=client)
 
-    print("\nURLs de los trabajos encontrados hoy:")
-    for url in get_job_urls(jobs_data):
-        print(url)
+    print(f"Datos guardados en Redis con la clave '{key}'")
+    print(f"Consultas ejecutadas: {len(queries)}")
+    print(f"Total de trabajos encontrados hoy (sin duplicados): {total}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,289 @@
+# search_index.py
+import hashlib
+import json
+import re
+from datetime import datetime
+
+from unidecode import unidecode
+
+from redis_utils import get_redis_client
+
+# Claves del índice invertido de ofertas
+INDEX_PREFIX = "jobs_idx"
+TERM_KEY = INDEX_PREFIX + ":t:{term}"          # SET de ids que contienen el término
+# Los términos por campo son "<campo>:<término>" (→ "jobs_idx:t:empresa:lima"):
+# cada filtro de campo se cruza solo con su campo
+DOC_TERMS_KEY = INDEX_PREFIX + ":terms:{id}"   # SET de términos de un id (para actualizar/borrar)
+DOCS_KEY = INDEX_PREFIX + ":doc"               # HASH id → oferta compacta (JSON)
+BY_DATE_KEY = INDEX_PREFIX + ":by_date"        # ZSET id → fecha de publicación (epoch)
+GENERATION_KEY = INDEX_PREFIX + ":gen"         # contador: cambia con cada actualización
+SCHEMA_KEY = INDEX_PREFIX + ":schema"          # versión del formato del índice
+
+# Sube cuando cambian los términos que se indexan: un índice de otra versión
+# no se usa (los lectores van al dataset) hasta que sync_search_index lo reconstruye
+INDEX_SCHEMA = "2"
+
+# Campos con términos propios. "clave" es la palabra clave de search_jobs:
+# aparece en el puesto o en las habilidades
+SEARCH_FIELDS = ("puesto", "empresa", "lugar", "habilidades", "clave")
+
+# Resultados de una consulta se cachean en Redis unos segundos (para paginar)
+QUERY_CACHE_SECONDS = 60
+
+STOPWORDS = {
+    "de", "del", "la", "el", "los", "las", "y", "en", "con", "para", "por",
+    "a", "al", "o", "e", "un", "una", "the", "and", "of", "for", "sa", "sac", "srl",
+}
+INDEXED_VOWELS = "aeo"
+
+
+def stem(token):
+    """
+    Stemmer ligero para español: quita el plural y la vocal final, así
+    "analistas"/"analista", "ingeniero"/"ingeniera" o "datos"/"data" coinciden.
+    """
+    if len(token) > 4 and token.endswith("es") and token[-3] not in "aeiou":
+        token = token[:-2]
+    elif len(token) > 3 and token.endswith("s"):
+        token = token[:-1]
+    if len(token) > 3 and token[-1] in INDEXED_VOWELS:
+        token = token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Tokens normalizados (sin tildes, minúsculas, sin stopwords, con stem)."""
+    words = re.split(r"[^a-z0-9+#]+", unidecode(text or "").lower())
+    return {stem(w) for w in words if len(w) > 1 and w not in STOPWORDS}
+
+
+def compact_job(job):
+    """Versión compacta de una oferta (lo que devuelven las búsquedas)."""
+    detalle = job.get("detalle") or {}
+    return {
+        "id": job.get("id"),
+        "puesto": job.get("puesto"),
+        "empresa": (job.get("empresa") or {}).get("nombre"),
+        "lugar": job.get("lugar"),
+        "fecha_creacion": job.get("fecha_creacion"),
+        "nivel": detalle.get("nivel"),
+        "habilidades": detalle.get("habilidades") or [],
+        "enlace": job.get("enlace"),
+    }
+
+
+def job_field_terms(job):
+    """Términos de cada campo de búsqueda de una oferta."""
+    detalle = job.get("detalle") or {}
+    terms = {
+        "puesto": tokenize(job.get("puesto")),
+        "empresa": tokenize((job.get("empresa") or {}).get("nombre")),
+        "lugar": tokenize(job.get("lugar")),
+        "habilidades": tokenize(" ".join(detalle.get("habilidades") or [])),
+    }
+    terms["clave"] = terms["puesto"] | terms["habilidades"]
+    return terms
+
+
+def job_terms(job):
+    """Términos sueltos (búsqueda libre) más los términos por campo."""
+    by_field = job_field_terms(job)
+    terms = by_field["puesto"] | by_field["empresa"] | by_field["lugar"] | by_field["habilidades"]
+    for field, field_terms in by_field.items():
+        terms |= {f"{field}:{term}" for term in field_terms}
+    return terms
+
+
+def _job_score(job):
+    # Sin fecha va al final (como en el respaldo de explorer.query_jobs)
+    try:
+        return datetime.fromisoformat(job["fecha_creacion"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0
+
+
+def _day_start(day):
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+def index_jobs(jobs, client=None):
+    """
+    Agrega o actualiza ofertas en el índice. Solo toca los términos que
+    cambiaron, así que se puede llamar por cada página que llega.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    jobs = [job for job in jobs if job.get("id")]
+    if not jobs:
+        return 0
+
+    read = client.pipeline(transaction=False)
+    for job in jobs:
+        read.smembers(DOC_TERMS_KEY.format(id=job["id"]))
+    previous_terms = read.execute()
+
+    pipe = client.pipeline(transaction=False)
+    for job, old_terms in zip(jobs, previous_terms):
+        job_id = job["id"]
+        new_terms = job_terms(job)
+        for term in set(old_terms) - new_terms:
+            pipe.srem(TERM_KEY.format(term=term), job_id)
+        for term in new_terms - set(old_terms):
+            pipe.sadd(TERM_KEY.format(term=term), job_id)
+
+        terms_key = DOC_TERMS_KEY.format(id=job_id)
+        pipe.delete(terms_key)
+        if new_terms:
+            pipe.sadd(terms_key, *new_terms)
+        pipe.hset(DOCS_KEY, job_id, json.dumps(compact_job(job), ensure_ascii=False))
+        pipe.zadd(BY_DATE_KEY, {job_id: _job_score(job)})
+    pipe.incr(GENERATION_KEY)
+    pipe.execute()
+    return len(jobs)
+
+
+def remove_jobs(job_ids, client=None):
+    """Quita ofertas del índice (por ejemplo, las que ya no aparecen)."""
+    if client is None:
+        client = get_redis_client()
+
+    job_ids = list(job_ids)
+    if not job_ids:
+        return 0
+
+    read = client.pipeline(transaction=False)
+    for job_id in job_ids:
+        read.smembers(DOC_TERMS_KEY.format(id=job_id))
+    all_terms = read.execute()
+
+    pipe = client.pipeline(transaction=False)
+    for job_id, terms in zip(job_ids, all_terms):
+        for term in terms:
+            pipe.srem(TERM_KEY.format(term=term), job_id)
+        pipe.delete(DOC_TERMS_KEY.format(id=job_id))
+        pipe.hdel(DOCS_KEY, job_id)
+        pipe.zrem(BY_DATE_KEY, job_id)
+    pipe.incr(GENERATION_KEY)
+    pipe.execute()
+    return len(job_ids)
+
+
+def prune_index(keep_ids, client=None):
+    """Quita del índice todo id que no esté en keep_ids (las ofertas vigentes)."""
+    if client is None:
+        client = get_redis_client()
+
+    keep_ids = set(keep_ids)
+    stale = [job_id for job_id in client.zrange(BY_DATE_KEY, 0, -1) if job_id not in keep_ids]
+    return remove_jobs(stale, client=client)
+
+
+def apply_job_changes(upserts, removed_keys, client=None):
+    """
+    Aplica un lote del feed de cambios: indexa las ofertas nuevas o
+    cambiadas y quita las borradas (record_key = URN, el id es su final).
+    """
+    if client is None:
+        client = get_redis_client()
+
+    index_jobs(upserts, client=client)
+    remove_jobs([key.split(":")[-1] for key in removed_keys], client=client)
+    return len(upserts) + len(removed_keys)
+
+
+def index_size(client=None):
+    if client is None:
+        client = get_redis_client()
+    return client.zcard(BY_DATE_KEY)
+
+
+def index_ready(client=None):
+    """True si hay índice y es del formato vigente (INDEX_SCHEMA)."""
+    if client is None:
+        client = get_redis_client()
+    pipe = client.pipeline(transaction=False)
+    pipe.zcard(BY_DATE_KEY)
+    pipe.get(SCHEMA_KEY)
+    size, schema = pipe.execute()
+    return bool(size) and schema == INDEX_SCHEMA
+
+
+def mark_schema(client=None):
+    """Marca el índice como del formato vigente (después de reconstruirlo)."""
+    if client is None:
+        client = get_redis_client()
+    client.set(SCHEMA_KEY, INDEX_SCHEMA)
+
+
+def search(
+    query="",
+    mode="and",
+    offset=0,
+    limit=20,
+    client=None,
+    min_date=None,
+    max_date=None,
+    fields=None,
+):
+    """
+    Busca ofertas en el índice, del lado del servidor.
+
+    - mode "and": todas las palabras (intersección de sets)
+    - mode "or": cualquiera (unión de sets)
+    - fields: {campo: texto} (ver SEARCH_FIELDS); cada palabra tiene que
+      estar en ese campo, siempre en modo "and"
+
+    El resultado se cruza con el ZSET por fecha, así sale ordenado (más reciente
+    primero) y paginado, y queda cacheado unos segundos para pedir otras páginas.
+    min_date / max_date (date, inclusive) filtran por fecha de publicación.
+    Devuelve {"total": n, "ofertas": [...]}.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    terms = sorted(tokenize(query))
+    field_terms = sorted(
+        f"{field}:{term}"
+        for field, text in (fields or {}).items()
+        if text
+        for term in tokenize(text)
+    )
+    if not terms and not field_terms:
+        result_key = BY_DATE_KEY
+    else:
+        generation = client.get(GENERATION_KEY) or "0"
+        signature = f"{generation}|{mode}|{' '.join(terms)}|{' '.join(field_terms)}"
+        result_key = f"{INDEX_PREFIX}:q:{hashlib.sha1(signature.encode('utf-8')).hexdigest()}"
+
+        if not client.exists(result_key):
+            term_keys = [TERM_KEY.format(term=term) for term in terms]
+            # Los sets valen 0 en la suma: queda el puntaje (fecha) del ZSET
+            weights = {BY_DATE_KEY: 1, **{TERM_KEY.format(term=term): 0 for term in field_terms}}
+            pipe = client.pipeline(transaction=False)
+            union_key = None
+            if mode == "or" and term_keys:
+                union_key = result_key + ":u"
+                pipe.sunionstore(union_key, term_keys)
+                weights[union_key] = 0
+            else:
+                weights.update({k: 0 for k in term_keys})
+            pipe.zinterstore(result_key, weights)
+            if union_key:
+                pipe.delete(union_key)
+            pipe.expire(result_key, QUERY_CACHE_SECONDS)
+            pipe.execute()
+
+    low = _day_start(min_date) if min_date else "-inf"
+    high = _day_start(max_date) + 86400 - 1 if max_date else "+inf"
+
+    pipe = client.pipeline(transaction=False)
+    pipe.zcount(result_key, low, high)
+    pipe.zrevrangebyscore(result_key, high, low, start=offset, num=limit)
+    total, ids = pipe.execute()
+
+    docs = client.hmget(DOCS_KEY, ids) if ids else []
+    return {
+        "total": total,
+        "ofertas": [json.loads(doc) for doc in docs if doc],
+    }
@@ -0,0 +1,406 @@
+# snapshots.py
+import base64
+import hashlib
+import json
+import re
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from unidecode import unidecode
+
+import config
+from redis_utils import get_redis_client, record_key
+
+# Palabras que no cuentan como término del puesto
+TITLE_STOPWORDS = {
+    "de", "del", "la", "el", "los", "las", "y", "en", "con", "para", "por",
+    "a", "al", "o", "e", "the", "and", "of", "for", "sr", "jr",
+}
+TOP_N = 10
+TOP_TERMS = 100
+
+
+def _history_key(scraper_name):
+    """Hash fecha → snapshot comprimido (completo o delta contra el día anterior)."""
+    return f"{scraper_name}_data:history"
+
+
+def _aggregates_key(scraper_name):
+    """Hash fecha → agregados del día (JSON pequeño)."""
+    return f"{scraper_name}_data:aggregates"
+
+
+def _terms_key(scraper_name):
+    """Hash fecha → conteo completo de términos del puesto (comprimido)."""
+    return f"{scraper_name}_data:terms"
+
+
+def _digests_key(scraper_name):
+    """Hash fecha → {record_key: digest} del snapshot (comprimido), para el delta siguiente."""
+    return f"{scraper_name}_data:history:digests"
+
+
+def _pack(obj):
+    raw = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(zlib.compress(raw, 9)).decode("ascii")
+
+
+class _PackWriter:
+    """
+    Igual que _pack, pero el JSON se comprime a medida que se escribe:
+    en memoria solo queda el resultado comprimido.
+    """
+
+    def __init__(self):
+        self._zlib = zlib.compressobj(9)
+        self._parts = []
+        self._items = 0
+
+    def raw(self, text):
+        self._parts.append(self._zlib.compress(text.encode("utf-8")))
+
+    def item(self, obj):
+        """Agrega un elemento a la lista JSON abierta."""
+        separator = "," if self._items else ""
+        self.raw(separator + json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+        self._items += 1
+
+    def close(self):
+        self._parts.append(self._zlib.flush())
+        return base64.b64encode(b"".join(self._parts)).decode("ascii")
+
+
+def _digest(record):
+    raw = json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def _unpack(value):
+    return json.loads(zlib.decompress(base64.b64decode(value)).decode("utf-8"))
+
+
+def _title_terms(title):
+    text = re.sub(r"[^a-z0-9 ]+", " ", unidecode(title or "").lower())
+    return [t for t in text.split() if len(t) > 1 and t not in TITLE_STOPWORDS]
+
+
+class AggregatesBuilder:
+    """
+    Agregados diarios de un dataset, acumulados por lotes.
+
+    - Ofertas: total, empresas, lugares, términos del puesto, habilidades y nivel.
+    - Eventos: total, ciudades y fuentes.
+
+    En los agregados van los TOP_TERMS términos más comunes; el conteo
+    completo queda en .terminos (se guarda aparte, para term_trend).
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.is_jobs = False
+        self.empresas = Counter()
+        self.lugares = Counter()
+        self.terminos = Counter()
+        self.habilidades = Counter()
+        self.niveles = Counter()
+        self.ciudades = Counter()
+        self.fuentes = Counter()
+
+    def add(self, records):
+        for record in records:
+            self.total += 1
+            if "puesto" in record:
+                self.is_jobs = True
+            self.empresas[(record.get("empresa") or {}).get("nombre") or ""] += 1
+            self.lugares[record.get("lugar") or ""] += 1
+            # Cada término cuenta una vez por oferta
+            self.terminos.update(set(_title_terms(record.get("puesto"))))
+            detalle = record.get("detalle") or {}
+            self.habilidades.update(detalle.get("habilidades") or [])
+            if detalle.get("nivel"):
+                self.niveles[detalle["nivel"]] += 1
+            self.ciudades[record.get("city") or ""] += 1
+            self.fuentes.update(record.get("sources") or [record.get("source") or ""])
+
+    def result(self):
+        aggregates = {"total": self.total}
+        if not self.total:
+            return aggregates
+
+        if self.is_jobs:
+            aggregates.update(
+                {
+                    "empresas": dict(self.empresas.most_common(TOP_N)),
+                    "lugares": dict(self.lugares.most_common(TOP_N)),
+                    "terminos_puesto": dict(self.terminos.most_common(TOP_TERMS)),
+                    "habilidades": dict(self.habilidades.most_common(TOP_N * 2)),
+                    "niveles": dict(self.niveles),
+                }
+            )
+        else:
+            aggregates.update(
+                {
+                    "ciudades": dict(self.ciudades.most_common(TOP_N)),
+                    "fuentes": dict(self.fuentes),
+                }
+            )
+        return aggregates
+
+
+def compute_aggregates(data):
+    """Agregados diarios de un dataset (ver AggregatesBuilder)."""
+    builder = AggregatesBuilder()
+    builder.add(data)
+    return builder.result()
+
+
+def load_snapshot(scraper_name, day, client=None):
+    """
+    Reconstruye el dataset de un día aplicando los deltas desde el último
+    snapshot completo. Devuelve [] si no hay snapshot para ese día.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    key = _history_key(scraper_name)
+    chain = []
+    current = day
+    while current:
+        raw = client.hget(key, current)
+        if raw is None:
+            return []
+        entry = _unpack(raw)
+        chain.append(entry)
+        current = entry.get("base") if entry["tipo"] == "delta" else None
+
+    records = {}
+    for entry in reversed(chain):
+        if entry["tipo"] == "full":
+            records = {record_key(r): r for r in entry["records"]}
+            continue
+        for removed in entry["removed"]:
+            records.pop(removed, None)
+        for record in entry["upserts"]:
+            records[record_key(record)] = record
+
+    return list(records.values())
+
+
+def _previous_day(client, scraper_name, day):
+    days = [d for d in client.hkeys(_history_key(scraper_name)) if d < day]
+    return max(days) if days else None
+
+
+def _chain_length(client, scraper_name, day):
+    length = 0
+    while day:
+        raw = client.hget(_history_key(scraper_name), day)
+        if raw is None:
+            break
+        entry = _unpack(raw)
+        if entry["tipo"] == "full":
+            break
+        length += 1
+        day = entry.get("base")
+    return length
+
+
+def _day_digests(client, scraper_name, day):
+    """{record_key: digest} de un día (reconstruido del snapshot si no estaba guardado)."""
+    raw = client.hget(_digests_key(scraper_name), day)
+    if raw is not None:
+        return _unpack(raw)
+    return {record_key(r): _digest(r) for r in load_snapshot(scraper_name, day, client)}
+
+
+def record_snapshot(scraper_name, data, client=None, day=None):
+    """Guarda el snapshot del día de una lista de registros (ver record_snapshot_chunks)."""
+    return record_snapshot_chunks(scraper_name, [data], client=client, day=day)
+
+
+def record_snapshot_chunks(scraper_name, chunks, client=None, day=None):
+    """
+    Guarda el snapshot del día (volver a correr el mismo día lo reemplaza)
+    recorriendo el dataset por lotes: no hace falta tenerlo entero en memoria.
+
+    Se guarda como delta (altas/cambios + bajas) contra el día anterior y, cada
+    SNAPSHOT_FULL_EVERY_DAYS, como snapshot completo para acotar la cadena.
+    El delta se calcula contra los digests del día anterior, no contra sus
+    registros. Los agregados del día (y el conteo completo de términos) van
+    aparte para poder consultar rangos sin descomprimir snapshots.
+    Aplica la retención SNAPSHOT_RETENTION_DAYS.
+    """
+    if client is None:
+        client = get_redis_client()
+    if day is None:
+        day = date.today().isoformat()
+
+    previous_day = _previous_day(client, scraper_name, day)
+    as_delta = bool(previous_day) and _chain_length(client, scraper_name, previous_day) + 1 < (
+        config.SNAPSHOT_FULL_EVERY_DAYS
+    )
+    previous = _day_digests(client, scraper_name, previous_day) if as_delta else {}
+
+    writer = _PackWriter()
+    if as_delta:
+        writer.raw(f'{{"tipo":"delta","base":{json.dumps(previous_day)},"upserts":[')
+    else:
+        writer.raw('{"tipo":"full","records":[')
+
+    builder = AggregatesBuilder()
+    digests = {}
+    for chunk in chunks:
+        builder.add(chunk)
+        for record in chunk:
+            key = record_key(record)
+            digest = _digest(record)
+            digests[key] = digest
+            if not as_delta or previous.get(key) != digest:
+                writer.item(record)
+
+    if as_delta:
+        removed = [k for k in previous if k not in digests]
+        writer.raw(f'],"removed":{json.dumps(removed, ensure_ascii=False)}}}')
+    else:
+        writer.raw("]}")
+
+    pipe = client.pipeline(transaction=True)
+    pipe.hset(_history_key(scraper_name), day, writer.close())
+    pipe.hset(_digests_key(scraper_name), day, _pack(digests))
+    pipe.hset(
+        _aggregates_key(scraper_name),
+        day,
+        json.dumps(builder.result(), ensure_ascii=False),
+    )
+    if builder.is_jobs:
+        pipe.hset(_terms_key(scraper_name), day, _pack(dict(builder.terminos)))
+    pipe.execute()
+
+    prune_snapshots(scraper_name, client=client, today=day)
+    return day
+
+
+def prune_snapshots(scraper_name, client=None, today=None):
+    """
+    Borra los días fuera de la retención. Si el día más antiguo que se conserva
+    es un delta, antes se reescribe como snapshot completo.
+    """
+    if client is None:
+        client = get_redis_client()
+    if today is None:
+        today = date.today().isoformat()
+
+    cutoff = (
+        date.fromisoformat(today) - timedelta(days=config.SNAPSHOT_RETENTION_DAYS)
+    ).isoformat()
+    days = sorted(client.hkeys(_history_key(scraper_name)))
+    expired = [d for d in days if d < cutoff]
+    kept = [d for d in days if d >= cutoff]
+    if not expired:
+        return []
+
+    if kept:
+        oldest = kept[0]
+        entry = _unpack(client.hget(_history_key(scraper_name), oldest))
+        if entry["tipo"] == "delta":
+            records = load_snapshot(scraper_name, oldest, client)
+            client.hset(
+                _history_key(scraper_name),
+                oldest,
+                _pack({"tipo": "full", "records": records}),
+            )
+
+    pipe = client.pipeline(transaction=True)
+    pipe.hdel(_history_key(scraper_name), *expired)
+    pipe.hdel(_aggregates_key(scraper_name), *expired)
+    pipe.hdel(_terms_key(scraper_name), *expired)
+    pipe.hdel(_digests_key(scraper_name), *expired)
+    pipe.execute()
+    return expired
+
+
+def get_daily_aggregates(scraper_name, start_day, end_day=None, client=None):
+    """
+    Agregados por día entre start_day y end_day (inclusive, "YYYY-MM-DD").
+
+    Solo lee el hash de agregados: no carga ni descomprime snapshots.
+    Los días sin corrida no aparecen.
+    """
+    if client is None:
+        client = get_redis_client()
+    if end_day is None:
+        end_day = date.today().isoformat()
+
+    start = date.fromisoformat(start_day)
+    end = date.fromisoformat(end_day)
+    days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    if not days:
+        return []
+
+    result = []
+    for day, raw in zip(days, client.hmget(_aggregates_key(scraper_name), days)):
+        if raw:
+            result.append({"fecha": day, **json.loads(raw)})
+    return result
+
+
+def latest_aggregates(scraper_name, client=None, lookback_days=7):
+    """Agregados del día más reciente con corrida (mirando hasta lookback_days atrás)."""
+    start = (date.today() - timedelta(days=lookback_days)).isoformat()
+    days = get_daily_aggregates(scraper_name, start, client=client)
+    return days[-1] if days else {}
+
+
+def term_trend(term, start_day, end_day=None, scraper_name="scraper_4", client=None):
+    """
+    Ofertas por día cuyo puesto contiene el término (ej. "analista", "data").
+    Devuelve [{"fecha": ..., "ofertas": n, "total": n}].
+
+    Usa el conteo completo de términos de cada día. Los días guardados antes
+    de que existiera solo tienen el top TOP_TERMS: si el término no está ahí,
+    "ofertas" es None (sin dato), no 0.
+    """
+    if client is None:
+        client = get_redis_client()
+
+    terms = _title_terms(term)
+    days = get_daily_aggregates(scraper_name, start_day, end_day, client=client)
+    full_counts = client.hmget(_terms_key(scraper_name), [d["fecha"] for d in days]) if days else []
+
+    trend = []
+    for day, packed in zip(days, full_counts):
+        if packed is not None:
+            counts, complete = _unpack(packed), True
+        else:
+            counts = day.get("terminos_puesto") or {}
+            complete = len(counts) < TOP_TERMS
+
+        values = [counts.get(t) for t in terms]
+        if not complete and any(v is None for v in values):
+            ofertas = None
+        else:
+            # con varios términos, usamos el menos frecuente como cota
+            ofertas = min((v or 0 for v in values), default=0)
+        trend.append({"fecha": day["fecha"], "ofertas": ofertas, "total": day.get("total", 0)})
+    return trend
+
+
+def summarize_history(days=30, client=None):
+    """Resumen compacto de los últimos días para DATA (tendencias)."""
+    start = (datetime.now().date() - timedelta(days=days)).isoformat()
+    jobs = get_daily_aggregates("scraper_4", start, client=client)
+    events = get_daily_aggregates("events_peru", start, client=client)
+    return {
+        "ofertas_por_dia": [
+            {
+                "fecha": d["fecha"],
+                "total": d.get("total", 0),
+                "top_terminos": dict(list((d.get("terminos_puesto") or {}).items())[:5]),
+            }
+            for d in jobs
+        ],
+        "eventos_por_dia": [
+            {"fecha": d["fecha"], "total": d.get("total", 0)} for d in events
+        ],
+    }
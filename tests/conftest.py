@@ -0,0 +1,64 @@
+# tests/conftest.py
+import os
+import sys
+
+import fakeredis
+import pytest
+
+# Los módulos del proyecto viven en la raíz del repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import context_artifacts  # noqa: E402
+import model_guard  # noqa: E402
+import redis_utils  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clean_process_state():
+    """Breakers, métricas y cachés del proceso limpios en cada prueba."""
+    model_guard.reset_guards()
+    redis_utils._DATASET_CACHE.clear()
+    context_artifacts._cache = (None, {})
+    yield
+    model_guard.reset_guards()
+
+
+@pytest.fixture
+def redis_client():
+    """fakeredis en lugar de Redis/Upstash para todo el proceso."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    redis_utils.use_redis_client(client)
+    yield client
+    redis_utils.use_redis_client(None)
+
+
+JOBS = [
+    {
+        "id": "1",
+        "urn": "urn:li:jobPosting:1",
+        "puesto": "Analista de Datos",
+        "empresa": {"nombre": "Interbank"},
+        "lugar": "Lima, Perú",
+        "detalle": {"habilidades": ["SQL", "Python"]},
+    },
+    {
+        "id": "2",
+        "urn": "urn:li:jobPosting:2",
+        "puesto": "Vendedor",
+        "empresa": {"nombre": "Lima Gas"},
+        "lugar": "Arequipa, Perú",
+        "detalle": {"habilidades": ["Ventas"]},
+    },
+]
+
+EVENTS = [
+    {"title": "Meetup de datos", "city": "Lima", "start": "2030-01-02T19:00:00", "url": "https://eventos.example/1"},
+]
+
+
+@pytest.fixture
+def published(redis_client):
+    """Publica JOBS y EVENTS como versión vigente."""
+    redis_utils.store_data_in_redis("scraper_4", JOBS, redis_client)
+    redis_utils.store_data_in_redis("events_peru", EVENTS, redis_client)
+    return redis_client
@@ -0,0 +1,79 @@
+# tests/test_change_feed.py
+import config
+from change_feed import ChangeFeedConsumer, sync_search_index
+from redis_utils import CHANGES_KEY, store_data_in_redis
+from search_index import index_size
+
+
+def _ops(client, scraper_name="scraper_4"):
+    entries = client.xrange(CHANGES_KEY.format(scraper_name=scraper_name))
+    return [(fields["op"], fields.get("key")) for _, fields in entries if fields["op"] != "version"]
+
+
+def _job(urn, puesto="Analista"):
+    return {"urn": urn, "id": urn, "puesto": puesto}
+
+
+def test_volatile_fields_do_not_emit_updates(redis_client):
+    job = {**_job("a"), "tiempo_relativo": "hace 1 dia", "consultas": ["datos|Lima"]}
+    store_data_in_redis("scraper_4", [job], redis_client)
+    store_data_in_redis(
+        "scraper_4", [{**job, "tiempo_relativo": "hace 2 dias", "consultas": ["datos|Peru"]}], redis_client,
+    )
+    assert _ops(redis_client) == [("added", "a")]
+
+    store_data_in_redis("scraper_4", [{**job, "puesto": "Gerente"}], redis_client)
+    assert _ops(redis_client)[-1] == ("updated", "a")
+
+
+def test_large_publish_is_never_trimmed_before_it_is_read(redis_client, monkeypatch):
+    monkeypatch.setattr(config, "CHANGE_FEED_MAXLEN", 5)
+    store_data_in_redis("scraper_4", [_job(f"u{i}") for i in range(20)], redis_client)
+
+    assert len(_ops(redis_client)) == 20
+
+
+def test_consumer_detects_entries_trimmed_before_reading(redis_client, monkeypatch):
+    monkeypatch.setattr(config, "CHANGE_FEED_MAXLEN", 5)
+    reader = ChangeFeedConsumer("scraper_4", "al_dia", client=redis_client)
+    behind = ChangeFeedConsumer("scraper_4", "atrasado", client=redis_client)
+
+    store_data_in_redis("scraper_4", [_job(f"u{i}") for i in range(10)], redis_client)
+    reader.process(lambda upserts, removed: None)
+    store_data_in_redis("scraper_4", [_job("u0", puesto="Gerente")], redis_client)
+
+    # La primera publicación ya se recortó: "atrasado" no la leyó nunca
+    assert redis_client.xlen(CHANGES_KEY.format(scraper_name="scraper_4")) == 11
+    assert behind.missed_entries()
+    assert not reader.missed_entries()
+
+
+def test_sync_rebuilds_index_after_a_gap(redis_client, monkeypatch):
+    monkeypatch.setattr(config, "CHANGE_FEED_MAXLEN", 5)
+    store_data_in_redis("scraper_4", [_job("a"), _job("b")], redis_client)
+    sync_search_index(redis_client)
+
+    for i in range(3):
+        store_data_in_redis("scraper_4", [_job(f"n{i}-{j}") for j in range(6)], redis_client)
+
+    stats = sync_search_index(redis_client)
+    assert stats["recortado"]
+    assert stats["reconstruido"] == 1
+    assert index_size(redis_client) == 6
+
+
+def test_skip_to_latest_acks_all_pending_in_batches(redis_client):
+    store_data_in_redis("scraper_4", [_job(f"u{i}") for i in range(25)], redis_client)
+    stream_key = CHANGES_KEY.format(scraper_name="scraper_4")
+    consumer = ChangeFeedConsumer("scraper_4", "indice", consumer="a", client=redis_client)
+    other = ChangeFeedConsumer("scraper_4", "indice", consumer="b", client=redis_client)
+    consumer.read(count=10)
+    other.read(count=16)
+
+    calls = []
+    xack = redis_client.xack
+    redis_client.xack = lambda *args: calls.append(args) or xack(*args)
+    consumer.skip_to_latest(count=10)
+
+    assert redis_client.xpending(stream_key, "indice")["pending"] == 0
+    assert len(calls) == 3
@@ -0,0 +1,43 @@
+# tests/test_context_artifacts.py
+import json
+
+import pytest
+
+import config
+import context_artifacts
+import redis_utils
+from context_artifacts import SECTION_FULL, get_context_counts, get_context_section, materialize_context
+
+
+class OfflineRedis:
+    """Cliente que falla en cualquier comando: prueba que no se sale a la red."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"se llamó a Redis ({name})")
+
+
+@pytest.fixture
+def local_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "LOCAL_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "PUBLISH_BACKENDS", "redis,local")
+    monkeypatch.setattr(config, "DATA_BACKEND", "local")
+
+
+def test_context_is_read_from_redis_by_default(published):
+    version = materialize_context(published)
+
+    assert version == redis_utils.get_data_version(published)
+    assert get_context_counts() == {"jobs": 2, "events": 1}
+    assert "Analista de Datos" in get_context_section(SECTION_FULL)
+
+
+def test_local_backend_serves_context_without_redis(local_backend, published):
+    # published ya se copió al snapshot local al publicar
+    materialize_context(published)
+    expected = get_context_section(SECTION_FULL)
+
+    redis_utils.use_redis_client(OfflineRedis())
+    context_artifacts._cache = (None, {})
+
+    assert get_context_section(SECTION_FULL) == expected
+    assert json.loads(get_context_section("conteos")) == {"jobs": 2, "events": 1}
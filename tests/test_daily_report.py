@@ -0,0 +1,85 @@
+# tests/test_daily_report.py
+import json
+
+import config
+import daily_report
+from daily_report import REPORT_KEY, answer_question, is_report_request, store_report
+from fake_backends import FakeGeminiModel, FakeResponse
+from redis_utils import get_data_version, load_datasets, store_data_in_redis
+
+REPORT = {
+    "fecha_analisis": "2026-10-19",
+    "resumen_mercado": "Demanda estable de perfiles de datos.",
+    "sectores_con_mayor_demanda": [],
+    "habilidades_mas_pedidas": [],
+    "eventos_relevantes": [],
+    "recomendaciones": [],
+}
+QUESTION = "Dame el análisis en JSON"
+
+
+def _unused_model():
+    def fail(contents, kwargs):
+        raise AssertionError("no debería llamar al modelo")
+    return FakeGeminiModel(fail)
+
+
+def test_first_turn_counts_as_report_request():
+    # Así lo pasa la app: el historial ya trae la pregunta actual
+    assert is_report_request(QUESTION, [{"role": "user", "content": QUESTION}])
+    assert is_report_request(QUESTION)
+
+
+def test_previous_turns_disable_the_stored_report():
+    history = [
+        {"role": "user", "content": "¿Qué ofertas hay en Arequipa?"},
+        {"role": "assistant", "content": "Hay 3 ofertas."},
+        {"role": "user", "content": QUESTION},
+    ]
+    assert not is_report_request(QUESTION, history)
+    assert not is_report_request("Ofertas de python en Arequipa en JSON")
+
+
+def test_first_turn_report_is_served_from_stored_version(published):
+    version = get_data_version(published)
+    store_report(REPORT, version, client=published)
+    assert published.exists(REPORT_KEY.format(version=version))
+
+    answer = answer_question(
+        QUESTION, history=[{"role": "user", "content": QUESTION}], model=_unused_model()
+    )
+
+    assert answer == REPORT
+
+
+def test_missing_report_is_generated_and_stored(published):
+    model = FakeGeminiModel([FakeResponse(json.dumps(REPORT))])
+
+    answer = answer_question(QUESTION, history=[{"role": "user", "content": QUESTION}], model=model)
+
+    assert answer == REPORT
+    stored = published.get(REPORT_KEY.format(version=get_data_version(published)))
+    assert json.loads(stored) == REPORT
+
+
+def test_report_is_generated_once_both_publishers_finish(published, monkeypatch):
+    monkeypatch.setattr(config, "GENERATE_REPORT_ON_PUBLISH", True)
+    _, datasets = load_datasets(["scraper_4", "events_peru"], published)
+    versions = []
+    monkeypatch.setattr(
+        daily_report, "generate_daily_report",
+        lambda client=None: versions.append(get_data_version(client)) or REPORT,
+    )
+
+    daily_report.refresh_after_publish(client=published)
+    assert versions == [get_data_version(published)]
+
+    # Nuevo ciclo: publica el scraper de ofertas, falta el de eventos
+    store_data_in_redis("scraper_4", datasets["scraper_4"], published)
+    daily_report.refresh_after_publish(client=published)
+    assert len(versions) == 1
+
+    store_data_in_redis("events_peru", datasets["events_peru"], published)
+    daily_report.refresh_after_publish(client=published)
+    assert versions[-1] == get_data_version(published)
+    assert len(versions) == 2
@@ -0,0 +1,47 @@
+# tests/test_event_resolution.py
+from event_resolution import resolve_events
+
+
+def _event(source, title, start, city, url):
+    return {"source": source, "title": title, "start": start, "city": city, "url": url, "description": ""}
+
+
+def test_same_event_from_two_sources_is_merged():
+    events = [
+        _event("ticketmaster", "Coldplay: Music of the Spheres", "2026-11-20T20:00:00-05:00", "Lima",
+               "https://tm/coldplay"),
+        _event("eventbrite", "Coldplay - Music of the Spheres", "2026-11-20T20:00:00-05:00", "Lima, Peru",
+               "https://eb/coldplay"),
+    ]
+
+    resolved, stats = resolve_events(events)
+
+    assert stats["duplicados_fusionados"] == 1
+    assert resolved[0]["sources"] == ["ticketmaster", "eventbrite"]
+    assert resolved[0]["urls"] == ["https://tm/coldplay", "https://eb/coldplay"]
+
+
+def test_same_title_on_different_days_is_not_merged():
+    events = [
+        _event("ticketmaster", "Coldplay: Music of the Spheres", "2026-11-20T20:00:00-05:00", "Lima",
+               "https://tm/coldplay-1"),
+        _event("ticketmaster", "Coldplay: Music of the Spheres", "2026-11-21T20:00:00-05:00", "Lima",
+               "https://tm/coldplay-2"),
+    ]
+
+    resolved, stats = resolve_events(events)
+
+    assert len(resolved) == 2
+    assert stats["duplicados_fusionados"] == 0
+
+
+def test_undated_events_from_different_cities_are_not_merged():
+    events = [
+        _event("eventbrite", "Taller de Fotografía", None, "Lima", "https://eb/foto-lima"),
+        _event("eventbrite", "Taller de Fotografía", None, "Arequipa", "https://eb/foto-aqp"),
+    ]
+
+    resolved, stats = resolve_events(events)
+
+    assert len(resolved) == 2
+    assert stats["comparaciones"] == 0
@@ -0,0 +1,62 @@
+# tests/test_explorer.py
+import pytest
+
+from change_feed import sync_search_index
+from explorer import cache_version, query_jobs
+from redis_utils import get_data_version, store_data_in_redis
+
+JOBS = [
+    {"id": "10", "urn": "urn:li:jobPosting:10", "puesto": "Analista de Datos", "empresa": {"nombre": "Interbank"},
+     "lugar": "Lima, Perú", "fecha_creacion": "2026-10-01"},
+    {"id": "11", "urn": "urn:li:jobPosting:11", "puesto": "Analista BI", "empresa": {"nombre": "Lima Gas"},
+     "lugar": "Arequipa, Perú", "fecha_creacion": "2026-10-02"},
+    {"id": "12", "urn": "urn:li:jobPosting:12", "puesto": "Analista Contable", "empresa": {"nombre": "BCP"},
+     "lugar": "Lima, Perú", "fecha_creacion": "2026-10-02"},
+    {"id": "13", "urn": "urn:li:jobPosting:13", "puesto": "Vendedor", "empresa": {"nombre": "Rimac"},
+     "lugar": "Lima, Perú"},
+]
+
+
+@pytest.fixture(params=["dataset", "indice"])
+def jobs_store(request, redis_client):
+    store_data_in_redis("scraper_4", JOBS, redis_client)
+    if request.param == "indice":
+        sync_search_index(redis_client)
+    return redis_client
+
+
+def _ids(result):
+    return [row["id"] for row in result[1]]
+
+
+def test_company_filter_only_looks_at_company(jobs_store):
+    assert _ids(query_jobs(company="Lima")) == ["11"]
+
+
+def test_location_filter_only_looks_at_location(jobs_store):
+    assert _ids(query_jobs(location="Lima")) == ["12", "10", "13"]
+
+
+def test_text_filter_only_looks_at_title(jobs_store):
+    assert _ids(query_jobs(text="analista", location="Lima")) == ["12", "10"]
+    assert _ids(query_jobs(text="interbank")) == []
+
+
+def test_same_order_with_and_without_index(jobs_store):
+    total, rows = query_jobs()
+    assert total == 4
+    assert [row["id"] for row in rows] == ["12", "11", "10", "13"]
+
+
+def test_cache_version_changes_when_the_index_catches_up(redis_client):
+    store_data_in_redis("scraper_4", JOBS[:2], redis_client)
+    sync_search_index(redis_client)
+    store_data_in_redis("scraper_4", JOBS, redis_client)
+
+    # Manifiesto nuevo, índice todavía viejo
+    before_sync = cache_version(get_data_version(redis_client))
+    sync_search_index(redis_client)
+    after_sync = cache_version(get_data_version(redis_client))
+
+    assert before_sync[0] == after_sync[0]
+    assert before_sync != after_sync
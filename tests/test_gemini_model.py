@@ -0,0 +1,106 @@
+# tests/test_gemini_model.py
+import time
+
+import config
+from fake_backends import FakeGeminiModel, FakeResponse
+from gemini_model import MAX_TOOL_STEPS, generate_insights
+from model_guard import get_guard_metrics
+
+
+def _tool_results(contents):
+    """Respuestas de herramientas devueltas al modelo, por nombre."""
+    results = {}
+    for content in contents:
+        for part in getattr(content, "parts", []):
+            response = part.to_dict().get("function_response")
+            if response:
+                results[response["name"]] = response["response"]["content"]
+    return results
+
+
+def test_tool_loop_runs_tools_and_returns_final_answer(published):
+    model = FakeGeminiModel([
+        FakeResponse.call("search_jobs", keyword="analista", location="lima"),
+        FakeResponse.call("list_events", start_date="2030-01-01"),
+        FakeResponse("Hay 1 oferta de analista en Lima."),
+    ])
+
+    answer = generate_insights("¿Qué ofertas de analista hay en Lima?", model=model, use_tools=True)
+
+    assert answer == "Hay 1 oferta de analista en Lima."
+    assert len(model.calls) == 3
+    assert all(call.get("tools") for call in model.calls)
+    results = _tool_results(model.calls[-1]["contents"])
+    assert results["search_jobs"]["total"] == 1
+    assert results["search_jobs"]["ofertas"][0]["puesto"] == "Analista de Datos"
+    assert results["list_events"]["total"] == 1
+
+
+def test_tool_loop_asks_for_final_answer_after_max_steps(published):
+    model = FakeGeminiModel(lambda contents, kwargs: (
+        FakeResponse("Respuesta final.") if "tool_config" in kwargs
+        else FakeResponse.call("count_jobs_by", field="empresa")
+    ))
+
+    answer = generate_insights("Muéstrame ofertas de datos", model=model, use_tools=True)
+
+    assert answer == "Respuesta final."
+    assert len(model.calls) == MAX_TOOL_STEPS + 1
+    last = model.calls[-1]
+    # Las herramientas siguen declaradas (el historial tiene partes de funciones),
+    # pero el modelo ya no puede llamarlas
+    assert last["tools"]
+    assert last["tool_config"]._gapic_tool_config.function_calling_config.mode.name == "NONE"
+    assert "count_jobs_by" in _tool_results(last["contents"])
+    assert last["contents"][-1].role == "user"
+    assert "Responde ahora" in last["contents"][-1].parts[0].text
+
+
+def test_flash_answers_general_questions_without_pro(redis_client):
+    flash = FakeGeminiModel([FakeResponse("¡Hola! Te ayudo con empleo y eventos.")])
+    pro = FakeGeminiModel([FakeResponse("pro")])
+
+    answer = generate_insights("hola, quién eres", models={"flash": flash, "pro": pro})
+
+    assert answer.startswith("¡Hola!")
+    assert len(flash.calls) == 1
+    assert not pro.calls
+
+
+def test_empty_flash_answer_escalates_to_pro(published):
+    flash = FakeGeminiModel([FakeResponse("")])
+    pro = FakeGeminiModel([FakeResponse("Hay 2 ofertas.")])
+
+    answer = generate_insights("¿Cuántas ofertas hay este mes?", models={"flash": flash, "pro": pro})
+
+    assert answer == "Hay 2 ofertas."
+    assert len(flash.calls) == 1
+    assert len(pro.calls) == 1
+
+
+def test_flash_timeout_escalates_to_pro(redis_client, monkeypatch):
+    monkeypatch.setattr(config, "GEMINI_DEADLINE_SECONDS", 0.2)
+
+    def stuck(contents, kwargs):
+        time.sleep(1)
+        return FakeResponse("tarde")
+
+    flash = FakeGeminiModel(stuck)
+    pro = FakeGeminiModel([FakeResponse("Respuesta del Pro.")])
+
+    started = time.monotonic()
+    answer = generate_insights("hola", models={"flash": flash, "pro": pro})
+
+    assert answer == "Respuesta del Pro."
+    assert time.monotonic() - started < 1
+    assert get_guard_metrics()["niveles"]["flash"]["timeouts"] == 1
+
+
+def test_json_requests_go_straight_to_pro(published):
+    flash = FakeGeminiModel([FakeResponse("{}")])
+    pro = FakeGeminiModel([FakeResponse('```json\n{"resumen_mercado": "ok"}\n```')])
+
+    answer = generate_insights("Dame el análisis en JSON", models={"flash": flash, "pro": pro})
+
+    assert answer == {"resumen_mercado": "ok"}
+    assert not flash.calls
@@ -0,0 +1,35 @@
+# tests/test_job_tools.py
+import pytest
+
+from change_feed import sync_search_index
+from job_tools import search_jobs
+from search_index import index_ready
+
+
+@pytest.fixture(params=["dataset", "indice"])
+def jobs_store(request, published):
+    """Las mismas búsquedas con y sin índice invertido."""
+    if request.param == "indice":
+        sync_search_index(published)
+        assert index_ready(published)
+    return published
+
+
+def _ids(result):
+    return sorted(job["id"] for job in result["ofertas"])
+
+
+def test_keyword_matches_skills(jobs_store):
+    assert _ids(search_jobs(keyword="python")) == ["1"]
+
+
+def test_keyword_matches_title(jobs_store):
+    assert _ids(search_jobs(keyword="vendedor")) == ["2"]
+
+
+def test_each_filter_applies_to_its_own_field(jobs_store):
+    # "Lima Gas" es una empresa de Arequipa: no debe salir por ubicación
+    assert _ids(search_jobs(location="lima")) == ["1"]
+    assert _ids(search_jobs(company="lima")) == ["2"]
+    assert _ids(search_jobs(keyword="analista", company="interbank", location="lima")) == ["1"]
+    assert _ids(search_jobs(keyword="analista", company="lima gas")) == []
@@ -0,0 +1,57 @@
+# tests/test_local_snapshot.py
+import pytest
+
+import config
+from redis_utils import (
+    FallbackBackend,
+    LocalSnapshotBackend,
+    RedisBackend,
+    get_data_version,
+    store_data_in_redis,
+)
+
+
+def _jobs(n, puesto="Analista"):
+    return [{"urn": f"urn:li:jobPosting:{i}", "puesto": f"{puesto} {i}", "lugar": "Lima, Perú"} for i in range(n)]
+
+
+@pytest.fixture
+def local_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "LOCAL_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "PUBLISH_BACKENDS", "redis,local")
+    return str(tmp_path)
+
+
+def test_slice_round_trips_through_offsets(redis_client, local_dir):
+    store_data_in_redis("scraper_4", _jobs(10), redis_client)
+    local = LocalSnapshotBackend(local_dir)
+
+    assert local.load_slice("scraper_4", 3, 6) == _jobs(10)[3:6]
+    assert local.load_slice("scraper_4", 8, 100) == _jobs(10)[8:]
+    assert local.load_slice("scraper_4", 5, 5) == []
+    assert local.load_datasets(["scraper_4"]) == (get_data_version(redis_client), {"scraper_4": _jobs(10)})
+
+
+def test_each_dataset_keeps_its_own_current_version(redis_client, local_dir):
+    store_data_in_redis("scraper_4", _jobs(2), redis_client)
+    store_data_in_redis("events_peru", [{"url": "https://e/1", "title": "Feria"}], redis_client)
+    local = LocalSnapshotBackend(local_dir)
+
+    version, datasets = local.load_datasets(["scraper_4", "events_peru"])
+    assert version == get_data_version(redis_client) == 2
+    assert len(datasets["scraper_4"]) == 2
+    assert len(datasets["events_peru"]) == 1
+
+
+def test_stale_local_copy_falls_back_to_redis(redis_client, local_dir, monkeypatch):
+    store_data_in_redis("scraper_4", _jobs(2), redis_client)
+    # Otra máquina publica solo en Redis: la copia local queda atrasada
+    monkeypatch.setattr(config, "PUBLISH_BACKENDS", "redis")
+    store_data_in_redis("scraper_4", _jobs(3, puesto="Gerente"), redis_client)
+
+    backend = FallbackBackend(LocalSnapshotBackend(local_dir), RedisBackend(redis_client))
+
+    assert backend.get_data_version() == get_data_version(redis_client)
+    _, datasets = backend.load_datasets(["scraper_4"])
+    assert datasets["scraper_4"] == _jobs(3, puesto="Gerente")
+    assert backend.load_slice("scraper_4", 0, 1) == _jobs(3, puesto="Gerente")[:1]
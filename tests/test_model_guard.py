@@ -0,0 +1,139 @@
+# tests/test_model_guard.py
+import threading
+import time
+
+import pytest
+
+from fake_backends import FakeGeminiModel, FakeResponse
+from model_guard import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    CircuitBreaker,
+    GuardedModel,
+    GuardMetrics,
+    ModelTimeoutError,
+    ModelUnavailableError,
+    answer_with_fallback,
+    get_guard_metrics,
+)
+
+
+def _guarded(script, deadline=1.0, hedge_after=None, breaker=None):
+    return GuardedModel(
+        FakeGeminiModel(script),
+        breaker or CircuitBreaker(failure_threshold=2, reset_seconds=0.2),
+        GuardMetrics(),
+        deadline_seconds=deadline,
+        hedge=hedge_after is not None,
+        hedge_after_seconds=hedge_after,
+    )
+
+
+def _slow(seconds, text="tarde"):
+    def script(contents, kwargs):
+        time.sleep(seconds)
+        return FakeResponse(text)
+    return script
+
+
+def test_deadline_cuts_slow_calls():
+    guarded = _guarded(_slow(1), deadline=0.1)
+
+    started = time.monotonic()
+    with pytest.raises(ModelTimeoutError):
+        guarded.generate_content("hola")
+
+    assert time.monotonic() - started < 0.5
+    assert guarded.metrics.counts["timeouts"] == 1
+
+
+def test_errors_propagate_and_count():
+    def boom(contents, kwargs):
+        raise ValueError("500 de Vertex")
+
+    guarded = _guarded(boom)
+    with pytest.raises(ValueError):
+        guarded.generate_content("hola")
+    assert guarded.metrics.counts["errores"] == 1
+
+
+def test_hedge_wins_when_first_call_stalls():
+    calls = []
+    lock = threading.Lock()
+
+    def first_stalls(contents, kwargs):
+        with lock:
+            calls.append(1)
+            number = len(calls)
+        if number == 1:
+            time.sleep(1)
+            return FakeResponse("primera")
+        return FakeResponse("hedge")
+
+    guarded = _guarded(first_stalls, deadline=2, hedge_after=0.05)
+
+    started = time.monotonic()
+    assert guarded.generate_content("hola").text == "hedge"
+    assert time.monotonic() - started < 0.5
+    snapshot = guarded.metrics.snapshot()
+    assert snapshot["hedges_lanzados"] == 1
+    assert snapshot["hedges_ganados"] == 1
+    assert snapshot["tasa_hedge_ganado"] == 1.0
+
+
+def test_no_hedge_when_first_call_is_fast():
+    guarded = _guarded([FakeResponse("rápida")], hedge_after=0.5)
+
+    assert guarded.generate_content("hola").text == "rápida"
+    assert guarded.metrics.counts["hedges_lanzados"] == 0
+
+
+def test_breaker_opens_then_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.2)
+    guarded = _guarded(_slow(0.5), deadline=0.05, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(ModelTimeoutError):
+            guarded.generate_content("hola")
+    assert breaker.state == BREAKER_OPEN
+
+    # Abierto: falla rápido sin llamar al modelo
+    calls_before = len(guarded.model.calls)
+    with pytest.raises(ModelUnavailableError):
+        guarded.generate_content("hola")
+    assert len(guarded.model.calls) == calls_before
+    assert guarded.metrics.counts["rechazadas_breaker"] == 1
+
+    time.sleep(0.25)
+    assert breaker.state == BREAKER_HALF_OPEN
+
+    # La llamada de prueba sale bien: se cierra
+    guarded.model = FakeGeminiModel([FakeResponse("ok")])
+    assert guarded.generate_content("hola").text == "ok"
+    assert breaker.state == BREAKER_CLOSED
+
+
+def test_half_open_lets_one_probe_and_reopens_on_failure():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.1)
+    breaker.record_failure()
+    time.sleep(0.15)
+
+    assert breaker.allow()
+    # Solo una llamada de prueba a la vez
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+
+
+def test_answer_with_fallback_serves_last_good_answer(redis_client):
+    assert answer_with_fallback("k", lambda: {"resumen": "ok"}) == {"resumen": "ok"}
+
+    def unavailable():
+        raise ModelUnavailableError("abierto")
+
+    assert answer_with_fallback("k", unavailable) == {"resumen": "ok"}
+    assert get_guard_metrics()["respuestas_cacheadas"] == 1
+
+    with pytest.raises(ModelUnavailableError):
+        answer_with_fallback("otra", unavailable)
@@ -0,0 +1,20 @@
+# tests/test_question_router.py
+from question_router import ROUTE_FULL, ROUTE_NONE, route_question
+
+
+def test_short_first_message_skips_data():
+    question = "¿Qué tal?"
+    # La app ya agregó la pregunta actual al historial
+    assert route_question(question, [{"role": "user", "content": question}]).mode == ROUTE_NONE
+    assert route_question(question).mode == ROUTE_NONE
+
+
+def test_short_follow_up_uses_full_data():
+    history = [
+        {"role": "user", "content": "¿Qué ofertas de datos hay en Lima?"},
+        {"role": "assistant", "content": "Hay 3 ofertas..."},
+        {"role": "user", "content": "¿Y el segundo?"},
+    ]
+    route = route_question("¿Y el segundo?", history)
+    assert route.mode == ROUTE_FULL
+    assert route.reason == "seguimiento"
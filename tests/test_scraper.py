@@ -0,0 +1,114 @@
+# tests/test_scraper.py
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import scraper
+from redis_utils import get_manifest, load_data_from_redis
+from search_index import index_size, search
+
+
+def _page(*ids, lugar="Lima, Perú"):
+    return [
+        {"id": job_id, "urn": f"urn:li:jobPosting:{job_id}", "puesto": "Analista de Datos", "lugar": lugar}
+        for job_id in ids
+    ]
+
+
+@pytest.fixture
+def fake_linkedin(monkeypatch):
+    """Páginas guionadas en lugar de LinkedIn; sin detalle de ofertas."""
+    def use(pages):
+        monkeypatch.setattr(scraper, "iter_parsed_pages", lambda queries: iter(pages))
+    monkeypatch.setattr(scraper, "enrich_jobs", lambda jobs, client=None: jobs)
+    return use
+
+
+def test_index_is_updated_only_after_commit(redis_client, fake_linkedin):
+    seen_during_run = []
+
+    def pages():
+        yield "consulta 1", _page("1", "2")
+        seen_during_run.append(index_size(redis_client))
+        yield "consulta 2", _page("3")
+        seen_during_run.append(index_size(redis_client))
+
+    fake_linkedin(pages())
+    _, total = scraper.stream_jobs_to_redis(queries=[], client=redis_client)
+
+    assert total == 3
+    assert seen_during_run == [0, 0]
+    assert search("analista", client=redis_client)["total"] == 3
+
+
+def test_next_run_removes_jobs_that_disappeared(redis_client, fake_linkedin):
+    fake_linkedin([("consulta", _page("1", "2"))])
+    scraper.stream_jobs_to_redis(queries=[], client=redis_client)
+
+    fake_linkedin([("consulta", _page("2"))])
+    scraper.stream_jobs_to_redis(queries=[], client=redis_client)
+
+    result = search("analista", client=redis_client)
+    assert [job["id"] for job in result["ofertas"]] == ["2"]
+
+
+def test_failed_run_keeps_the_previous_version(redis_client, fake_linkedin):
+    fake_linkedin([("consulta", _page("1", "2"))])
+    scraper.stream_jobs_to_redis(queries=[], client=redis_client)
+    manifest_before = get_manifest(redis_client)
+
+    def interrupted():
+        yield "consulta", _page("3")
+        raise KeyboardInterrupt
+
+    fake_linkedin(interrupted())
+    with pytest.raises(KeyboardInterrupt):
+        scraper.stream_jobs_to_redis(queries=[], client=redis_client)
+
+    assert get_manifest(redis_client) == manifest_before
+    assert sorted(job["id"] for job in load_data_from_redis("scraper_4", redis_client)) == ["1", "2"]
+    assert search("analista", client=redis_client)["total"] == 2
+    partial = json.loads(redis_client.get("scraper_4_data:last_partial"))
+    assert partial["count"] == 1
+    assert redis_client.llen(partial["key"]) == 1
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="los workers heredan el parser falso por fork",
+)
+def test_parse_error_in_a_worker_skips_only_that_page(monkeypatch):
+    pools = []
+
+    class RecordingPool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.shut_down = False
+            pools.append(self)
+
+        def shutdown(self, *args, **kwargs):
+            self.shut_down = True
+            super().shutdown(*args, **kwargs)
+
+    def fake_parse(html, today):
+        if "roto" in html:
+            raise ValueError("HTML inesperado")
+        return _page(html.split()[-1])
+
+    def fake_fetch(query, page):
+        broken = "roto" if (query["label"], page) == ("q1", 1) else ""
+        return f"data-entity-urn {broken} {query['label']}-{page}"
+
+    monkeypatch.setattr(scraper, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(scraper, "parse_jobs_page", fake_parse)
+    monkeypatch.setattr(scraper, "fetch_search_page", fake_fetch)
+
+    pages = list(scraper.iter_parsed_pages(
+        [{"label": "q1"}, {"label": "q2"}], max_pages=3, parser_workers=2, queue_size=2,
+    ))
+
+    ids = sorted(job["id"] for _, jobs in pages for job in jobs)
+    assert ids == ["q1-0", "q1-2", "q2-0", "q2-1", "q2-2"]
+    assert len(pools) == 1 and pools[0].shut_down
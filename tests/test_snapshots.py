@@ -0,0 +1,57 @@
+# tests/test_snapshots.py
+import json
+
+from snapshots import (
+    TOP_TERMS,
+    _aggregates_key,
+    compute_aggregates,
+    load_snapshot,
+    record_snapshot,
+    record_snapshot_chunks,
+    term_trend,
+)
+
+
+def _jobs(n, extra_title=""):
+    return [
+        {
+            "urn": f"urn:li:jobPosting:{i}",
+            "puesto": f"Analista puesto{i} {extra_title}".strip(),
+            "empresa": {"nombre": "ACME"},
+            "lugar": "Lima, Perú",
+        }
+        for i in range(n)
+    ]
+
+
+def test_chunked_snapshot_matches_the_dataset(redis_client):
+    day1 = _jobs(5)
+    day2 = _jobs(4) + [{"urn": "urn:li:jobPosting:99", "puesto": "Nuevo"}]
+    day2[0] = dict(day2[0], lugar="Arequipa, Perú")
+
+    record_snapshot_chunks("scraper_4", [day1[:2], day1[2:]], client=redis_client, day="2026-10-01")
+    record_snapshot_chunks("scraper_4", [day2[:3], day2[3:]], client=redis_client, day="2026-10-02")
+
+    key = lambda r: r["urn"]
+    assert sorted(load_snapshot("scraper_4", "2026-10-01", redis_client), key=key) == sorted(day1, key=key)
+    assert sorted(load_snapshot("scraper_4", "2026-10-02", redis_client), key=key) == sorted(day2, key=key)
+    stored = json.loads(redis_client.hget(_aggregates_key("scraper_4"), "2026-10-02"))
+    assert stored == compute_aggregates(day2)
+
+
+def test_term_trend_counts_terms_outside_the_top(redis_client):
+    # Más de TOP_TERMS términos distintos: "puesto7" no entra en el top
+    record_snapshot("scraper_4", _jobs(TOP_TERMS + 20), client=redis_client, day="2026-10-01")
+
+    trend = term_trend("puesto7", "2026-10-01", "2026-10-01", client=redis_client)
+    assert trend == [{"fecha": "2026-10-01", "ofertas": 1, "total": TOP_TERMS + 20}]
+    assert term_trend("cocinero", "2026-10-01", "2026-10-01", client=redis_client)[0]["ofertas"] == 0
+
+
+def test_term_trend_reports_unknown_for_days_with_only_the_top(redis_client):
+    day = {"total": 500, "terminos_puesto": {f"t{i}": 10 for i in range(TOP_TERMS)}}
+    redis_client.hset(_aggregates_key("scraper_4"), "2026-09-01", json.dumps(day))
+
+    trend = term_trend("cocinero", "2026-09-01", "2026-09-01", client=redis_client)
+    assert trend[0]["ofertas"] is None
+    assert term_trend("t3", "2026-09-01", "2026-09-01", client=redis_client)[0]["ofertas"] == 10
@@ -3,7 +3,13 @@ import json
 import requests
 
 import config
+from context_artifacts import materialize_context
+from daily_report import refresh_after_publish
+from change_feed import sync_event_index
+from event_index import add_event_times
+from event_resolution import resolve_events
 from redis_utils import get_redis_client, store_data_in_redis
+from snapshots import record_snapshot
 
 # Token de Eventbrite (evita fallo si no existe en config)
 EVENTBRITE_TOKEN = getattr(config, "EVENTBRITE_TOKEN", "")
@@ -180,8 +186,9 @@ def fetch_events_rapidapi_peru(city="Lima", country="Peru", max_results=50):
 
 def run_and_store_events():
     """
-    Ejecuta los scrapers de eventos, une los resultados
-    y los guarda en Redis bajo la clave 'events_peru_data'.
+    Ejecuta los scrapers de eventos, une los resultados, fusiona duplicados
+    entre fuentes y los publica en Redis como 'events_peru_data:v:<run_id>'
+    (detrás del manifiesto 'datasets:current').
     """
     client = get_redis_client()
 
@@ -190,10 +197,26 @@ def run_and_store_events():
     events += fetch_events_eventbrite_lima(limit=50)
     events += fetch_events_rapidapi_peru(city="Lima", country="Peru", max_results=50)
 
+    events, dedupe_stats = resolve_events(events)
+    # inicio/fin a epoch (hora de Lima) una sola vez, al ingerir
+    for event in events:
+        add_event_times(event)
+
     key = store_data_in_redis("events_peru", events, client=client)
+    record_snapshot("events_peru", events, client=client)
+    # Índice temporal al día con el feed de cambios (sin reconstruirlo)
+    sync_event_index(client=client)
+    materialize_context(client=client)
+    refresh_after_publish(client=client)
 
     print(f"Datos de eventos guardados en Redis con la clave '{key}'")
-    print(f"Total de eventos encontrados: {len(events)}\n")
+    print(
+        f"Total de eventos encontrados: {dedupe_stats['eventos_entrada']} "
+        f"→ {len(events)} tras deduplicar "
+        f"({dedupe_stats['duplicados_fusionados']} duplicados, "
+        f"tasa {dedupe_stats['tasa_dedupe']:.1%}, "
+        f"{dedupe_stats['comparaciones']} comparaciones)\n"
+    )
 
     print("Ejemplo (primeros 3 eventos):")
     print(json.dumps(events[:3], indent=2, ensure_ascii=False))